@@ -1,16 +1,28 @@
 import streamlit as st
 import pandas as pd
-import usaddress
 import io
-import zipfile
-from openpyxl import Workbook
-import string
 import time
-import re
 import logging
 from datetime import datetime
 import os
 import gc  # For garbage collection
+import tempfile
+from leadcleanup.dedup import fuzzy_duplicate_clusters, company_cluster_ids
+from leadcleanup.partitioning import GEOGRAPHIC_LEVELS, PartitionIndex, geographic_partitions
+from leadcleanup.columns import fill_missing, join_columns
+from leadcleanup.templates import DATA_TEMPLATES, TemplateError, compile_template
+from leadcleanup.formats import NEW_FORMAT_SPECIFIC_COLUMNS, detect_input_format, normalize_dataframe, get_format_info, compact_dtypes
+from leadcleanup.cleaning import clean_address
+from leadcleanup.fileio import read_frame, serialize_frame, write_archive
+from leadcleanup.options import (build_address_plan, clean_address_rows, full_combined_address, phone_credit_score,
+                                 complete_contact_export, filter_industries, FULL_ADDRESS_PHONE_COLUMNS, CONTACT_PHONE_COLUMNS)
+from leadcleanup.jobs import JobManager, job_key
+from leadcleanup.datasets import Dataset, DatasetStore, content_hash, dataset_id
+from leadcleanup.resultcache import ResultCache
+from leadcleanup.dnc import phone_dnc_pairs, clean_dnc_phones
+from leadcleanup.emails import EMAIL_COLUMNS, DomainIndex
+from leadcleanup.history import HISTORY_COLUMNS, parse_history
+from leadcleanup.hashing import PHONE_COLUMNS, PRECOMPUTED_EMAIL_HASH_COLUMNS, HASH_TYPES, audience_hashes
 try:
     import psutil  # For memory monitoring
 except ImportError:
@@ -21,216 +33,6 @@ logging.basicConfig(level=logging.INFO,
                    format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Column mapping between old and new formats
-OLD_TO_NEW_COLUMN_MAPPING = {
-    # Core identity columns
-    'FIRST_NAME': 'FIRST_NAME',
-    'LAST_NAME': 'LAST_NAME',
-    
-    # Address columns
-    'PERSONAL_ADDRESS': 'PERSONAL_ADDRESS',
-    'PERSONAL_CITY': 'PERSONAL_CITY',
-    'PERSONAL_STATE': 'PERSONAL_STATE',
-    'PERSONAL_ZIP': 'PERSONAL_ZIP',
-    'PERSONAL_ZIP4': 'PERSONAL_ZIP4',
-    
-    # Phone columns
-    'DIRECT_NUMBER': 'DIRECT_NUMBER',
-    'MOBILE_PHONE': 'MOBILE_PHONE',
-    'PERSONAL_PHONE': 'PERSONAL_PHONE',
-    'DNC': 'DNC',
-    
-    # Demographics
-    'AGE_RANGE': 'AGE_RANGE',
-    'CHILDREN': 'CHILDREN',
-    'GENDER': 'GENDER',
-    'HOMEOWNER': 'HOMEOWNER',
-    'MARRIED': 'MARRIED',
-    'NET_WORTH': 'NET_WORTH',
-    'INCOME_RANGE': 'INCOME_RANGE',
-    
-    # Email columns
-    'BUSINESS_EMAIL': 'BUSINESS_EMAIL',
-    'PERSONAL_EMAIL': 'PERSONAL_EMAILS',  # Note: old had singular, new has plural
-    'ADDITIONAL_PERSONAL_EMAILS': 'PERSONAL_EMAILS',  # Map to same field
-    'SHA256_PERSONAL_EMAIL': 'SHA256_PERSONAL_EMAIL',
-    'SHA256_BUSINESS_EMAIL': 'SHA256_BUSINESS_EMAIL',
-    
-    # Professional columns
-    'JOB_TITLE': 'JOB_TITLE',
-    'DEPARTMENT': 'DEPARTMENT',
-    'SENIORITY_LEVEL': 'SENIORITY_LEVEL',
-    'LINKEDIN_URL': 'LINKEDIN_URL',
-    
-    # Company columns
-    'COMPANY_NAME': 'COMPANY_NAME',
-    'COMPANY_ADDRESS': 'COMPANY_ADDRESS',
-    'COMPANY_DOMAIN': 'COMPANY_DOMAIN',
-    'COMPANY_EMPLOYEE_COUNT': 'COMPANY_EMPLOYEE_COUNT',
-    'COMPANY_LINKEDIN_URL': 'COMPANY_LINKEDIN_URL',
-    'COMPANY_PHONE': 'COMPANY_PHONE',
-    'COMPANY_REVENUE': 'COMPANY_REVENUE',
-    'COMPANY_SIC': 'COMPANY_SIC',
-    'COMPANY_NAICS': 'COMPANY_NAICS',
-    'COMPANY_CITY': 'COMPANY_CITY',
-    'COMPANY_STATE': 'COMPANY_STATE',
-    'COMPANY_ZIP': 'COMPANY_ZIP',
-    'COMPANY_INDUSTRY': 'COMPANY_INDUSTRY',
-    
-    # Professional address
-    'PROFESSIONAL_ADDRESS': 'PROFESSIONAL_ADDRESS',
-    'PROFESSIONAL_ADDRESS_2': 'PROFESSIONAL_ADDRESS_2',
-    'PROFESSIONAL_CITY': 'PROFESSIONAL_CITY',
-    'PROFESSIONAL_STATE': 'PROFESSIONAL_STATE',
-    'PROFESSIONAL_ZIP': 'PROFESSIONAL_ZIP',
-    'PROFESSIONAL_ZIP4': 'PROFESSIONAL_ZIP4',
-    
-    # Skiptrace columns
-    'SKIPTRACE_CREDIT_RATING': 'SKIPTRACE_CREDIT_RATING',
-    'SKIPTRACE_DNC': 'SKIPTRACE_DNC',
-    'SKIPTRACE_EXACT_AGE': 'SKIPTRACE_EXACT_AGE',
-    'SKIPTRACE_B2B_COMPANY_NAME': 'SKIPTRACE_B2B_COMPANY_NAME',
-    'SKIPTRACE_B2B_PHONE': 'SKIPTRACE_B2B_PHONE',
-    'SKIPTRACE_B2B_SOURCE': 'SKIPTRACE_B2B_SOURCE',
-    'SKIPTRACE_B2B_WEBSITE': 'SKIPTRACE_B2B_WEBSITE'
-}
-
-# New format specific columns that don't exist in old format
-NEW_FORMAT_SPECIFIC_COLUMNS = [
-    'UUID', 'HEADLINE', 'INFERRED_YEARS_EXPERIENCE', 'COMPANY_NAME_HISTORY',
-    'JOB_TITLE_HISTORY', 'EDUCATION_HISTORY', 'COMPANY_DESCRIPTION',
-    'TWITTER_URL', 'FACEBOOK_URL', 'SOCIAL_CONNECTIONS', 'SKILLS', 'INTERESTS',
-    'SKIPTRACE_MATCH_SCORE', 'SKIPTRACE_NAME', 'SKIPTRACE_ADDRESS',
-    'SKIPTRACE_CITY', 'SKIPTRACE_STATE', 'SKIPTRACE_ZIP',
-    'SKIPTRACE_LANDLINE_NUMBERS', 'SKIPTRACE_WIRELESS_NUMBERS',
-    'SKIPTRACE_ETHNIC_CODE', 'SKIPTRACE_LANGUAGE_CODE', 'SKIPTRACE_IP',
-    'SKIPTRACE_B2B_ADDRESS', 'DEEP_VERIFIED_EMAILS'
-]
-
-def detect_input_format(df):
-    """
-    Detect whether the input file is in old or new format
-    Returns: 'old', 'new', or 'unknown'
-    """
-    # Check for new format specific columns
-    new_format_indicators = ['UUID', 'HEADLINE', 'DEEP_VERIFIED_EMAILS', 'SKILLS']
-    new_format_score = sum(1 for col in new_format_indicators if col in df.columns)
-    
-    # Check for old format specific patterns
-    old_format_indicators = ['BUSINESS_EMAIL_VALIDATION_STATUS', 'PERSONAL_EMAIL_VALIDATION_STATUS', 
-                           'SOCIAL_CONNECTIONS', 'LAST_UPDATED']
-    old_format_score = sum(1 for col in old_format_indicators if col in df.columns)
-    
-    # Additional checks for column structure differences
-    if 'PERSONAL_EMAIL' in df.columns and 'PERSONAL_EMAILS' not in df.columns:
-        old_format_score += 1
-    elif 'PERSONAL_EMAILS' in df.columns and 'PERSONAL_EMAIL' not in df.columns:
-        new_format_score += 1
-    
-    # Decision logic
-    if new_format_score > old_format_score:
-        return 'new'
-    elif old_format_score > new_format_score:
-        return 'old'
-    else:
-        # If scores are equal, check for presence of UUID (strong new format indicator)
-        if 'UUID' in df.columns:
-            return 'new'
-        else:
-            return 'old'  # Default to old format for compatibility
-
-def normalize_dataframe(df, detected_format):
-    """
-    Normalize DataFrame to a consistent internal format
-    """
-    if detected_format == 'old':
-        return normalize_old_format(df)
-    elif detected_format == 'new':
-        return normalize_new_format(df)
-    else:
-        # Unknown format - try to work with it as-is
-        return df.copy()
-
-def normalize_old_format(df):
-    """
-    Normalize old format to internal standard
-    """
-    normalized_df = df.copy()
-    
-    # Handle email columns - old format has singular PERSONAL_EMAIL
-    if 'PERSONAL_EMAIL' in normalized_df.columns and 'PERSONAL_EMAILS' not in normalized_df.columns:
-        normalized_df['PERSONAL_EMAILS'] = normalized_df['PERSONAL_EMAIL']
-    
-    # Ensure DNC column is properly formatted
-    if 'DNC' in normalized_df.columns:
-        # Convert boolean or other formats to Y/N
-        normalized_df['DNC'] = normalized_df['DNC'].apply(lambda x: 'Y' if str(x).upper() in ['Y', 'YES', 'TRUE', '1'] else 'N')
-    
-    return normalized_df
-
-def normalize_new_format(df):
-    """
-    Normalize new format to internal standard
-    """
-    normalized_df = df.copy()
-    
-    # Handle email columns - new format may have different structure
-    if 'PERSONAL_EMAILS' in normalized_df.columns and 'PERSONAL_EMAIL' not in normalized_df.columns:
-        # Extract first email from PERSONAL_EMAILS for compatibility
-        normalized_df['PERSONAL_EMAIL'] = normalized_df['PERSONAL_EMAILS'].apply(
-            lambda x: str(x).split(',')[0].strip() if pd.notna(x) and str(x) != '' else ''
-        )
-    
-    # Handle phone number columns that might have different formats
-    phone_cols = ['MOBILE_PHONE', 'DIRECT_NUMBER', 'PERSONAL_PHONE']
-    for col in phone_cols:
-        if col in normalized_df.columns:
-            # New format might have phone numbers in different format
-            normalized_df[col] = normalized_df[col].apply(lambda x: str(x) if pd.notna(x) else '')
-    
-    # Handle DNC columns that might be formatted differently
-    if 'DNC' not in normalized_df.columns:
-        # Create DNC column if it doesn't exist
-        normalized_df['DNC'] = 'N'
-    else:
-        # Ensure proper Y/N format
-        normalized_df['DNC'] = normalized_df['DNC'].apply(lambda x: 'Y' if str(x).upper() in ['Y', 'YES', 'TRUE', '1'] else 'N')
-    
-    return normalized_df
-
-def get_format_info(df, detected_format):
-    """
-    Get information about the detected format for user display
-    """
-    info = {
-        'format': detected_format,
-        'total_columns': len(df.columns),
-        'total_rows': len(df)
-    }
-    
-    if detected_format == 'old':
-        info['description'] = "Classic address cleaner format"
-        info['key_features'] = [
-            "Standard address and contact fields",
-            "Single personal email column",
-            "Traditional column structure"
-        ]
-    elif detected_format == 'new':
-        info['description'] = "Enhanced format with additional data"
-        info['key_features'] = [
-            "UUID for unique identification",
-            "Enhanced social and professional data",
-            "Deep verified emails",
-            "Skills and interests data"
-        ]
-    else:
-        info['description'] = "Unknown or custom format"
-        info['key_features'] = [
-            "Will attempt to process with available columns"
-        ]
-    
-    return info
-
 # Add CSS for responsive design - optimized
 st.markdown("""
 <style>
@@ -363,165 +165,33 @@ if 'user_preferences' not in st.session_state:
         'default_output_format': 'csv'
     }
 
-# Define abbreviation dictionaries with uppercase keys
-directional_abbr = {
-    'N': 'North', 'S': 'South', 'E': 'East', 'W': 'West',
-    'NE': 'Northeast', 'NW': 'Northwest', 'SE': 'Southeast', 'SW': 'Southwest',
-    'NORTH': 'North', 'SOUTH': 'South', 'EAST': 'East', 'WEST': 'West',
-    'NORTHEAST': 'Northeast', 'NORTHWEST': 'Northwest', 'SOUTHEAST': 'Southeast', 'SOUTHWEST': 'Southwest'
-}
-
-street_type_abbr = {
-    'ST': 'Street', 'AVE': 'Avenue', 'BLVD': 'Boulevard', 'RD': 'Road',
-    'LN': 'Lane', 'DR': 'Drive', 'CT': 'Court', 'PL': 'Plaza',
-    'SQ': 'Square', 'TER': 'Terrace', 'CIR': 'Circle', 'PKWY': 'Parkway',
-    'TRL': 'Trail', 'TRCE': 'Trace', 'HWY': 'Highway', 'CTR': 'Center',
-    'SPG': 'Spring', 'LK': 'Lake', 'ALY': 'Alley', 'BND': 'Bend', 'BRG': 'Bridge',
-    'BYU': 'Bayou', 'CLF': 'Cliff', 'COR': 'Corner', 'CV': 'Cove', 'CRK': 'Creek',
-    'XING': 'Crossing', 'GDN': 'Garden', 'GLN': 'Glen', 'GRN': 'Green',
-    'HBR': 'Harbor', 'HOLW': 'Hollow', 'IS': 'Island', 'JCT': 'Junction',
-    'KNL': 'Knoll', 'MDWS': 'Meadows', 'MTN': 'Mountain', 'PASS': 'Pass',
-    'PT': 'Point', 'RNCH': 'Ranch', 'SHRS': 'Shores', 'STA': 'Station',
-    'VLY': 'Valley', 'VW': 'View', 'WLK': 'Walk',
-    'ANX': 'Annex', 'ARC': 'Arcade', 'AV': 'Avenue', 'BCH': 'Beach',
-    'BG': 'Burg', 'BGS': 'Burgs', 'BLF': 'Bluff', 'BLFS': 'Bluffs',
-    'BOT': 'Bottom', 'BR': 'Branch', 'BRK': 'Brook', 'BRKS': 'Brooks',
-    'BTW': 'Between', 'CMN': 'Common', 'CMP': 'Camp', 'CNYN': 'Canyon',
-    'CPE': 'Cape', 'CSWY': 'Causeway', 'CLB': 'Club', 'CON': 'Corner',
-    'CORS': 'Corners', 'CP': 'Camp', 'CRES': 'Crescent', 'CRST': 'Crest',
-    'XRD': 'Crossroad', 'EXT': 'Extension', 'FALLS': 'Falls', 'FRK': 'Fork',
-    'FRKS': 'Forks', 'FT': 'Fort', 'FWY': 'Freeway', 'GDNS': 'Gardens',
-    'GTWAY': 'Gateway', 'HGHTS': 'Heights', 'HVN': 'Haven', 'HD': 'Head',
-    'HLLS': 'Hills', 'INLT': 'Inlet', 'JCTS': 'Junctions', 'KY': 'Key',
-    'KYS': 'Keys', 'LNDG': 'Landing', 'LGT': 'Light', 'LGTS': 'Lights',
-    'LF': 'Loaf', 'MNR': 'Manor', 'MLS': 'Mills', 'MSSN': 'Mission',
-    'MT': 'Mount', 'NCK': 'Neck', 'ORCH': 'Orchard', 'OVAL': 'Oval',
-    'PRK': 'Park', 'PKWYS': 'Parkways', 'PLN': 'Plain', 'PLZ': 'Plaza',
-    'PRT': 'Port', 'PR': 'Prairie', 'RAD': 'Radial', 'RDG': 'Ridge',
-    'RIV': 'River', 'RDGE': 'Ridge', 'RUN': 'Run', 'SHL': 'Shoal',
-    'SHLS': 'Shoals', 'SKWY': 'Skyway', 'SPGS': 'Springs', 'SPUR': 'Spur',
-    'STRM': 'Stream', 'STM': 'Stream', 'TRFY': 'Terrace', 'TRWY': 'Throughway',
-    'TPKE': 'Turnpike', 'UN': 'Union', 'VLG': 'Village', 'VIS': 'Vista',
-    'WAY': 'Way', 'EXPY': 'Expressway', 'FRWY': 'Freeway', 'TUNL': 'Tunnel',
-    'PLNS': 'Plains'
-}
-
-unit_abbr = {
-    'APT': 'Apartment', 'STE': 'Suite', 'BLDG': 'Building',
-    'UNIT': 'Unit', 'RM': 'Room', 'FL': 'Floor', 'DEP': 'Department',
-    'OFC': 'Office', 'SP': 'Space', 'LOT': 'Lot', 'TRLR': 'Trailer',
-    'HANGAR': 'Hangar', 'SLIP': 'Slip', 'PIER': 'Pier', 'DOCK': 'Dock'
-}
-
-
-# Helper function to expand a single word
-def expand_word(word):
-    cleaned_word = word.rstrip(string.punctuation)
-    upper_cleaned = cleaned_word.upper()
-    return directional_abbr.get(upper_cleaned,
-                                street_type_abbr.get(upper_cleaned,
-                                                    unit_abbr.get(upper_cleaned, word)))
-
-
-# Updated clean_address function
-@st.cache_data
-def clean_address(address):
-    """Parse and expand abbreviations in an address with a robust fallback."""
-    if pd.isna(address) or address == "":
-        return ""
-    
-    try:
-        parsed, address_type = usaddress.tag(address)
-        if address_type == 'Street Address':
-            cleaned_components = []
-            for key, value in parsed.items():
-                words = value.split()
-                expanded_words = [expand_word(word) for word in words]
-                expanded_value = " ".join(expanded_words)
-                cleaned_components.append(expanded_value)
-            return ' '.join(cleaned_components)
-        elif address_type == 'PO Box':
-            return 'PO Box ' + parsed['USPSBoxID']
-        else:
-            words = address.split()
-            cleaned = [expand_word(word) for word in words]
-            return ' '.join(cleaned)
-    except usaddress.RepeatedLabelError:
-        words = address.split()
-        cleaned = [expand_word(word) for word in words]
-        return ' '.join(cleaned)
-    except Exception as e:
-        logger.error(f"Error cleaning address '{address}': {str(e)}")
-        return address  # Return original if any error occurs
+# Function to split dataframe into batches
+# Not cached: slicing costs next to nothing, and the batches belong to the caller
+def split_dataframe(df, max_rows):
+    return [df[i:i + max_rows] for i in range(0, len(df), max_rows)]
 
 
-# Validate phone number function
-@st.cache_data
-def validate_phone(phone):
-    """Validate and format phone numbers"""
-    if pd.isna(phone) or phone == "":
-        return ""
-    
-    # Remove all non-digit characters
-    digits = re.sub(r'\D', '', str(phone))
-    
-    # Check if we have a valid number of digits
-    if len(digits) == 10:
-        return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+# Function to get the email domain index for a dataset
+# Built once per dataset id and shared across reruns and sessions (cache_resource returns the
+# object itself, not a copy); its arrays are read-only and the charts below only count integer codes
+@st.cache_resource(hash_funcs={Dataset: dataset_id}, max_entries=8, show_spinner=False)
+def get_domain_index(dataset):
+    return DomainIndex.build(dataset.df)
 
-    elif len(digits) == 11 and digits[0] == '1':
-        return f"({digits[1:4]}) {digits[4:7]}-{digits[7:]}"
 
-    elif len(digits) > 0:  # Return any non-empty digits in a basic format
-        return digits
-    else:
-        return ""  # Return empty string if no digits
+# Function to get a parsed JSON history column for a dataset
+# Parsed only when a history filter asks for it, then reused for every later query on the same upload
+@st.cache_resource(hash_funcs={Dataset: dataset_id}, max_entries=8, show_spinner=False)
+def _parsed_history_column(dataset, column):
+    return parse_history(dataset.df[column], column)
 
 
-# Function to split dataframe into batches
-@st.cache_data
-def split_dataframe(df, max_rows):
-    return [df[i:i + max_rows] for i in range(0, len(df), max_rows)]
+def get_history_column(dataset, column):
+    """Parsed history column; a copy, so callers cannot change the shared cached one"""
+    # With pyarrow the copy is a new Series over the same immutable Arrow buffers
+    return _parsed_history_column(dataset, column).copy()
 
 
-# Function to process and clean data
-@st.cache_data(show_spinner=False)
-def process_data(df, option, clean_addresses=True):
-    """Process dataframe based on selected option with error handling"""
-    try:
-        start_time = time.time()
-        
-        # Make a copy to avoid modifying the original
-        processed_df = df.copy()
-        
-        # Clean and process addresses if needed
-        if clean_addresses:
-            if option in ["Address + HoNWIncome", "Address + HoNWIncome & Phone", 
-                        "Full Combined Address", "Phone & Credit Score", "Split by State",
-                        "ZIP Split: Address+HoNW", "ZIP Split: Address+HoNW+Phone"]:
-                # Filter for rows with addresses
-                processed_df = processed_df[processed_df['PERSONAL_ADDRESS'].notna()]
-                # Apply address cleaning with progress tracking
-                processed_df['PERSONAL_ADDRESS_CLEAN'] = processed_df['PERSONAL_ADDRESS'].apply(clean_address)
-            elif option == "Complete Contact Export":
-                # For complete export, don't filter out rows without addresses
-                if 'PERSONAL_ADDRESS' in processed_df.columns:
-                    # Only clean addresses that exist
-                    processed_df['PERSONAL_ADDRESS_CLEAN'] = processed_df['PERSONAL_ADDRESS'].apply(
-                        lambda x: clean_address(x) if pd.notna(x) else x
-                    )
-        
-        # Further processing based on option...
-        # (The option-specific logic will be implemented in the main processing flow)
-        
-        processing_time = time.time() - start_time
-        logger.info(f"Processed {len(processed_df)} rows in {processing_time:.2f} seconds")
-        
-        return processed_df
-    except Exception as e:
-        logger.error(f"Error in process_data: {str(e)}")
-        raise e
-
 # Function to process DataFrame in chunks for memory efficiency
 @st.cache_data
 def process_in_chunks(df, chunk_size, processing_func, *args, **kwargs):
@@ -548,26 +218,7 @@ def process_in_chunks(df, chunk_size, processing_func, *args, **kwargs):
 # Function to create download button for dataframe
 def create_download_button(df, file_name, file_format="csv", help_text=""):
     """Create appropriate download button based on file format"""
-    if file_format.lower() == "csv":
-        data = df.to_csv(index=False).encode('utf-8')
-        mime = "text/csv"
-        ext = "csv"
-    elif file_format.lower() == "excel" or file_format.lower() == "xlsx":
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False)
-        buffer.seek(0)
-        data = buffer.getvalue()
-        mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        ext = "xlsx"
-    elif file_format.lower() == "json":
-        data = df.to_json(orient="records", indent=2).encode('utf-8')
-        mime = "application/json"
-        ext = "json"
-    else:
-        data = df.to_csv(index=False).encode('utf-8')
-        mime = "text/csv" 
-        ext = "csv"
+    data, mime, ext = serialize_frame(df, file_format)
     
     st.download_button(
         label=f"Download {file_name}.{ext}",
@@ -577,6 +228,150 @@ def create_download_button(df, file_name, file_format="csv", help_text=""):
         help=help_text
     )
 
+# Function to get the partition index for the loaded dataset
+def get_partition_index(df, column, subset=""):
+    """
+    Return a partition index over df from session state, building it on first use.
+    
+    Indexes are keyed on the loaded dataset's id, so a different upload never
+    reuses one even if it has the same number of rows. `subset` identifies any
+    filtering applied to the loaded data before grouping, so differently
+    filtered frames get their own index.
+    """
+    partitions = st.session_state['main_processing'].setdefault('partitions', {})
+    key = (st.session_state['main_processing']['dataset_id'], column, subset)
+    index = partitions.get(key)
+    if index is None or index.n_rows != len(df):
+        index = PartitionIndex.build(df, column)
+        partitions[key] = index
+    return index
+
+# Function to get the process-wide result cache
+@st.cache_resource
+def get_result_cache():
+    """
+    One byte-bounded cache per server process for loaded frames and job results.
+    
+    LEADCLEANUP_CACHE_MB sets the budget (default 1024); with LEADCLEANUP_SPILL_DIR
+    set, evicted frames are written there as Parquet instead of being dropped.
+    """
+    max_mb = int(os.environ.get('LEADCLEANUP_CACHE_MB', 1024))
+    return ResultCache(max_mb * 1024 * 1024, spill_dir=os.environ.get('LEADCLEANUP_SPILL_DIR'))
+
+# Function to get the process-wide store of parsed uploads
+@st.cache_resource
+def get_dataset_store():
+    """
+    Normalized uploads on local disk, keyed by content hash and shared by all sessions.
+    
+    LEADCLEANUP_DATA_DIR sets the location (default: the system temp directory) and
+    LEADCLEANUP_STORE_MB the disk budget (default 10240).
+    """
+    root = os.environ.get('LEADCLEANUP_DATA_DIR') or os.path.join(tempfile.gettempdir(), 'leadcleanup-datasets')
+    max_mb = int(os.environ.get('LEADCLEANUP_STORE_MB', 10240))
+    return DatasetStore(root, max_bytes=max_mb * 1024 * 1024)
+
+# Function to get the content hash of an uploaded file
+def upload_id(uploaded_file):
+    """SHA-256 of the uploaded bytes, computed once per upload and remembered for reruns"""
+    upload_ids = st.session_state.setdefault('upload_ids', {})
+    file_key = getattr(uploaded_file, 'file_id', None)
+    if file_key is None or file_key not in upload_ids:
+        upload_ids.clear()
+        upload_ids[file_key] = content_hash(uploaded_file.getvalue())
+    return upload_ids[file_key]
+
+# Function to get a loaded dataset's frame
+def get_dataset_frame(dataset_key):
+    """The normalized frame for dataset_key from memory or the disk store, or None"""
+    df = get_result_cache().get(dataset_key)
+    if df is None:
+        stored = get_dataset_store().load(dataset_key)
+        if stored is not None:
+            df = get_result_cache().put(dataset_key, stored[0])
+    return df
+
+# Function to load an uploaded file
+def load_upload(uploaded_file):
+    """
+    Return (dataset, format_info) for an uploaded file.
+    
+    The file is parsed and normalized only the first time its bytes are seen;
+    afterwards, including after switching options or in another session, the
+    frame comes from memory or the on-disk dataset store.
+    """
+    dataset_key = upload_id(uploaded_file)
+    format_info = get_result_cache().get(f"{dataset_key}:format_info")
+    df = get_result_cache().get(dataset_key)
+    if df is None or format_info is None:
+        stored = get_dataset_store().load(dataset_key)
+        if stored is not None:
+            df, format_info = stored
+        else:
+            uploaded_file.seek(0)
+            df = read_frame(uploaded_file)
+            detected_format = detect_input_format(df)
+            format_info = get_format_info(df, detected_format)
+            df = normalize_dataframe(df, detected_format)
+            df, format_info['memory'] = compact_dtypes(df)
+            if get_dataset_store().save(dataset_key, df, format_info):
+                # Work from the memory-mapped copy, so the parsed object columns can be freed
+                df = get_dataset_store().load(dataset_key)[0]
+        get_result_cache().put(dataset_key, df)
+        get_result_cache().put(f"{dataset_key}:format_info", format_info)
+    return Dataset(dataset_key, df), format_info
+
+# Function to get the process-wide background job manager
+@st.cache_resource
+def get_job_manager():
+    """One job manager per server process, shared by every session and rerun"""
+    return JobManager(max_workers=2, cache=get_result_cache())
+
+# Function to wait for a background job while showing its progress
+def wait_for_job(key):
+    """
+    Poll the job stored under key, mirroring its progress in a progress bar.
+    
+    Returns the job's result once it has finished, or None if there is no
+    such job or it failed.
+    """
+    job = get_job_manager().find(key)
+    if job is None:
+        return None
+    if not job.done:
+        job_progress = st.progress(job.progress, text=job.message)
+        while not job.wait(timeout=0.25):
+            job_progress.progress(job.progress, text=job.message)
+        job_progress.empty()
+    if job.status == 'failed':
+        st.error(f"Processing failed: {job.error}")
+        return None
+    return job.result
+
+# Function to run a processing step as a background job
+def run_job(task, settings, func, *args, **kwargs):
+    """
+    Run func(*args, **kwargs) off the script thread and wait for it.
+    
+    The job is keyed by the uploaded file, the task name and settings, so a
+    rerun with the same inputs (e.g. after picking another output format)
+    reuses the finished result instead of processing again. Results are
+    shared between reruns and must not be modified in place.
+    """
+    key = job_key(st.session_state['main_processing']['dataset_id'], task, settings)
+    # The result cache may drop a finished result before it is read; submitting
+    # again runs such an evicted job once more
+    for attempt in range(2):
+        job = get_job_manager().submit(key, func, *args, description=task, **kwargs)
+        result = wait_for_job(key)
+        if result is not None or job.status == 'failed':
+            break
+    if result is None:
+        if job.status != 'failed':
+            st.error(f"The result of '{task}' was dropped from memory before it could be shown. Please run it again.")
+        st.stop()
+    return result
+
 # Function to validate required columns
 def validate_columns(df, required_cols, option_name):
     """Check if all required columns exist, return True/False and error message"""
@@ -615,6 +410,9 @@ def show_data_preview(df, option, max_rows=5):
     elif option == "Split by State":
         highlight_cols = ['PERSONAL_ADDRESS', 'PERSONAL_CITY', 'PERSONAL_STATE']
     
+    elif option == "Hierarchical Split: State → ZIP3 → ZIP5":
+        highlight_cols = ['PERSONAL_ADDRESS', 'PERSONAL_CITY', 'PERSONAL_STATE', 'PERSONAL_ZIP']
+    
     elif option == "B2B Job Titles Focus":
         highlight_cols = ['FIRST_NAME', 'LAST_NAME', 'JOB_TITLE', 'COMPANY_NAME', 'COMPANY_INDUSTRY']
     
@@ -625,7 +423,7 @@ def show_data_preview(df, option, max_rows=5):
         highlight_cols = ['COMPANY_INDUSTRY']
     
     elif option == "Sha256":
-        highlight_cols = ['FIRST_NAME', 'LAST_NAME', 'SHA256_PERSONAL_EMAIL', 'SHA256_BUSINESS_EMAIL']
+        highlight_cols = ['FIRST_NAME', 'LAST_NAME'] + EMAIL_COLUMNS + PHONE_COLUMNS + PRECOMPUTED_EMAIL_HASH_COLUMNS
     
     elif option == "Complete Contact Export":
         # For complete export, highlight name, address, and phone fields
@@ -656,7 +454,7 @@ def show_data_preview(df, option, max_rows=5):
             'Column': df.columns,
             'Non-Null Count': df.count().values,
             'Null %': (1 - df.count() / len(df)) * 100,
-            'Data Type': df.dtypes.values
+            'Data Type': df.dtypes.astype(str).values
         })
         st.dataframe(col_info, use_container_width=True)
 
@@ -664,29 +462,7 @@ def show_data_preview(df, option, max_rows=5):
 def create_zip_download(dfs, file_names, output_format="csv"):
     """Create a ZIP file with multiple files and provide download button"""
     zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for i, (file_name, df) in enumerate(zip(file_names, dfs)):
-            if output_format.lower() == "csv":
-                data = df.to_csv(index=False).encode('utf-8')
-                mime = "text/csv"
-                ext = "csv"
-            elif output_format.lower() in ["excel", "xlsx"]:
-                buffer = io.BytesIO()
-                with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                    df.to_excel(writer, index=False)
-                buffer.seek(0)
-                data = buffer.getvalue()
-                mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                ext = "xlsx"
-            elif output_format.lower() == "json":
-                data = df.to_json(orient="records", indent=2).encode('utf-8')
-                mime = "application/json"
-                ext = "json"
-            else:
-                data = df.to_csv(index=False).encode('utf-8')
-                mime = "text/csv"
-                
-            zip_file.writestr(f"{file_name}.{ext}", data)
+    write_archive(zip(file_names, dfs), zip_buffer, output_format)
     
     zip_buffer.seek(0)
     
@@ -704,6 +480,11 @@ def clean_memory():
     """Attempt to free up memory after large operations"""
     gc.collect()
     
+    cache_stats = get_result_cache().stats()
+    logger.info(f"Result cache: {cache_stats['entries']} entries, {cache_stats['bytes'] / 1024 / 1024:.1f} of "
+                f"{cache_stats['max_bytes'] / 1024 / 1024:.0f} MB, {cache_stats['spilled_entries']} spilled to disk, "
+                f"{cache_stats['evictions']} evictions")
+    
     # If psutil is available, show memory usage
     try:
         process = psutil.Process()
@@ -711,7 +492,7 @@ def clean_memory():
         memory_mb = memory_info.rss / 1024 / 1024
         logger.info(f"Memory usage: {memory_mb:.2f} MB")
         return memory_mb
-    except ImportError:
+    except (ImportError, NameError):
         return None
 
 # Main app sections
@@ -731,7 +512,8 @@ def main():
         "Data Splitting": [
             "ZIP Split: Address+HoNW",
             "ZIP Split: Address+HoNW+Phone",
-            "Split by State"
+            "Split by State",
+            "Hierarchical Split: State → ZIP3 → ZIP5"
         ],
         "Filtering & Selection": [
             "Filter by Zip Codes",
@@ -799,10 +581,16 @@ def main():
         # Output format
         st.session_state['user_preferences']['default_output_format'] = st.selectbox(
             "Default output format",
-            options=["csv", "excel", "json"],
-            index=["csv", "excel", "json"].index(st.session_state['user_preferences']['default_output_format']),
+            options=["csv", "excel", "json", "parquet", "csv.gz", "csv.zst", "ndjson"],
+            index=["csv", "excel", "json", "parquet", "csv.gz", "csv.zst", "ndjson"].index(st.session_state['user_preferences']['default_output_format']),
             help="Default file format for downloads"
         )
+        
+        # Shared cache usage, for spotting memory pressure on a shared server
+        cache_stats = get_result_cache().stats()
+        st.caption(f"Result cache: {cache_stats['entries']} entries, {cache_stats['bytes'] / 1024 / 1024:,.0f} of "
+                   f"{cache_stats['max_bytes'] / 1024 / 1024:,.0f} MB"
+                   + (f", {cache_stats['spilled_entries']} on disk" if cache_stats['spilled_entries'] else ""))
     
     # Help & About section
     st.sidebar.markdown("---")
@@ -838,11 +626,12 @@ def main():
             "ZIP Split: Address+HoNW": "Splits the cleaned address and homeowner data into separate files based on ZIP codes.",
             "ZIP Split: Address+HoNW+Phone": "Splits the cleaned address, homeowner data, and phone numbers into separate files based on ZIP codes.",
             "File Combiner and Batcher": "Combines multiple uploaded CSV files and splits the result into customizable-sized batches.",
-            "Sha256": "Provides names with hashed email data, preferring personal email hash.",
+            "Sha256": "Audience export: names with SHA-256, MD5 or SHA-1 hashes of each normalized email and E.164 phone, one row per identifier and hash type.",
             "Full Combined Address": "Generates a comprehensive dataset with full address and additional metadata.",
             "Phone & Credit Score": "Focuses on phone numbers and credit scores with address details.",
-            "Duplicate Analysis & Frequency Counter": "Counts how many times each record appears, adds frequency count as first column, removes duplicates, and sorts by frequency. Useful for identifying most common records in your dataset.",
+            "Duplicate Analysis & Frequency Counter": "Counts how many times each record appears, adds frequency count as first column, removes duplicates, and sorts by frequency. Useful for identifying most common records in your dataset. Fuzzy mode also merges the same person across spelling and address variants.",
             "Split by State": "Splits the dataset into one file per state based on the PERSONAL_STATE column.",
+            "Hierarchical Split: State → ZIP3 → ZIP5": "Splits the dataset in one pass into a nested archive of State, ZIP3 and ZIP5 folders (e.g. FL/330/33014.csv). Small groups roll up into their parent and large files are batched.",
             "B2B Job Titles Focus": "Extracts B2B job title data with company and professional details into a single file.",
             "Filter by Zip Codes": "Filters the data to include only rows where the first 5 digits of PERSONAL_ZIP match the provided 5-digit zip codes.",
             "Company Industry": "Filters data by unique industries from the COMPANY_INDUSTRY column, allowing multi-selection for efficient filtering.",
@@ -856,7 +645,7 @@ def main():
             # File uploader and option-specific inputs
             if option == "File Combiner and Batcher":
                 # Multiple file upload for combiner
-                uploaded_files = st.file_uploader("Upload multiple CSV files", type=["csv"], accept_multiple_files=True)
+                uploaded_files = st.file_uploader("Upload multiple CSV (optionally .gz/.zst), NDJSON or Parquet files", type=["csv", "gz", "zst", "ndjson", "jsonl", "parquet"], accept_multiple_files=True)
                 
                 # Add checkbox for enabling/disabling automatic batching
                 enable_batching = st.checkbox(
@@ -883,7 +672,7 @@ def main():
                         
                         for i, file in enumerate(uploaded_files):
                             try:
-                                temp_df = pd.read_csv(file)
+                                temp_df = read_frame(file)
                                 
                                 # Detect and normalize format for each file
                                 detected_format = detect_input_format(temp_df)
@@ -932,7 +721,7 @@ def main():
                                 
                                 # Create download options
                                 output_format = st.radio("Output format:", 
-                                                       ("CSV", "Excel", "JSON"), 
+                                                       ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                        horizontal=True)
                                 
                                 # ZIP download for all batches
@@ -957,7 +746,7 @@ def main():
                                     st.info("ℹ️ Automatic batching is disabled. All files merged into a single file.")
                                 
                                 output_format = st.radio("Output format:", 
-                                                       ("CSV", "Excel", "JSON"), 
+                                                       ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                        horizontal=True)
                                 
                                 create_download_button(
@@ -968,10 +757,29 @@ def main():
                                 )
             else:
                 # Single file upload for other options
-                uploaded_file = st.file_uploader("Upload your CSV file", type=["csv"], 
+                uploaded_file = st.file_uploader("Upload your CSV (optionally .gz/.zst), NDJSON or Parquet file", type=["csv", "gz", "zst", "ndjson", "jsonl", "parquet"], 
                                                help="Maximum recommended file size: 200MB")
-                
-                # Additional inputs based on option
+
+                # Layout of the DATA column for options that build one
+                data_template = None
+                if option in DATA_TEMPLATES:
+                    with st.expander("DATA column template"):
+                        template_text = st.text_input(
+                            "Template",
+                            value=DATA_TEMPLATES[option],
+                            key=f"data_template_{option}",
+                            help="{COLUMN} inserts a column; {? text {COLUMN} if COLUMN!='Y'} is only added "
+                                 "where the condition holds and its columns are not empty; {+ | } separates "
+                                 "two non-empty parts and {!text} is used where nothing else was rendered"
+                        )
+                    try:
+                        data_template = compile_template(template_text)
+                    except TemplateError as e:
+                        st.error(f"Invalid DATA template, using the default layout: {e}")
+                        data_template = compile_template(DATA_TEMPLATES[option])
+
+                # Additional inputs based on option; the ZIP Split filter is optional and empty by default
+                zip_filter_input = ''
                 if option == "Filter by Zip Codes":
                     zip_codes_input = st.text_area(
                         "Enter 5-digit zip codes (separated by spaces, commas, or newlines)",
@@ -986,17 +794,47 @@ def main():
                         help="Example: 90210 60601 10001"
                     )
                 
+                elif option == "Hierarchical Split: State → ZIP3 → ZIP5":
+                    min_group_size = st.number_input(
+                        "Minimum records per ZIP group",
+                        min_value=1,
+                        max_value=10000,
+                        value=25,
+                        step=5,
+                        help="ZIP5 or ZIP3 groups with fewer records than this are rolled up into their parent State or ZIP3 file"
+                    )
+                
+                elif option == "Sha256":
+                    audience_identifiers = st.multiselect(
+                        "Identifiers to hash",
+                        ["EMAIL", "PHONE"],
+                        default=["EMAIL"],
+                        help="Emails are trimmed and lowercased; phones from MOBILE_PHONE and SKIPTRACE_WIRELESS_NUMBERS are converted to E.164 (+15551234567)"
+                    )
+                    audience_hash_types = st.multiselect(
+                        "Hash types",
+                        list(HASH_TYPES),
+                        default=["SHA256"],
+                        help="Every identifier is exported once per selected hash type"
+                    )
+                    audience_batch_size = st.number_input(
+                        "Rows per upload file",
+                        min_value=1000,
+                        max_value=10000000,
+                        value=100000,
+                        step=1000,
+                        help="Larger exports are split into files of this many rows for ad-platform uploads"
+                    )
+                
                 # Company Industry specific inputs
                 elif option == "Company Industry":
                     # Handle Company Industry option separately
                     if uploaded_file:
-                        # Read and process the file for Company Industry filtering
+                        # Load the normalized frame through the upload cache, so reruns do not re-parse the file
                         try:
-                            df = pd.read_csv(uploaded_file)
-                            
-                            # Detect and normalize format
-                            detected_format = detect_input_format(df)
-                            df = normalize_dataframe(df, detected_format)
+                            dataset, format_info = load_upload(uploaded_file)
+                            df = dataset.df
+                            detected_format = format_info['format']
                             
                             # Display format information
                             if detected_format == 'old':
@@ -1045,17 +883,45 @@ def main():
                                             'Count': industry_counts.values
                                         }), use_container_width=True)
                                     
+                                    cluster_companies = st.checkbox(
+                                        "Cluster company variants (adds COMPANY_CLUSTER_ID)",
+                                        value=False,
+                                        key="industry_company_clusters",
+                                        help="Groups near-duplicate COMPANY_NAME / COMPANY_DOMAIN / COMPANY_ADDRESS variants under one stable ID"
+                                    )
+                                    
+                                    # Optional filters on the JSON history columns; they are only parsed once a term is entered
+                                    history_labels = {
+                                        'COMPANY_NAME_HISTORY': "Worked at (company name contains)",
+                                        'JOB_TITLE_HISTORY': "Held a job title containing",
+                                        'EDUCATION_HISTORY': "Education contains (school name)",
+                                    }
+                                    history_filters = {}
+                                    if any(col in df.columns for col in HISTORY_COLUMNS):
+                                        with st.expander("Career history filters"):
+                                            for col in HISTORY_COLUMNS:
+                                                if col in df.columns:
+                                                    history_filters[col] = st.text_input(history_labels[col], key=f"history_filter_{col}").strip()
+                                    
                                     # Process the filtering
                                     if selected_industries and st.button("Filter by Selected Industries"):
                                         with st.spinner("Filtering data by selected industries..."):
-                                            # Filter the data
-                                            filtered_df = df[df['COMPANY_INDUSTRY'].isin(selected_industries)]
+                                            # Filter the data; parsed history columns come from the per-dataset cache
+                                            filtered_df, cluster_stats = filter_industries(
+                                                df, selected_industries, history_filters, cluster_companies,
+                                                parsed_history=lambda col: get_history_column(dataset, col)
+                                            )
                                             
-                                            st.success(f"✅ Filtering complete! Found {len(filtered_df):,} rows matching selected industries")
+                                            history_note = " and career history filters" if any(history_filters.values()) else ""
+                                            st.success(f"✅ Filtering complete! Found {len(filtered_df):,} rows matching selected industries{history_note}")
                                             st.write(f"Filter matched {len(filtered_df) / len(df) * 100:.1f}% of original data")
+                                            if cluster_companies:
+                                                st.write(f"**Company clusters:** {cluster_stats['clusters']:,} clusters from "
+                                                         f"{cluster_stats['companies']:,} distinct company variants")
                                             
-                                            # Show breakdown by selected industries
+                                            # Show breakdown by selected industries (a categorical also counts the unselected ones as 0)
                                             filtered_industry_counts = filtered_df['COMPANY_INDUSTRY'].value_counts()
+                                            filtered_industry_counts = filtered_industry_counts[filtered_industry_counts > 0]
                                             st.write("**Records by Selected Industry:**")
                                             st.dataframe(pd.DataFrame({
                                                 'Industry': filtered_industry_counts.index,
@@ -1069,7 +935,7 @@ def main():
                                             
                                             # Provide download options
                                             output_format = st.radio("Output format:", 
-                                                                   ("CSV", "Excel", "JSON"), 
+                                                                   ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                                    horizontal=True)
                                             
                                             create_download_button(
@@ -1092,16 +958,18 @@ def main():
                         st.session_state['main_processing'] = {
                             'processed': False,
                             'current_option': None,
-                            'df': None,
-                            'format_info': None
+                            'dataset_id': None,
+                            'format_info': None,
+                            'partitions': {}
                         }
                     
                     # Check if option changed
                     if st.session_state['main_processing']['current_option'] != option:
                         st.session_state['main_processing']['processed'] = False
                         st.session_state['main_processing']['current_option'] = option
-                        st.session_state['main_processing']['df'] = None
+                        st.session_state['main_processing']['dataset_id'] = None
                         st.session_state['main_processing']['format_info'] = None
+                        st.session_state['main_processing']['partitions'] = {}
                     
                     # Process Data button
                     process_clicked = st.button("Process Data", key="main_process_btn")
@@ -1113,13 +981,11 @@ def main():
                         
                         if not st.session_state['main_processing']['processed']:
                             with st.spinner("Processing file..."):
-                                # Read the uploaded file
+                                # Read the uploaded file, or reuse it if these bytes were loaded before
                                 try:
-                                    df = pd.read_csv(uploaded_file)
-                                    
-                                    # Detect input format
-                                    detected_format = detect_input_format(df)
-                                    format_info = get_format_info(df, detected_format)
+                                    dataset, format_info = load_upload(uploaded_file)
+                                    df = dataset.df
+                                    detected_format = format_info['format']
                                     
                                     # Display format information
                                     if detected_format == 'old':
@@ -1139,27 +1005,41 @@ def main():
                                     </div>
                                     """, unsafe_allow_html=True)
                                     
-                                    # Normalize the DataFrame
-                                    df = normalize_dataframe(df, detected_format)
-                                    
                                     st.success(f"File loaded and normalized with {len(df):,} rows and {len(df.columns):,} columns")
                                     
-                                    # Store the normalized data in session state for visualization
-                                    st.session_state['processed_data'] = df.copy()
+                                    memory = format_info.get('memory')
+                                    if memory:
+                                        st.caption(f"Compact dtypes: {len(memory['categorical'])} categorical and "
+                                                   f"{len(memory['downcast'])} downcast numeric columns, "
+                                                   f"{memory['bytes_before'] / 1024 / 1024:,.1f} MB → {memory['bytes_after'] / 1024 / 1024:,.1f} MB")
+                                    
+                                    # The frame lives in the shared result cache and dataset store; session state
+                                    # only keeps its id, which the visualization tab also uses
+                                    st.session_state['processed_data_id'] = dataset.id
                                     
                                     # Store processing results in session state
-                                    st.session_state['main_processing']['df'] = df
+                                    st.session_state['main_processing']['dataset_id'] = dataset.id
                                     st.session_state['main_processing']['format_info'] = format_info
+                                    st.session_state['main_processing']['partitions'] = {}
                                     st.session_state['main_processing']['processed'] = True
+                                    clean_memory()
                                     
                                 except Exception as e:
                                     st.error(f"Error reading file: {str(e)}")
                                     st.stop()
                         
-                        # Use stored data from session state
-                        if st.session_state['main_processing']['df'] is not None:
-                            df = st.session_state['main_processing']['df']
+                        # Use stored data from the result cache
+                        if st.session_state['main_processing']['dataset_id'] is not None:
                             format_info = st.session_state['main_processing']['format_info']
+                            dataset_key = st.session_state['main_processing']['dataset_id']
+                            df = get_dataset_frame(dataset_key)
+                            if df is None:
+                                # Evicted from memory and disk; the upload is still here, so load it again
+                                dataset, format_info = load_upload(uploaded_file)
+                                df = dataset.df
+                                st.session_state['main_processing']['dataset_id'] = dataset.id
+                            else:
+                                dataset = Dataset(dataset_key, df)
                             
                             # Show format-specific features
                             with st.expander("Format Details"):
@@ -1199,9 +1079,9 @@ def main():
                                     valid = False
                                     msg = "CSV file must contain either 'COMPANY_ADDRESS' or 'PROFESSIONAL_ADDRESS' for business address processing."
                             elif option == "Sha256":
-                                # For SHA256, check for either format's email columns
+                                # For SHA256, check for raw emails or either format's precomputed hashes
                                 required_cols = ['FIRST_NAME', 'LAST_NAME']
-                                email_cols = ['SHA256_PERSONAL_EMAIL', 'SHA256_BUSINESS_EMAIL']
+                                email_cols = EMAIL_COLUMNS + PRECOMPUTED_EMAIL_HASH_COLUMNS + PHONE_COLUMNS
                                 valid, msg = validate_columns(df, required_cols, option)
                                 if valid and not any(col in df.columns for col in email_cols):
                                     valid = False
@@ -1220,6 +1100,8 @@ def main():
                                 msg = ""
                             elif option == "Split by State":
                                 valid, msg = validate_columns(df, ['PERSONAL_ADDRESS', 'PERSONAL_CITY', 'PERSONAL_STATE'], option)
+                            elif option == "Hierarchical Split: State → ZIP3 → ZIP5":
+                                valid, msg = validate_columns(df, ['PERSONAL_ADDRESS', 'PERSONAL_STATE', 'PERSONAL_ZIP'], option)
                             elif option == "B2B Job Titles Focus":
                                 valid, msg = validate_columns(df, ['JOB_TITLE'], option)
                             elif option in ["ZIP Split: Address+HoNW", "ZIP Split: Address+HoNW+Phone"]:
@@ -1261,45 +1143,52 @@ def main():
                                 if option == "Sha256":
                                     processing_text.text("Processing SHA256 email data...")
                                     
-                                    # Create output DataFrame with names and email hashes
-                                    output_df = df[['FIRST_NAME', 'LAST_NAME']].copy()
-                                    
-                                    # Handle email hash preference - prefer personal over business
-                                    if 'SHA256_PERSONAL_EMAIL' in df.columns and 'SHA256_BUSINESS_EMAIL' in df.columns:
-                                        # Use personal email hash if available, otherwise business email hash
-                                        output_df['EMAIL_HASH'] = df['SHA256_PERSONAL_EMAIL'].fillna(df['SHA256_BUSINESS_EMAIL'])
-                                    elif 'SHA256_PERSONAL_EMAIL' in df.columns:
-                                        output_df['EMAIL_HASH'] = df['SHA256_PERSONAL_EMAIL']
-                                    elif 'SHA256_BUSINESS_EMAIL' in df.columns:
-                                        output_df['EMAIL_HASH'] = df['SHA256_BUSINESS_EMAIL']
-                                    else:
-                                        st.error("No SHA256 email columns found.")
-                                    
-                                    # Remove rows where email hash is empty
-                                    output_df = output_df[output_df['EMAIL_HASH'].notna() & (output_df['EMAIL_HASH'] != '')]
+                                    # Normalize and hash every email and phone once per selected hash type
+                                    audience_settings = {'identifiers': audience_identifiers, 'hash_types': audience_hash_types}
+                                    output_df, hash_counts = run_job('audience_hashes', audience_settings, audience_hashes, df,
+                                                                     audience_identifiers, audience_hash_types)
                                     
                                     progress_bar.progress(0.6)
                                     
-                                    st.success(f"✅ Processing complete! Generated {len(output_df):,} rows with email hashes")
-                                    
-                                    # Show hash statistics
-                                    if 'SHA256_PERSONAL_EMAIL' in df.columns and 'SHA256_BUSINESS_EMAIL' in df.columns:
-                                        personal_hashes = sum(df['SHA256_PERSONAL_EMAIL'].notna() & (df['SHA256_PERSONAL_EMAIL'] != ''))
-                                        business_hashes = sum(df['SHA256_BUSINESS_EMAIL'].notna() & (df['SHA256_BUSINESS_EMAIL'] != ''))
-                                        st.write(f"**Personal email hashes:** {personal_hashes:,}")
-                                        st.write(f"**Business email hashes:** {business_hashes:,}")
+                                    st.success(f"✅ Processing complete! Generated {len(output_df):,} hashed identifiers "
+                                               f"({', '.join(audience_hash_types)} of {', '.join(audience_identifiers).lower()})")
+                                    
+                                    # Show identifier statistics
+                                    source_labels = {
+                                        'PERSONAL_EMAILS': "Personal emails",
+                                        'PERSONAL_EMAIL': "Personal emails",
+                                        'DEEP_VERIFIED_EMAILS': "Verified emails",
+                                        'BUSINESS_EMAIL': "Business emails",
+                                        'SHA256_PERSONAL_EMAIL': "Personal email hashes (precomputed)",
+                                        'SHA256_BUSINESS_EMAIL': "Business email hashes (precomputed)",
+                                        'MOBILE_PHONE': "Mobile phones",
+                                        'SKIPTRACE_WIRELESS_NUMBERS': "Skiptrace wireless numbers",
+                                    }
+                                    label_counts = {}
+                                    for source, count in hash_counts.items():
+                                        label = source_labels.get(source, source)
+                                        label_counts[label] = label_counts.get(label, 0) + count
+                                    for label, count in label_counts.items():
+                                        st.write(f"**{label}:** {count:,}")
                                     
                                     # Provide download options
                                     output_format = st.radio("Output format:", 
-                                                           ("CSV", "Excel", "JSON"), 
+                                                           ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                            horizontal=True)
                                     
-                                    create_download_button(
-                                        output_df,
-                                        "sha256_emails",
-                                        output_format.lower(),
-                                        f"Download {len(output_df):,} records with email hashes"
-                                    )
+                                    if len(output_df) > audience_batch_size:
+                                        # Platform upload limits: split into files of the chosen size
+                                        output_batches = split_dataframe(output_df, audience_batch_size)
+                                        batch_names = [f"audience_hashes_part_{i+1}" for i in range(len(output_batches))]
+                                        st.info(f"Split into {len(output_batches)} files of up to {audience_batch_size:,} rows")
+                                        create_zip_download(output_batches, batch_names, output_format.lower())
+                                    else:
+                                        create_download_button(
+                                            output_df,
+                                            "audience_hashes",
+                                            output_format.lower(),
+                                            f"Download {len(output_df):,} hashed identifiers"
+                                        )
                                     
                                     progress_bar.progress(1.0)
                                 
@@ -1309,8 +1198,7 @@ def main():
                                     
                                     # Clean addresses if requested
                                     if st.session_state['user_preferences']['auto_clean_addresses']:
-                                        df = df[df['PERSONAL_ADDRESS'].notna()]
-                                        df['PERSONAL_ADDRESS_CLEAN'] = df['PERSONAL_ADDRESS'].apply(clean_address)
+                                        df = run_job('clean_address_rows', {}, clean_address_rows, df)
                                         progress_bar.progress(0.2)
                                     
                                     # Group by state
@@ -1319,10 +1207,16 @@ def main():
                                     
                                     processing_text.text("Creating separate files for each state...")
                                     
-                                    for state, group in df.groupby('PERSONAL_STATE'):
-                                        if pd.notna(state) and state.strip() != '':
+                                    # The state index is cached for the loaded dataset, so reruns
+                                    # (e.g. changing the state multiselect) do not regroup the file
+                                    state_index = get_partition_index(
+                                        df, 'PERSONAL_STATE',
+                                        subset=str(st.session_state['user_preferences']['auto_clean_addresses'])
+                                    )
+                                    for state, group in state_index.frames(df):
+                                        if str(state).strip() != '':
                                             state_groups.append(group)
-                                            state_file_names.append(f"state_{state.strip()}")
+                                            state_file_names.append(f"state_{str(state).strip()}")
                                     
                                     progress_bar.progress(0.8)
                                     
@@ -1330,17 +1224,14 @@ def main():
                                     st.success(f"✅ Processing complete! Split data into {len(state_groups)} state groups")
                                     
                                     # Create a summary of the states
-                                    state_summary = pd.DataFrame({
-                                        'State': df['PERSONAL_STATE'].value_counts().index,
-                                        'Record Count': df['PERSONAL_STATE'].value_counts().values
-                                    })
+                                    state_summary = state_index.summary('State')
                                     
                                     st.write("**State Distribution:**")
                                     st.dataframe(state_summary, use_container_width=True)
                                     
                                     # Provide download options
                                     output_format = st.radio("Output format:", 
-                                                           ("CSV", "Excel", "JSON"), 
+                                                           ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                            horizontal=True)
                                     
                                     # ZIP download for all files
@@ -1351,7 +1242,7 @@ def main():
                                         # Create a multiselect to choose which states to download
                                         selected_states = st.multiselect(
                                             "Select states to download individually:",
-                                            options=df['PERSONAL_STATE'].value_counts().index.tolist(),
+                                            options=state_index.counts().index.tolist(),
                                             default=None,
                                             help="Select states to download as individual files"
                                         )
@@ -1360,7 +1251,7 @@ def main():
                                             state_cols = st.columns(3)  # 3 columns for download buttons
                                             for i, state in enumerate(selected_states):
                                                 with state_cols[i % 3]:
-                                                    state_df = df[df['PERSONAL_STATE'] == state]
+                                                    state_df = state_index.take(df, state)
                                                     
                                                     create_download_button(
                                                         state_df,
@@ -1371,6 +1262,54 @@ def main():
                                     
                                     progress_bar.progress(1.0)
                                 
+                                # HIERARCHICAL SPLIT: STATE -> ZIP3 -> ZIP5
+                                elif option == "Hierarchical Split: State → ZIP3 → ZIP5":
+                                    processing_text.text("Processing addresses and building geographic partitions...")
+                                    
+                                    # Clean addresses once for every file in the archive
+                                    if st.session_state['user_preferences']['auto_clean_addresses']:
+                                        df = run_job('clean_address_rows', {}, clean_address_rows, df)
+                                        progress_bar.progress(0.2)
+                                    
+                                    # Group by state, ZIP3 and ZIP5 in a single pass
+                                    processing_text.text("Creating nested State / ZIP3 / ZIP5 files...")
+                                    batch_size = st.session_state['user_preferences']['batch_size']
+                                    partitions = geographic_partitions(df, min_group_size=min_group_size, batch_size=batch_size)
+                                    
+                                    partition_files = [df.iloc[positions] for _, _, positions in partitions]
+                                    partition_names = [path for path, _, _ in partitions]
+                                    
+                                    progress_bar.progress(0.8)
+                                    
+                                    # Show results
+                                    state_count = len({path.split('/')[0] for path in partition_names})
+                                    st.success(f"✅ Processing complete! Split data into {len(partitions)} files across {state_count} states")
+                                    
+                                    # Summarize the archive layout
+                                    partition_summary = pd.DataFrame({
+                                        'File': partition_names,
+                                        'Level': [level for _, level, _ in partitions],
+                                        'Record Count': [len(positions) for _, _, positions in partitions]
+                                    })
+                                    
+                                    st.write("**Archive Layout:**")
+                                    st.dataframe(partition_summary, use_container_width=True)
+                                    
+                                    rolled_up = partition_summary[partition_summary['Level'] != GEOGRAPHIC_LEVELS[-1]]['Record Count'].sum()
+                                    if rolled_up:
+                                        st.write(f"**Records rolled up into State/ZIP3 files:** {rolled_up:,} "
+                                                 f"(groups under {min_group_size:,} records)")
+                                    
+                                    # Provide download options
+                                    output_format = st.radio("Output format:", 
+                                                           ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
+                                                           horizontal=True)
+                                    
+                                    # ZIP download with nested folders
+                                    create_zip_download(partition_files, partition_names, output_format.lower())
+                                    
+                                    progress_bar.progress(1.0)
+                                
                                 # B2B JOB TITLES FOCUS
                                 elif option == "B2B Job Titles Focus":
                                     processing_text.text("Processing B2B job title data...")
@@ -1393,10 +1332,25 @@ def main():
                                     available_columns = [col for col in b2b_columns if col in b2b_df.columns]
                                     output_df = b2b_df[available_columns].copy()
                                     
+                                    # Optionally group company name/domain/address variants into clusters
+                                    cluster_companies = st.checkbox(
+                                        "Cluster company variants (adds COMPANY_CLUSTER_ID)",
+                                        value=False,
+                                        key="b2b_company_clusters",
+                                        help="Groups near-duplicate COMPANY_NAME / COMPANY_DOMAIN / COMPANY_ADDRESS variants under one stable ID"
+                                    )
+                                    if cluster_companies:
+                                        processing_text.text("Clustering near-duplicate company records...")
+                                        output_df['COMPANY_CLUSTER_ID'], cluster_stats = company_cluster_ids(output_df)
+                                    
                                     progress_bar.progress(0.6)
                                     
                                     st.success(f"✅ Processing complete! Extracted {len(output_df):,} B2B records")
                                     
+                                    if cluster_companies:
+                                        st.write(f"**Company clusters:** {cluster_stats['clusters']:,} clusters from "
+                                                 f"{cluster_stats['companies']:,} distinct company variants")
+                                    
                                     # Show job title statistics
                                     top_titles = output_df['JOB_TITLE'].value_counts().head(10)
                                     st.write("**Top 10 Job Titles:**")
@@ -1415,7 +1369,7 @@ def main():
                                     
                                     # Provide download options
                                     output_format = st.radio("Output format:", 
-                                                           ("CSV", "Excel", "JSON"), 
+                                                           ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                            horizontal=True)
                                     
                                     create_download_button(
@@ -1432,11 +1386,10 @@ def main():
                                     if zip_codes_input:
                                         processing_text.text("Filtering by zip codes...")
                                         
-                                        # Ensure PERSONAL_ZIP is string to preserve leading zeros
-                                        df['PERSONAL_ZIP'] = df['PERSONAL_ZIP'].astype(str)
-                                        
-                                        # Create temporary column with first 5 digits, stripping spaces
-                                        df['PERSONAL_ZIP_5'] = df['PERSONAL_ZIP'].fillna('').astype(str).str.strip().str[:5]
+                                        # Ensure PERSONAL_ZIP is string to preserve leading zeros, and add a
+                                        # temporary column with the first 5 digits; assign() leaves the cached frame untouched
+                                        df = df.assign(PERSONAL_ZIP=df['PERSONAL_ZIP'].astype(str))
+                                        df = df.assign(PERSONAL_ZIP_5=fill_missing(df['PERSONAL_ZIP'], '').astype(str).str.strip().str[:5])
                                         
                                         # Parse input zip codes
                                         zip_codes = [str(zip_code).strip()[:5] for zip_code in 
@@ -1469,7 +1422,7 @@ def main():
                                             # Provide download options if we have results
                                             if not filtered_df.empty:
                                                 output_format = st.radio("Output format:", 
-                                                                      ("CSV", "Excel", "JSON"), 
+                                                                      ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                                       horizontal=True)
                                                 
                                                 create_download_button(
@@ -1491,31 +1444,20 @@ def main():
                                 elif option == "ZIP Split: Address+HoNW":
                                     processing_text.text("Processing addresses and preparing ZIP code split...")
                                     
-                                    # Clean the data
-                                    if st.session_state['user_preferences']['auto_clean_addresses']:
-                                        df = df[df['PERSONAL_ADDRESS'].notna()]
-                                        df['PERSONAL_ADDRESS_CLEAN'] = df['PERSONAL_ADDRESS'].apply(clean_address)
-                                        progress_bar.progress(0.2)
-                                    
-                                    # Create the address field
-                                    df['ADDRESS'] = df[['PERSONAL_ADDRESS_CLEAN', 'PERSONAL_CITY', 'PERSONAL_STATE']].apply(
-                                        lambda row: ', '.join([str(x) for x in row if pd.notna(x) and x != '']), axis=1
+                                    # Clean addresses and build the ADDRESS and DATA fields in one plan
+                                    plan = build_address_plan(
+                                        data_template, ['ADDRESS', 'DATA', 'PERSONAL_ZIP'],
+                                        clean_addresses=st.session_state['user_preferences']['auto_clean_addresses']
                                     )
-                                    
-                                    # Handle missing values
-                                    df['HOMEOWNER'] = df['HOMEOWNER'].fillna('')
-                                    df['NET_WORTH'] = df['NET_WORTH'].fillna('')
-                                    df['INCOME_RANGE'] = df['INCOME_RANGE'].fillna('')
-                                    
-                                    # Create the data field
-                                    df['DATA'] = 'Ho ' + df['HOMEOWNER'] + ' | NW ' + df['NET_WORTH'] + ' | Income ' + df['INCOME_RANGE']
+                                    df, _ = run_job(option, plan.describe(), plan.execute, df)
                                     
                                     progress_bar.progress(0.4)
                                     
                                     # Filter by ZIP codes if specified
-                                    if 'zip_filter_input' in locals() and zip_filter_input.strip():
-                                        zip_codes = [z.strip() for z in zip_filter_input.replace(",", " ").split() if z.strip()]
-                                        df['PERSONAL_ZIP'] = df['PERSONAL_ZIP'].fillna('').astype(str).str.strip()
+                                    zip_filter = zip_filter_input.strip()
+                                    if zip_filter:
+                                        zip_codes = [z.strip() for z in zip_filter.replace(",", " ").split() if z.strip()]
+                                        df = df.assign(PERSONAL_ZIP=fill_missing(df['PERSONAL_ZIP'], '').astype(str).str.strip())
                                         df = df[df['PERSONAL_ZIP'].str[:5].isin(zip_codes)]
                                         processing_text.text(f"Filtered to {len(df):,} rows matching the specified ZIP codes")
                                     
@@ -1527,10 +1469,14 @@ def main():
                                     
                                     processing_text.text("Creating separate files for each ZIP code...")
                                     
-                                    # Group the data by ZIP code
-                                    for zip_code, group in df.groupby('PERSONAL_ZIP'):
+                                    # Index the rows of every ZIP code in one pass; the summary, archive
+                                    # and individual downloads all slice from this index
+                                    zip_index = get_partition_index(
+                                        df, 'PERSONAL_ZIP',
+                                        subset=f"{st.session_state['user_preferences']['auto_clean_addresses']}|{zip_filter}"
+                                    )
+                                    for zip_code, output_group in zip_index.frames(df, columns=['ADDRESS', 'DATA']):
                                         # Only include address and data in output
-                                        output_group = group[['ADDRESS', 'DATA']]
                                         zip_groups.append(output_group)
                                         zip_file_names.append(f"zip_{zip_code}")
                                     
@@ -1540,17 +1486,14 @@ def main():
                                     st.success(f"✅ Processing complete! Split data into {len(zip_groups)} ZIP code groups")
                                     
                                     # Create a summary of the ZIP codes
-                                    zip_summary = pd.DataFrame({
-                                        'ZIP Code': df['PERSONAL_ZIP'].unique(),
-                                        'Record Count': [len(df[df['PERSONAL_ZIP'] == z]) for z in df['PERSONAL_ZIP'].unique()]
-                                    }).sort_values('Record Count', ascending=False)
+                                    zip_summary = zip_index.summary('ZIP Code')
                                     
                                     st.write("**ZIP Code Distribution:**")
                                     st.dataframe(zip_summary, use_container_width=True)
                                     
                                     # Provide download options
                                     output_format = st.radio("Output format:", 
-                                                           ("CSV", "Excel", "JSON"), 
+                                                           ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                            horizontal=True)
                                     
                                     # ZIP download for all files
@@ -1561,22 +1504,16 @@ def main():
                                         # Create a multiselect to choose which ZIP codes to download
                                         selected_zips = st.multiselect(
                                             "Select ZIP codes to download individually:",
-                                            options=df['PERSONAL_ZIP'].unique(),
+                                            options=zip_index.keys(),
                                             default=None,
                                             help="Select ZIP codes to download as individual files"
                                         )
                                         
                                         if selected_zips:
-                                            # Filter to only the selected ZIP codes
-                                            selected_indices = [i for i, zip_code in enumerate(df['PERSONAL_ZIP'].unique()) 
-                                                                  if zip_code in selected_zips]
-                                            
-
                                             zip_cols = st.columns(3)  # 3 columns for download buttons
-                                            for i, idx in enumerate(selected_indices):
+                                            for i, zip_code in enumerate(selected_zips):
                                                 with zip_cols[i % 3]:
-                                                    zip_code = df['PERSONAL_ZIP'].unique()[idx]
-                                                    group_df = df[df['PERSONAL_ZIP'] == zip_code][['ADDRESS', 'DATA']]
+                                                    group_df = zip_index.take(df, zip_code, ['ADDRESS', 'DATA'])
                                                     
                                                     create_download_button(
                                                         group_df,
@@ -1591,32 +1528,14 @@ def main():
                                 elif option == "ZIP Split: Address+HoNW+Phone":
                                     processing_text.text("Processing addresses with phone data and preparing ZIP code split...")
                                     
-                                    # Clean the data
-                                    if st.session_state['user_preferences']['auto_clean_addresses']:
-                                        df = df[df['PERSONAL_ADDRESS'].notna()]
-                                        df['PERSONAL_ADDRESS_CLEAN'] = df['PERSONAL_ADDRESS'].apply(clean_address)
-                                        progress_bar.progress(0.2)
-                                    
-                                    # Create the address field
-                                    df['ADDRESS'] = df[['PERSONAL_ADDRESS_CLEAN', 'PERSONAL_CITY', 'PERSONAL_STATE']].apply(
-                                        lambda row: ', '.join([str(x) for x in row if pd.notna(x) and x != '']), axis=1
+                                    # Clean addresses, format phones and build the ADDRESS and DATA fields in one plan;
+                                    # the template adds the phone for non-DNC records
+                                    plan = build_address_plan(
+                                        data_template, ['ADDRESS', 'DATA', 'MOBILE_PHONE', 'DNC'],
+                                        clean_addresses=st.session_state['user_preferences']['auto_clean_addresses'],
+                                        format_phones=st.session_state['user_preferences'].get('format_phone_numbers', True)
                                     )
-                                    
-                                    # Handle missing values
-                                    df['MOBILE_PHONE'] = df['MOBILE_PHONE'].fillna('')
-                                    df['DNC'] = df['DNC'].fillna('N')
-                                    df['HOMEOWNER'] = df['HOMEOWNER'].fillna('')
-                                    df['NET_WORTH'] = df['NET_WORTH'].fillna('')
-                                    df['INCOME_RANGE'] = df['INCOME_RANGE'].fillna('')
-                                    
-                                    # Format phone numbers if needed
-                                    if st.session_state['user_preferences'].get('format_phone_numbers', True):
-                                        df['MOBILE_PHONE'] = df['MOBILE_PHONE'].apply(validate_phone)
-                                    
-                                    # Create the data field with phone numbers for non-DNC records
-                                    df['DATA'] = 'Ho ' + df['HOMEOWNER'] + ' | NW ' + df['NET_WORTH'] + ' | Income ' + df['INCOME_RANGE'] + \
-                                            df.apply(lambda row: ' | Phone ' + str(row['MOBILE_PHONE']) if (
-                                                    row['DNC'] != 'Y' and row['MOBILE_PHONE'] != '') else '', axis=1)
+                                    df, _ = run_job(option, plan.describe(), plan.execute, df)
                                     
                                     # Final output
                                     output_df = df[['ADDRESS', 'DATA']]
@@ -1643,7 +1562,7 @@ def main():
                                         
                                         # Provide download options
                                         output_format = st.radio("Output format:", 
-                                                               ("CSV", "Excel", "JSON"), 
+                                                               ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                                horizontal=True)
                                         
                                         # ZIP download for all batches
@@ -1672,7 +1591,7 @@ def main():
                                         
                                         # Provide download options
                                         output_format = st.radio("Output format:", 
-                                                               ("CSV", "Excel", "JSON"), 
+                                                               ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                                horizontal=True)
                                         
                                         # Single file download
@@ -1704,8 +1623,8 @@ def main():
                                 elif option == "DNC Phone Number Cleaner":
                                     processing_text.text("Processing DNC phone number cleaning...")
                                     
-                                    # Make a copy to avoid modifying the original
-                                    output_df = df.copy()
+                                    # The cleaning job works on its own copy
+                                    output_df = df
                                     
                                     # Find all potential DNC columns
                                     potential_dnc_cols = [col for col in output_df.columns if 'DNC' in col.upper()]
@@ -1716,20 +1635,8 @@ def main():
                                         # Configuration Section
                                         st.subheader("DNC Processing Setup")
                                         
-                                        # Map phone columns to their corresponding DNC columns
-                                        phone_dnc_mapping = {
-                                            'MOBILE_PHONE': 'MOBILE_PHONE_DNC',
-                                            'DIRECT_NUMBER': 'DIRECT_DNC',
-                                            'PERSONAL_PHONE': 'PERSONAL_PHONE_DNC',
-                                            'COMPANY_PHONE': 'COMPANY_PHONE_DNC',
-                                            'SKIPTRACE_B2B_PHONE': 'SKIPTRACE_B2B_PHONE_DNC'
-                                        }
-                                        
                                         # Identify available phone columns and their matching DNC columns
-                                        available_pairs = []
-                                        for phone_col, dnc_col in phone_dnc_mapping.items():
-                                            if phone_col in output_df.columns and dnc_col in output_df.columns:
-                                                available_pairs.append((phone_col, dnc_col))
+                                        available_pairs = phone_dnc_pairs(output_df)
                                         
                                         if not available_pairs:
                                             st.warning("⚠️ No matching phone/DNC column pairs found. Looking for pairs like MOBILE_PHONE/MOBILE_PHONE_DNC.")
@@ -1751,292 +1658,178 @@ def main():
                                             available_preview_cols = [col for col in preview_cols if col in output_df.columns]
                                             st.dataframe(output_df[available_preview_cols].head(5), use_container_width=True)
                                         
+                                        # Cleaning runs as a background job keyed by the upload and column pairs, so
+                                        # reruns (e.g. changing the output format) show the stored result
+                                        dnc_job_key = job_key(dataset.id, option, available_pairs)
+                                        
                                         # Process button
                                         if st.button("Process DNC Cleaning", key="dnc_process_btn"):
-                                            with st.spinner("Processing DNC phone number cleaning..."):
-                                                progress_bar.progress(0.2)
-                                                
-                                                if not available_pairs:
-                                                    st.error("No phone/DNC pairs to process.")
-                                                else:
-                                                    processing_text.text("Removing phone numbers where DNC = 'Y'...")
-                                                    progress_bar.progress(0.4)
-                                                    
-                                                    # Count original phone numbers
-                                                    original_phones = {}
-                                                    for phone_col, _ in available_pairs:
-                                                        original_phones[phone_col] = sum(output_df[phone_col].notna() & (output_df[phone_col] != ''))
-                                                    
-                                                    # Clean and prepare all DNC columns - normalize to uppercase
-                                                    for _, dnc_col in available_pairs:
-                                                        output_df[dnc_col] = output_df[dnc_col].fillna('N').astype(str).str.strip().str.upper()
-                                                    
-                                                    # Clean phone columns - normalize empty values
-                                                    for phone_col, _ in available_pairs:
-                                                        output_df[phone_col] = output_df[phone_col].fillna('').astype(str)
-                                                        output_df[phone_col] = output_df[phone_col].apply(
-                                                            lambda x: '' if str(x).upper() in ['NAN', 'NONE', 'NULL', ''] else str(x).strip()
-                                                        )
-                                                    
-                                                    progress_bar.progress(0.6)
-                                                    
-                                                    # Track rows that had phone numbers removed due to DNC 'Y'
-                                                    rows_with_dnc_y = set()
-                                                    rows_processed_count = 0
-                                                    phones_cleared = 0
-                                                    
-                                                    # Process each row individually to handle complex patterns
-                                                    for idx in range(len(output_df)):
-                                                        # Process each phone/DNC pair independently
-                                                        for phone_col, dnc_col in available_pairs:
-                                                            dnc_value = output_df.at[idx, dnc_col]
-                                                            phone_value = output_df.at[idx, phone_col]
-                                                            
-                                                            # Skip if DNC is empty or N
-                                                            if not dnc_value or dnc_value == 'N':
-                                                                continue
-                                                            
-                                                            # Skip if phone is already empty
-                                                            if not phone_value or phone_value == '':
-                                                                continue
-                                                            
-                                                            rows_processed_count += 1
-                                                            
-                                                            # Case 1: Simple DNC 'Y' - remove entire phone field
-                                                            if dnc_value in ['Y', 'YES', 'TRUE', '1']:
-                                                                output_df.at[idx, phone_col] = ''
-                                                                rows_with_dnc_y.add(idx)
-                                                                phones_cleared += 1
-                                                            
-                                                            # Case 2: Comma-separated DNC values - match positionally with phone numbers
-                                                            elif ',' in dnc_value:
-                                                                dnc_list = [d.strip() for d in dnc_value.split(',') if d.strip()]
-                                                                
-                                                                # If phone also has commas, match positionally
-                                                                if ',' in phone_value:
-                                                                    phone_list = [p.strip() for p in phone_value.split(',') if p.strip()]
-                                                                    
-                                                                    # Keep only phones where corresponding DNC is not 'Y'
-                                                                    kept_phones = []
-                                                                    had_removal = False
-                                                                    
-                                                                    for i in range(len(phone_list)):
-                                                                        # Use corresponding DNC value, or 'N' if no corresponding value exists
-                                                                        dnc_for_phone = dnc_list[i] if i < len(dnc_list) else 'N'
-                                                                        
-                                                                        if dnc_for_phone not in ['Y', 'YES', 'TRUE', '1']:
-                                                                            kept_phones.append(phone_list[i])
-                                                                        else:
-                                                                            had_removal = True
-                                                                    
-                                                                    # Update the phone field
-                                                                    output_df.at[idx, phone_col] = ', '.join(kept_phones) if kept_phones else ''
-                                                                    if had_removal:
-                                                                        rows_with_dnc_y.add(idx)
-                                                                        phones_cleared += 1
-                                                                
-                                                                else:
-                                                                    # Single phone with comma-separated DNC
-                                                                    # Use the FIRST DNC value to decide
-                                                                    first_dnc = dnc_list[0] if dnc_list else 'N'
-                                                                    if first_dnc in ['Y', 'YES', 'TRUE', '1']:
-                                                                        output_df.at[idx, phone_col] = ''
-                                                                        rows_with_dnc_y.add(idx)
-                                                                        phones_cleared += 1
+                                            if not available_pairs:
+                                                st.error("No phone/DNC pairs to process.")
+                                            else:
+                                                get_job_manager().submit(dnc_job_key, clean_dnc_phones, output_df, available_pairs,
+                                                                         description="DNC phone number cleaning")
+                                        
+                                        dnc_result = wait_for_job(dnc_job_key)
+                                        if dnc_result is not None:
+                                            output_df, dnc_stats = dnc_result
+                                            original_phones = dnc_stats['original_phones']
+                                            final_phones = dnc_stats['final_phones']
+                                            phones_removed = dnc_stats['phones_removed']
+                                            total_phones_removed = dnc_stats['total_phones_removed']
+                                            dnc_y_count = dnc_stats['dnc_y_count']
+                                            dnc_n_count = dnc_stats['dnc_n_count']
+                                            rows_processed_count = dnc_stats['rows_processed_count']
+                                            phones_cleared = dnc_stats['phones_cleared']
+                                            
+                                            # Debug info
+                                            st.info(f"🔍 **Debug:** Processed {rows_processed_count} phone/DNC checks, cleared {phones_cleared} phone fields")
+                                        
+                                            progress_bar.progress(1.0)
+                                            
+                                            # Display results
+                                            st.success(f"✅ DNC phone number cleaning complete! Processed {len(output_df):,} rows")
+                                        
+                                            # Show detailed statistics
+                                            st.subheader("Cleaning Statistics")
+                                            
+                                            # Summary metrics
+                                            col1, col2, col3, col4 = st.columns(4)
+                                            with col1:
+                                                st.metric("Total Rows", f"{len(output_df):,}")
+                                            with col2:
+                                                st.metric("DNC 'Y' Records", f"{dnc_y_count:,}")
+                                            with col3:
+                                                st.metric("DNC 'N' Records", f"{dnc_n_count:,}")
+                                            with col4:
+                                                st.metric("Phones Removed", f"{total_phones_removed:,}")
+                                        
+                                            # Detailed phone number statistics
+                                            if available_pairs:
+                                                with st.expander("Detailed Phone Number Statistics"):
+                                                    phone_stats = []
+                                                    for phone_col, dnc_col in available_pairs:
+                                                        phone_stats.append({
+                                                            'Phone Column': phone_col,
+                                                            'DNC Column': dnc_col,
+                                                            'Original Count': original_phones[phone_col],
+                                                            'Final Count': final_phones[phone_col],
+                                                            'Removed': phones_removed[phone_col],
+                                                            'Removal %': f"{(phones_removed[phone_col] / original_phones[phone_col] * 100) if original_phones[phone_col] > 0 else 0:.1f}%"
+                                                        })
                                                     
-                                                    # Debug info
-                                                    st.info(f"🔍 **Debug:** Processed {rows_processed_count} phone/DNC checks, cleared {phones_cleared} phone fields")
+                                                    stats_df = pd.DataFrame(phone_stats)
+                                                    st.dataframe(stats_df, use_container_width=True)
+                                            
+                                            # Show sample of cleaned data
+                                            with st.expander("Sample of Processed Data"):
+                                                sample_cols = []
+                                                for phone_col, dnc_col in available_pairs:
+                                                    sample_cols.extend([phone_col, dnc_col])
+                                                if 'FIRST_NAME' in output_df.columns:
+                                                    sample_cols = ['FIRST_NAME', 'LAST_NAME'] + sample_cols
+                                            
+                                                # Show samples of both Y and N records
+                                                # Find rows where any DNC column contains 'Y'
+                                                has_y_mask = pd.Series([False] * len(output_df))
+                                                for _, dnc_col in available_pairs:
+                                                    has_y_mask |= output_df[dnc_col].str.contains('Y', na=False, regex=False)
                                                 
-                                                    progress_bar.progress(0.8)
-                                                    
-                                                    # Calculate statistics
-                                                    final_phones = {}
-                                                    phones_removed = {}
-                                                    for phone_col, _ in available_pairs:
-                                                        final_phones[phone_col] = sum(output_df[phone_col].notna() & (output_df[phone_col] != ''))
-                                                        phones_removed[phone_col] = original_phones[phone_col] - final_phones[phone_col]
-                                                    
-                                                    total_phones_removed = sum(phones_removed.values())
-                                                    dnc_y_count = len(rows_with_dnc_y)
-                                                    dnc_n_count = len(output_df) - dnc_y_count
+                                                dnc_y_sample = output_df[has_y_mask].head(5)
+                                                dnc_n_sample = output_df[~has_y_mask].head(5)
                                                 
-                                                    progress_bar.progress(1.0)
-                                                    
-                                                    # Display results
-                                                    st.success(f"✅ DNC phone number cleaning complete! Processed {len(output_df):,} rows")
+                                                if not dnc_y_sample.empty:
+                                                    st.write("**Sample DNC 'Y' records (corresponding phone numbers should be empty):**")
+                                                    available_sample_cols = [col for col in sample_cols if col in output_df.columns]
+                                                    st.dataframe(dnc_y_sample[available_sample_cols], use_container_width=True)
                                                 
-                                                    # Show detailed statistics
-                                                    st.subheader("Cleaning Statistics")
-                                                    
-                                                    # Summary metrics
-                                                    col1, col2, col3, col4 = st.columns(4)
-                                                    with col1:
-                                                        st.metric("Total Rows", f"{len(output_df):,}")
-                                                    with col2:
-                                                        st.metric("DNC 'Y' Records", f"{dnc_y_count:,}")
-                                                    with col3:
-                                                        st.metric("DNC 'N' Records", f"{dnc_n_count:,}")
-                                                    with col4:
-                                                        st.metric("Phones Removed", f"{total_phones_removed:,}")
+                                                if not dnc_n_sample.empty:
+                                                    st.write("**Sample DNC 'N' records (phone numbers should be preserved):**")
+                                                    available_sample_cols = [col for col in sample_cols if col in output_df.columns]
+                                                    st.dataframe(dnc_n_sample[available_sample_cols], use_container_width=True)
+                                            
+                                            # Show processing summary
+                                            phone_col_names = [phone_col for phone_col, _ in available_pairs]
+                                            dnc_col_names = [dnc_col for _, dnc_col in available_pairs]
+                                            st.info(f"""
+                                            **Processing Summary:**
+                                            - 📋 Processed {len(available_pairs)} phone/DNC column pairs
+                                            - 📞 Phone columns: {', '.join(phone_col_names)}
+                                            - 🚫 DNC columns: {', '.join(dnc_col_names)}
+                                            - 🚫 Removed phone numbers from {dnc_y_count:,} records with DNC 'Y' ({dnc_y_count/len(output_df)*100:.1f}%)
+                                            - ✅ Preserved phone numbers in {dnc_n_count:,} records ({dnc_n_count/len(output_df)*100:.1f}%)
+                                            - 📱 Total phone numbers removed: {total_phones_removed:,}
+                                            """)
+                                            
+                                            # Verification: Check that no records have phone numbers when their DNC column contains 'Y'
+                                            verification_issues = []
+                                            problematic_rows = []
+                                            
+                                            for phone_col, dnc_col in available_pairs:
+                                                # Find rows where DNC contains 'Y' but phone is not empty
+                                                mask = (output_df[dnc_col].str.contains('Y', na=False, regex=False)) & \
+                                                       (output_df[phone_col].notna()) & \
+                                                       (output_df[phone_col] != '')
                                                 
-                                                    # Detailed phone number statistics
-                                                    if available_pairs:
-                                                        with st.expander("Detailed Phone Number Statistics"):
-                                                            phone_stats = []
-                                                            for phone_col, dnc_col in available_pairs:
-                                                                phone_stats.append({
-                                                                    'Phone Column': phone_col,
-                                                                    'DNC Column': dnc_col,
-                                                                    'Original Count': original_phones[phone_col],
-                                                                    'Final Count': final_phones[phone_col],
-                                                                    'Removed': phones_removed[phone_col],
-                                                                    'Removal %': f"{(phones_removed[phone_col] / original_phones[phone_col] * 100) if original_phones[phone_col] > 0 else 0:.1f}%"
-                                                                })
-                                                            
-                                                            stats_df = pd.DataFrame(phone_stats)
-                                                            st.dataframe(stats_df, use_container_width=True)
-                                                    
-                                                    # Show sample of cleaned data
-                                                    with st.expander("Sample of Processed Data"):
-                                                        sample_cols = []
-                                                        for phone_col, dnc_col in available_pairs:
-                                                            sample_cols.extend([phone_col, dnc_col])
-                                                        if 'FIRST_NAME' in output_df.columns:
-                                                            sample_cols = ['FIRST_NAME', 'LAST_NAME'] + sample_cols
-                                                    
-                                                        # Show samples of both Y and N records
-                                                        # Find rows where any DNC column contains 'Y'
-                                                        has_y_mask = pd.Series([False] * len(output_df))
-                                                        for _, dnc_col in available_pairs:
-                                                            has_y_mask |= output_df[dnc_col].str.contains('Y', na=False, regex=False)
-                                                        
-                                                        dnc_y_sample = output_df[has_y_mask].head(5)
-                                                        dnc_n_sample = output_df[~has_y_mask].head(5)
-                                                        
-                                                        if not dnc_y_sample.empty:
-                                                            st.write("**Sample DNC 'Y' records (corresponding phone numbers should be empty):**")
-                                                            available_sample_cols = [col for col in sample_cols if col in output_df.columns]
-                                                            st.dataframe(dnc_y_sample[available_sample_cols], use_container_width=True)
-                                                        
-                                                        if not dnc_n_sample.empty:
-                                                            st.write("**Sample DNC 'N' records (phone numbers should be preserved):**")
-                                                            available_sample_cols = [col for col in sample_cols if col in output_df.columns]
-                                                            st.dataframe(dnc_n_sample[available_sample_cols], use_container_width=True)
-                                                    
-                                                    # Show processing summary
-                                                    phone_col_names = [phone_col for phone_col, _ in available_pairs]
-                                                    dnc_col_names = [dnc_col for _, dnc_col in available_pairs]
-                                                    st.info(f"""
-                                                    **Processing Summary:**
-                                                    - 📋 Processed {len(available_pairs)} phone/DNC column pairs
-                                                    - 📞 Phone columns: {', '.join(phone_col_names)}
-                                                    - 🚫 DNC columns: {', '.join(dnc_col_names)}
-                                                    - 🚫 Removed phone numbers from {dnc_y_count:,} records with DNC 'Y' ({dnc_y_count/len(output_df)*100:.1f}%)
-                                                    - ✅ Preserved phone numbers in {dnc_n_count:,} records ({dnc_n_count/len(output_df)*100:.1f}%)
-                                                    - 📱 Total phone numbers removed: {total_phones_removed:,}
-                                                    """)
-                                                    
-                                                    # Verification: Check that no records have phone numbers when their DNC column contains 'Y'
-                                                    verification_issues = []
-                                                    problematic_rows = []
-                                                    
-                                                    for phone_col, dnc_col in available_pairs:
-                                                        # Find rows where DNC contains 'Y' but phone is not empty
-                                                        mask = (output_df[dnc_col].str.contains('Y', na=False, regex=False)) & \
-                                                               (output_df[phone_col].notna()) & \
-                                                               (output_df[phone_col] != '')
-                                                        
-                                                        dnc_y_with_phones = mask.sum()
-                                                        
-                                                        if dnc_y_with_phones > 0:
-                                                            verification_issues.append(f"{phone_col}/{dnc_col}: {dnc_y_with_phones} records")
-                                                            
-                                                            # Collect problematic rows for debugging
-                                                            problem_indices = output_df[mask].index.tolist()[:10]  # First 10
-                                                            for idx in problem_indices:
-                                                                problematic_rows.append({
-                                                                    'Row': idx + 2,  # +2 for Excel (header + 0-index)
-                                                                    'Phone Column': phone_col,
-                                                                    'Phone Value': output_df.at[idx, phone_col],
-                                                                    'DNC Column': dnc_col,
-                                                                    'DNC Value': output_df.at[idx, dnc_col]
-                                                                })
+                                                dnc_y_with_phones = mask.sum()
+                                                
+                                                if dnc_y_with_phones > 0:
+                                                    verification_issues.append(f"{phone_col}/{dnc_col}: {dnc_y_with_phones} records")
                                                     
-                                                    if verification_issues:
-                                                        st.error("❌ **Verification Failed:**\n- " + "\n- ".join(verification_issues))
-                                                        
-                                                        # Show problematic rows for debugging
-                                                        with st.expander("🔍 Debug: Problematic Rows (first 10)"):
-                                                            st.warning("These rows have DNC='Y' but still have phone numbers:")
-                                                            debug_df = pd.DataFrame(problematic_rows)
-                                                            st.dataframe(debug_df, use_container_width=True)
-                                                            
-                                                            st.info("""
-                                                            **Debug Information:**
-                                                            - Row numbers shown are Excel row numbers (with header)
-                                                            - DNC values should be 'Y' or contain 'Y'
-                                                            - Phone values should be empty but are not
-                                                            - This suggests the cleaning logic didn't process these rows
-                                                            """)
-                                                    else:
-                                                        st.success("✅ **Verification Passed:** All phone numbers with DNC containing 'Y' have been removed successfully!")
+                                                    # Collect problematic rows for debugging
+                                                    problem_indices = output_df[mask].index.tolist()[:10]  # First 10
+                                                    for idx in problem_indices:
+                                                        problematic_rows.append({
+                                                            'Row': idx + 2,  # +2 for Excel (header + 0-index)
+                                                            'Phone Column': phone_col,
+                                                            'Phone Value': output_df.at[idx, phone_col],
+                                                            'DNC Column': dnc_col,
+                                                            'DNC Value': output_df.at[idx, dnc_col]
+                                                        })
+                                            
+                                            if verification_issues:
+                                                st.error("❌ **Verification Failed:**\n- " + "\n- ".join(verification_issues))
                                                 
-                                                    # Provide download options
-                                                    output_format = st.radio("Output format:", 
-                                                                           ("CSV", "Excel", "JSON"), 
-                                                                           horizontal=True,
-                                                                           key="dnc_output_format")
+                                                # Show problematic rows for debugging
+                                                with st.expander("🔍 Debug: Problematic Rows (first 10)"):
+                                                    st.warning("These rows have DNC='Y' but still have phone numbers:")
+                                                    debug_df = pd.DataFrame(problematic_rows)
+                                                    st.dataframe(debug_df, use_container_width=True)
                                                     
-                                                    create_download_button(
-                                                        output_df,
-                                                        "dnc_cleaned_simple",
-                                                        output_format.lower(),
-                                                        f"Download DNC cleaned data with {len(output_df):,} rows"
-                                                    )
+                                                    st.info("""
+                                                    **Debug Information:**
+                                                    - Row numbers shown are Excel row numbers (with header)
+                                                    - DNC values should be 'Y' or contain 'Y'
+                                                    - Phone values should be empty but are not
+                                                    - This suggests the cleaning logic didn't process these rows
+                                                    """)
+                                            else:
+                                                st.success("✅ **Verification Passed:** All phone numbers with DNC containing 'Y' have been removed successfully!")
+                                        
+                                            # Provide download options
+                                            output_format = st.radio("Output format:", 
+                                                                   ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
+                                                                   horizontal=True,
+                                                                   key="dnc_output_format")
+                                            
+                                            create_download_button(
+                                                output_df,
+                                                "dnc_cleaned_simple",
+                                                output_format.lower(),
+                                                f"Download DNC cleaned data with {len(output_df):,} rows"
+                                            )
                                 
                                 # ADDRESS + HONWINCOME (basic version without names)
                                 elif option == "Address + HoNWIncome":
                                         processing_text.text("Processing addresses with homeowner, net worth, and income data...")
                                         
-                                        # Clean addresses if requested
-                                        if st.session_state['user_preferences']['auto_clean_addresses']:
-                                            df = df[df['PERSONAL_ADDRESS'].notna()]
-                                            df['PERSONAL_ADDRESS_CLEAN'] = df['PERSONAL_ADDRESS'].apply(clean_address)
-                                            progress_bar.progress(0.2)
-                                        
-                                        # Create the address components
-                                        address_components = ['PERSONAL_ADDRESS_CLEAN'] if 'PERSONAL_ADDRESS_CLEAN' in df.columns else ['PERSONAL_ADDRESS']
-                                        if 'PERSONAL_CITY' in df.columns:
-                                            address_components.append('PERSONAL_CITY')
-                                        if 'PERSONAL_STATE' in df.columns:
-                                            address_components.append('PERSONAL_STATE')
-                                        
-                                        # Create the address field
-                                        df['ADDRESS'] = df[address_components].apply(
-                                            lambda row: ', '.join([str(x) for x in row if pd.notna(x) and x != '']), axis=1
+                                        # Clean addresses and build the ADDRESS and DATA fields in one plan; missing
+                                        # HoNWIncome values render as ''
+                                        plan = build_address_plan(
+                                            data_template, ['ADDRESS', 'DATA'],
+                                            clean_addresses=st.session_state['user_preferences']['auto_clean_addresses']
                                         )
-                                        
-                                        # Handle missing values for HoNWIncome data
-                                        df['HOMEOWNER'] = df['HOMEOWNER'].fillna('') if 'HOMEOWNER' in df.columns else ''
-                                        df['NET_WORTH'] = df['NET_WORTH'].fillna('') if 'NET_WORTH' in df.columns else ''
-                                        df['INCOME_RANGE'] = df['INCOME_RANGE'].fillna('') if 'INCOME_RANGE' in df.columns else ''
-                                        
-                                        # Create the data field with HoNWIncome information
-                                        honw_parts = []
-                                        if 'HOMEOWNER' in df.columns:
-                                            honw_parts.append('Ho ' + df['HOMEOWNER'].astype(str))
-                                        if 'NET_WORTH' in df.columns:
-                                            honw_parts.append('NW ' + df['NET_WORTH'].astype(str))
-                                        if 'INCOME_RANGE' in df.columns:
-                                            honw_parts.append('Income ' + df['INCOME_RANGE'].astype(str))
-                                        
-                                        if honw_parts:
-                                            # Combine the Series objects using string concatenation
-                                            df['DATA'] = honw_parts[0]
-                                            for part in honw_parts[1:]:
-                                                df['DATA'] = df['DATA'] + ' | ' + part
-                                        else:
-                                            df['DATA'] = 'No HoNWIncome data available'
+                                        df, _ = run_job(option, plan.describe(), plan.execute, df)
                                         
                                         # Create output with address and data only
                                         output_df = df[['ADDRESS', 'DATA']].copy()
@@ -2054,7 +1847,7 @@ def main():
                                         
                                         # Provide download options
                                         output_format = st.radio("Output format:", 
-                                                               ("CSV", "Excel", "JSON"), 
+                                                               ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                                horizontal=True)
                                         
                                         create_download_button(
@@ -2085,56 +1878,14 @@ def main():
                                 elif option == "Address + HoNWIncome & Phone":
                                         processing_text.text("Processing addresses with homeowner, net worth, income, and phone data...")
                                         
-                                        # Clean addresses if requested
-                                        if st.session_state['user_preferences']['auto_clean_addresses']:
-                                            df = df[df['PERSONAL_ADDRESS'].notna()]
-                                            df['PERSONAL_ADDRESS_CLEAN'] = df['PERSONAL_ADDRESS'].apply(clean_address)
-                                            progress_bar.progress(0.2)
-                                        
-                                        # Create the address field
-                                        address_components = ['PERSONAL_ADDRESS_CLEAN'] if 'PERSONAL_ADDRESS_CLEAN' in df.columns else ['PERSONAL_ADDRESS']
-                                        if 'PERSONAL_CITY' in df.columns:
-                                            address_components.append('PERSONAL_CITY')
-                                        if 'PERSONAL_STATE' in df.columns:
-                                            address_components.append('PERSONAL_STATE')
-                                        
-                                        df['ADDRESS'] = df[address_components].apply(
-                                            lambda row: ', '.join([str(x) for x in row if pd.notna(x) and x != '']), axis=1
+                                        # Clean addresses, format phones and build the ADDRESS and DATA fields in one plan;
+                                        # the template adds the phone for non-DNC records
+                                        plan = build_address_plan(
+                                            data_template, ['ADDRESS', 'DATA', 'MOBILE_PHONE', 'DNC'],
+                                            clean_addresses=st.session_state['user_preferences']['auto_clean_addresses'],
+                                            format_phones=st.session_state['user_preferences'].get('format_phone_numbers', True)
                                         )
-                                        
-                                        # Handle missing values
-                                        df['MOBILE_PHONE'] = df['MOBILE_PHONE'].fillna('')
-                                        df['DNC'] = df['DNC'].fillna('N')
-                                        df['HOMEOWNER'] = df['HOMEOWNER'].fillna('') if 'HOMEOWNER' in df.columns else ''
-                                        df['NET_WORTH'] = df['NET_WORTH'].fillna('') if 'NET_WORTH' in df.columns else ''
-                                        df['INCOME_RANGE'] = df['INCOME_RANGE'].fillna('') if 'INCOME_RANGE' in df.columns else ''
-                                        
-                                        # Format phone numbers if needed
-                                        if st.session_state['user_preferences'].get('format_phone_numbers', True):
-                                            df['MOBILE_PHONE'] = df['MOBILE_PHONE'].apply(validate_phone)
-                                        
-                                        # Create the data field with HoNWIncome and phone info
-                                        honw_parts = []
-                                        if 'HOMEOWNER' in df.columns:
-                                            honw_parts.append('Ho ' + df['HOMEOWNER'].astype(str))
-                                        if 'NET_WORTH' in df.columns:
-                                            honw_parts.append('NW ' + df['NET_WORTH'].astype(str))
-                                        if 'INCOME_RANGE' in df.columns:
-                                            honw_parts.append('Income ' + df['INCOME_RANGE'].astype(str))
-                                        
-                                        # Create base data field
-                                        if honw_parts:
-                                            # Combine the Series objects using string concatenation
-                                            df['DATA'] = honw_parts[0]
-                                            for part in honw_parts[1:]:
-                                                df['DATA'] = df['DATA'] + ' | ' + part
-                                        else:
-                                            df['DATA'] = 'No HoNWIncome data'
-                                        
-                                        # Add phone for non-DNC records
-                                        df['DATA'] = df['DATA'] + \
-                                                df.apply(lambda row: ' | Phone ' + str(row['MOBILE_PHONE']) if (
-                                                        row['DNC'] != 'Y' and row['MOBILE_PHONE'] != '') else '', axis=1)
+                                        df, _ = run_job(option, plan.describe(), plan.execute, df)
                                         
                                         # Create output
                                         output_df = df[['ADDRESS', 'DATA']].copy()
@@ -2152,7 +1903,7 @@ def main():
                                         
                                         # Provide download options
                                         output_format = st.radio("Output format:", 
-                                                               ("CSV", "Excel", "JSON"), 
+                                                               ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                                horizontal=True)
                                         
                                         create_download_button(
@@ -2185,52 +1936,13 @@ def main():
                                         
                                         # Clean addresses if requested
                                         if st.session_state['user_preferences']['auto_clean_addresses']:
-                                            df = df[df['PERSONAL_ADDRESS'].notna()]
-                                            df['PERSONAL_ADDRESS_CLEAN'] = df['PERSONAL_ADDRESS'].apply(clean_address)
+                                            df = run_job('clean_address_rows', {}, clean_address_rows, df)
                                             progress_bar.progress(0.2)
                                         
-                                        # Create comprehensive output columns
-                                        output_columns = ['FIRST_NAME', 'LAST_NAME']
-                                        
-                                        # Add cleaned or original address
-                                        if 'PERSONAL_ADDRESS_CLEAN' in df.columns:
-                                            output_columns.append('PERSONAL_ADDRESS_CLEAN')
-                                        else:
-                                            output_columns.append('PERSONAL_ADDRESS')
-                                        
-                                        # Add address components
-                                        address_cols = ['PERSONAL_CITY', 'PERSONAL_STATE', 'PERSONAL_ZIP', 'PERSONAL_ZIP4']
-                                        for col in address_cols:
-                                            if col in df.columns:
-                                                output_columns.append(col)
-                                        
-                                        # Add phone numbers
-                                        phone_cols = ['MOBILE_PHONE', 'DIRECT_NUMBER', 'PERSONAL_PHONE']
-                                        for col in phone_cols:
-                                            if col in df.columns:
-                                                output_columns.append(col)
-                                        
-                                        # Add demographic data
-                                        demo_cols = ['AGE_RANGE', 'GENDER', 'HOMEOWNER', 'NET_WORTH', 'INCOME_RANGE', 'MARRIED', 'CHILDREN']
-                                        for col in demo_cols:
-                                            if col in df.columns:
-                                                output_columns.append(col)
-                                        
-                                        # Add email columns
-                                        email_cols = ['PERSONAL_EMAILS', 'BUSINESS_EMAIL']
-                                        for col in email_cols:
-                                            if col in df.columns:
-                                                output_columns.append(col)
-                                        
-                                        # Create output with available columns
-                                        available_columns = [col for col in output_columns if col in df.columns]
-                                        output_df = df[available_columns].copy()
-                                        
-                                        # Format phone numbers if enabled
-                                        if st.session_state['user_preferences'].get('format_phone_numbers', True):
-                                            for col in phone_cols:
-                                                if col in output_df.columns:
-                                                    output_df[col] = output_df[col].apply(validate_phone)
+                                        # Names, address parts, phones, demographics and emails, shared with the CLI
+                                        output_df = full_combined_address(
+                                            df, st.session_state['user_preferences'].get('format_phone_numbers', True))
+                                        available_columns = list(output_df.columns)
                                         
                                         progress_bar.progress(0.6)
                                         
@@ -2251,7 +1963,7 @@ def main():
                                                 "Address": ['PERSONAL_ADDRESS_CLEAN', 'PERSONAL_ADDRESS', 'PERSONAL_CITY', 'PERSONAL_STATE', 'PERSONAL_ZIP', 'PERSONAL_ZIP4'],
                                                 "Phone Numbers": ['MOBILE_PHONE', 'DIRECT_NUMBER', 'PERSONAL_PHONE'],
                                                 "Demographics": ['AGE_RANGE', 'GENDER', 'HOMEOWNER', 'NET_WORTH', 'INCOME_RANGE', 'MARRIED', 'CHILDREN'],
-                                                "Email": ['PERSONAL_EMAILS', 'BUSINESS_EMAIL']
+                                                "Email": ['PRIMARY_EMAIL', 'SECONDARY_EMAIL', 'PERSONAL_EMAILS', 'BUSINESS_EMAIL']
                                             }
                                             
                                             for category, cols in col_categories.items():
@@ -2261,7 +1973,7 @@ def main():
                                         
                                         # Provide download options
                                         output_format = st.radio("Output format:", 
-                                                               ("CSV", "Excel", "JSON"), 
+                                                               ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                                horizontal=True)
                                         
                                         create_download_button(
@@ -2279,49 +1991,13 @@ def main():
                                         
                                         # Clean addresses if requested
                                         if st.session_state['user_preferences']['auto_clean_addresses']:
-                                            df = df[df['PERSONAL_ADDRESS'].notna()]
-                                            df['PERSONAL_ADDRESS_CLEAN'] = df['PERSONAL_ADDRESS'].apply(clean_address)
+                                            df = run_job('clean_address_rows', {}, clean_address_rows, df)
                                             progress_bar.progress(0.2)
                                         
-                                        # Select relevant columns for phone & credit focus
-                                        output_columns = ['FIRST_NAME', 'LAST_NAME']
-                                        
-                                        # Add address columns
-                                        if 'PERSONAL_ADDRESS_CLEAN' in df.columns:
-                                            output_columns.append('PERSONAL_ADDRESS_CLEAN')
-                                        else:
-                                            output_columns.append('PERSONAL_ADDRESS')
-                                        
-                                        address_cols = ['PERSONAL_CITY', 'PERSONAL_STATE', 'PERSONAL_ZIP']
-                                        for col in address_cols:
-                                            if col in df.columns:
-                                                output_columns.append(col)
-                                        
-                                        # Add all available phone columns
-                                        phone_cols = ['MOBILE_PHONE', 'DIRECT_NUMBER', 'PERSONAL_PHONE']
-                                        for col in phone_cols:
-                                            if col in df.columns:
-                                                output_columns.append(col)
-                                        
-                                        # Add credit score and related columns
-                                        credit_cols = ['SKIPTRACE_CREDIT_RATING']
-                                        for col in credit_cols:
-                                            if col in df.columns:
-                                                output_columns.append(col)
-                                        
-                                        # Add DNC status
-                                        if 'DNC' in df.columns:
-                                            output_columns.append('DNC')
-                                        
-                                        # Create output with available columns
-                                        available_columns = [col for col in output_columns if col in df.columns]
-                                        output_df = df[available_columns].copy()
-                                        
-                                        # Format phone numbers if enabled
-                                        if st.session_state['user_preferences'].get('format_phone_numbers', True):
-                                            for col in phone_cols:
-                                                if col in output_df.columns:
-                                                    output_df[col] = output_df[col].apply(validate_phone)
+                                        # Names, address parts, phones, credit rating and DNC flag, shared with the CLI
+                                        output_df = phone_credit_score(
+                                            df, st.session_state['user_preferences'].get('format_phone_numbers', True))
+                                        phone_cols = FULL_ADDRESS_PHONE_COLUMNS
                                         
                                         progress_bar.progress(0.6)
                                         
@@ -2351,7 +2027,7 @@ def main():
                                         
                                         # Provide download options
                                         output_format = st.radio("Output format:", 
-                                                               ("CSV", "Excel", "JSON"), 
+                                                               ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                                horizontal=True)
                                         
                                         create_download_button(
@@ -2367,33 +2043,14 @@ def main():
                                 elif option == "Complete Contact Export":
                                         processing_text.text("Processing and cleaning complete contact dataset...")
                                         
-                                        # Make a copy to preserve original structure
-                                        output_df = df.copy()
-                                        
-                                        # Clean addresses if they exist and auto-clean is enabled
-                                        if 'PERSONAL_ADDRESS' in output_df.columns and st.session_state['user_preferences']['auto_clean_addresses']:
-                                            processing_text.text("Cleaning personal addresses...")
-                                            # Only clean addresses that exist
-                                            mask = output_df['PERSONAL_ADDRESS'].notna()
-                                            output_df.loc[mask, 'PERSONAL_ADDRESS'] = output_df.loc[mask, 'PERSONAL_ADDRESS'].apply(clean_address)
-                                            progress_bar.progress(0.2)
-                                        
-                                        # Clean business addresses if they exist
-                                        if 'COMPANY_ADDRESS' in output_df.columns and st.session_state['user_preferences']['auto_clean_addresses']:
-                                            processing_text.text("Cleaning business addresses...")
-                                            mask = output_df['COMPANY_ADDRESS'].notna()
-                                            output_df.loc[mask, 'COMPANY_ADDRESS'] = output_df.loc[mask, 'COMPANY_ADDRESS'].apply(clean_address)
-                                            progress_bar.progress(0.4)
-                                        
-                                        # Format phone numbers if enabled
-                                        phone_cols = ['MOBILE_PHONE', 'DIRECT_NUMBER', 'PERSONAL_PHONE', 'COMPANY_PHONE']
-                                        available_phone_cols = [col for col in phone_cols if col in output_df.columns]
-                                        
-                                        if available_phone_cols and st.session_state['user_preferences'].get('format_phone_numbers', True):
-                                            processing_text.text("Formatting phone numbers...")
-                                            for col in available_phone_cols:
-                                                output_df[col] = output_df[col].apply(validate_phone)
-                                            progress_bar.progress(0.6)
+                                        # Clean personal and company addresses and format phones on a copy, shared with the CLI
+                                        processing_text.text("Cleaning addresses and formatting phone numbers...")
+                                        output_df = complete_contact_export(
+                                            df,
+                                            st.session_state['user_preferences']['auto_clean_addresses'],
+                                            st.session_state['user_preferences'].get('format_phone_numbers', True)
+                                        )
+                                        available_phone_cols = [col for col in CONTACT_PHONE_COLUMNS if col in output_df.columns]
                                         
                                         progress_bar.progress(0.8)
                                         
@@ -2483,7 +2140,7 @@ def main():
                                         
                                         # Provide download options
                                         output_format = st.radio("Output format:", 
-                                                               ("CSV", "Excel", "JSON"), 
+                                                               ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                                horizontal=True)
                                         
                                         create_download_button(
@@ -2499,45 +2156,13 @@ def main():
                                 elif option == "Address + HoNWIncome First Name Last Name":
                                         processing_text.text("Processing addresses with homeowner, net worth, income data, and names...")
                                         
-                                        # Clean addresses if requested
-                                        if st.session_state['user_preferences']['auto_clean_addresses']:
-                                            df = df[df['PERSONAL_ADDRESS'].notna()]
-                                            df['PERSONAL_ADDRESS_CLEAN'] = df['PERSONAL_ADDRESS'].apply(clean_address)
-                                            progress_bar.progress(0.2)
-                                        
-                                        # Create the address components
-                                        address_components = ['PERSONAL_ADDRESS_CLEAN'] if 'PERSONAL_ADDRESS_CLEAN' in df.columns else ['PERSONAL_ADDRESS']
-                                        if 'PERSONAL_CITY' in df.columns:
-                                            address_components.append('PERSONAL_CITY')
-                                        if 'PERSONAL_STATE' in df.columns:
-                                            address_components.append('PERSONAL_STATE')
-                                        
-                                        # Create the address field
-                                        df['ADDRESS'] = df[address_components].apply(
-                                            lambda row: ', '.join([str(x) for x in row if pd.notna(x) and x != '']), axis=1
+                                        # Clean addresses and build the ADDRESS and DATA fields in one plan; missing
+                                        # HoNWIncome values render as ''
+                                        plan = build_address_plan(
+                                            data_template, ['FIRST_NAME', 'LAST_NAME', 'ADDRESS', 'DATA'],
+                                            clean_addresses=st.session_state['user_preferences']['auto_clean_addresses']
                                         )
-                                        
-                                        # Handle missing values for HoNWIncome data
-                                        df['HOMEOWNER'] = df['HOMEOWNER'].fillna('') if 'HOMEOWNER' in df.columns else ''
-                                        df['NET_WORTH'] = df['NET_WORTH'].fillna('') if 'NET_WORTH' in df.columns else ''
-                                        df['INCOME_RANGE'] = df['INCOME_RANGE'].fillna('') if 'INCOME_RANGE' in df.columns else ''
-                                        
-                                        # Create the data field with HoNWIncome information
-                                        honw_parts = []
-                                        if 'HOMEOWNER' in df.columns:
-                                            honw_parts.append('Ho ' + df['HOMEOWNER'].astype(str))
-                                        if 'NET_WORTH' in df.columns:
-                                            honw_parts.append('NW ' + df['NET_WORTH'].astype(str))
-                                        if 'INCOME_RANGE' in df.columns:
-                                            honw_parts.append('Income ' + df['INCOME_RANGE'].astype(str))
-                                        
-                                        if honw_parts:
-                                            # Combine the Series objects using string concatenation
-                                            df['DATA'] = honw_parts[0]
-                                            for part in honw_parts[1:]:
-                                                df['DATA'] = df['DATA'] + ' | ' + part
-                                        else:
-                                            df['DATA'] = 'No HoNWIncome data available'
+                                        df, _ = run_job(option, plan.describe(), plan.execute, df)
                                         
                                         # Create output with names and address data
                                         output_df = df[['FIRST_NAME', 'LAST_NAME', 'ADDRESS', 'DATA']].copy()
@@ -2557,7 +2182,7 @@ def main():
                                         
                                         # Provide download options
                                         output_format = st.radio("Output format:", 
-                                                               ("CSV", "Excel", "JSON"), 
+                                                               ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                                horizontal=True)
                                         
                                         create_download_button(
@@ -2627,9 +2252,7 @@ def main():
                                             address_components.append(business_zip_col)
                                         
                                         # Create the full business address
-                                        df['BUSINESS_ADDRESS'] = df[address_components].apply(
-                                            lambda row: ', '.join([str(x) for x in row if pd.notna(x) and x != '']), axis=1
-                                        )
+                                        df['BUSINESS_ADDRESS'] = join_columns(df, address_components)
                                         
                                         progress_bar.progress(0.6)
                                         
@@ -2669,7 +2292,7 @@ def main():
                                         
                                         # Provide download options
                                         output_format = st.radio("Output format:", 
-                                                               ("CSV", "Excel", "JSON"), 
+                                                               ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                                horizontal=True)
                                         
                                         create_download_button(
@@ -2710,13 +2333,31 @@ def main():
                                         
                                         duplicate_method = st.radio(
                                             "How should duplicates be detected?",
-                                            ["All columns (exact match)", "Selected columns only"],
-                                            help="Choose whether to compare all columns or select specific ones for duplicate detection"
+                                            ["All columns (exact match)", "Selected columns only", "Fuzzy Duplicate Resolution"],
+                                            help="Choose whether to compare all columns, select specific ones, or match the same person across spelling and address variants"
                                         )
                                         
                                         columns_for_comparison = []
                                         
-                                        if duplicate_method == "Selected columns only":
+                                        if duplicate_method == "Fuzzy Duplicate Resolution":
+                                            # Fuzzy matching compares names and addresses within ZIP + last name blocks
+                                            fuzzy_cols = ['FIRST_NAME', 'LAST_NAME', 'PERSONAL_ADDRESS', 'PERSONAL_ZIP']
+                                            valid_fuzzy, fuzzy_msg = validate_columns(analysis_df, fuzzy_cols, duplicate_method)
+                                            if not valid_fuzzy:
+                                                st.error(fuzzy_msg)
+                                                st.stop()
+                                            columns_for_comparison = fuzzy_cols
+                                            
+                                            fuzzy_threshold = st.slider(
+                                                "Similarity threshold",
+                                                min_value=0.70,
+                                                max_value=1.00,
+                                                value=0.88,
+                                                step=0.01,
+                                                help="Minimum name and address similarity for two records to be treated as the same person"
+                                            )
+                                            st.caption("Records are only compared within the same ZIP code and last-name sound-alike group, so large files stay fast.")
+                                        elif duplicate_method == "Selected columns only":
                                             # Let user select which columns to use for duplicate detection
                                             available_columns = analysis_df.columns.tolist()
                                             columns_for_comparison = st.multiselect(
@@ -2751,16 +2392,25 @@ def main():
                                                 comparison_df = analysis_df
                                             
                                             # Count frequencies using value_counts on the combination of selected columns
-                                            if len(columns_for_comparison) == 1:
+                                            if duplicate_method == "Fuzzy Duplicate Resolution":
+                                                # Cluster near-identical people and count records per cluster
+                                                processing_text.text("Matching similar records within ZIP and last-name blocks...")
+                                                cluster_ids, fuzzy_stats = fuzzy_duplicate_clusters(
+                                                    analysis_df,
+                                                    threshold=fuzzy_threshold,
+                                                    address_normalizer=clean_address
+                                                )
+                                                analysis_df['DUPLICATE_CLUSTER_ID'] = cluster_ids
+                                                analysis_df['temp_key'] = cluster_ids
+                                                frequency_counts = analysis_df['temp_key'].value_counts()
+                                            elif len(columns_for_comparison) == 1:
                                                 # Single column comparison - handle NaN values properly
-                                                analysis_df['temp_key'] = analysis_df[columns_for_comparison[0]].fillna('MISSING').astype(str)
+                                                analysis_df['temp_key'] = fill_missing(analysis_df[columns_for_comparison[0]], 'MISSING').astype(str)
                                                 frequency_counts = analysis_df['temp_key'].value_counts()
                                             else:
                                                 # Multiple column comparison - create a composite key
                                                 # Handle NaN values and ensure proper string conversion
-                                                analysis_df['temp_key'] = comparison_df.apply(
-                                                    lambda row: '|'.join([str(val) if pd.notna(val) else 'MISSING' for val in row]), axis=1
-                                                )
+                                                analysis_df['temp_key'] = join_columns(comparison_df, comparison_df.columns, sep='|', na_rep='MISSING')
                                                 frequency_counts = analysis_df['temp_key'].value_counts()
                                             
                                             progress_bar.progress(0.5)
@@ -2776,7 +2426,9 @@ def main():
                                             
                                             # Remove duplicates - keep first occurrence of each unique record
                                             processing_text.text("Removing duplicates...")
-                                            if duplicate_method == "Selected columns only":
+                                            if duplicate_method == "Fuzzy Duplicate Resolution":
+                                                unique_df = analysis_df.drop_duplicates(subset=['DUPLICATE_CLUSTER_ID'], keep='first')
+                                            elif duplicate_method == "Selected columns only":
                                                 unique_df = analysis_df.drop_duplicates(subset=columns_for_comparison, keep='first')
                                             else:
                                                 unique_df = analysis_df.drop_duplicates(keep='first')
@@ -2817,6 +2469,11 @@ def main():
                                             st.info(f"**Duplicate detection method:** {duplicate_method}")
                                             if duplicate_method == "Selected columns only":
                                                 st.write(f"**Columns used for comparison:** {', '.join(columns_for_comparison)}")
+                                            elif duplicate_method == "Fuzzy Duplicate Resolution":
+                                                st.write(f"**Similarity threshold:** {fuzzy_threshold:.2f}")
+                                                st.write(f"**Candidate blocks compared:** {fuzzy_stats['blocks']:,}, "
+                                                         f"**pair comparisons:** {fuzzy_stats['comparisons']:,}, "
+                                                         f"**matches merged:** {fuzzy_stats['matches']:,}")
                                             
                                             # Show frequency distribution
                                             with st.expander("Frequency Distribution Analysis"):
@@ -2856,7 +2513,7 @@ def main():
                                             # Provide download options
                                             st.subheader("Download Results")
                                             output_format = st.radio("Output format:", 
-                                                                   ("CSV", "Excel", "JSON"), 
+                                                                   ("CSV", "Excel", "JSON", "Parquet", "CSV.gz", "CSV.zst", "NDJSON"), 
                                                                    horizontal=True)
                                             
                                             create_download_button(
@@ -2893,6 +2550,7 @@ def main():
                                             "Full Combined Address", "Phone & Credit Score", "Complete Contact Export",
                                             "ZIP Split: Address+HoNW", "ZIP Split: Address+HoNW+Phone",
                                             "File Combiner and Batcher", "Sha256", "Split by State",
+                                            "Hierarchical Split: State → ZIP3 → ZIP5",
                                             "B2B Job Titles Focus", "Filter by Zip Codes", "Company Industry",
                                             "Duplicate Analysis & Frequency Counter", "DNC Phone Number Cleaner"
                                         ]
@@ -2903,8 +2561,11 @@ def main():
         st.header("📊 Data Insights & Visualization")
         
         # Check if there's processed data to visualize
-        if 'processed_data' in st.session_state:
-            df_viz = st.session_state['processed_data']
+        df_viz = None
+        if 'processed_data_id' in st.session_state:
+            df_viz = get_dataset_frame(st.session_state['processed_data_id'])
+        
+        if df_viz is not None:
             
             st.subheader("Dataset Overview")
             
@@ -2946,7 +2607,7 @@ def main():
                 for col in phone_cols:
                     if col in df_viz.columns:
                         # Safely convert to string and handle NaN values before using .str accessor
-                        phone_series = df_viz[col].fillna('').astype(str)
+                        phone_series = fill_missing(df_viz[col], '').astype(str)
                         valid_phones = phone_series.str.match(r'^\(\d{3}\) \d{3}-\d{4}$').sum()
                         total_phones = df_viz[col].notna().sum()
                         if total_phones > 0:
@@ -2957,6 +2618,44 @@ def main():
                     st.write(f"• {issue}")
             else:
                 st.success("✅ No major data quality issues detected!")
+            
+            # Email domain analysis from the cached domain index
+            if any(col in df_viz.columns for col in EMAIL_COLUMNS):
+                st.subheader("Email Domain Analysis")
+                domain_index = get_domain_index(Dataset(st.session_state['processed_data_id'], df_viz))
+                if len(domain_index) > 0:
+                    mail_types = domain_index.mail_types()
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Valid Emails", f"{len(domain_index):,}")
+                    with col2:
+                        st.metric("Distinct Domains", f"{len(domain_index.domains):,}")
+                    with col3:
+                        st.metric("Free Mail Share", f"{mail_types['Free mail'] / len(domain_index) * 100:.1f}%")
+                    
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.write("**Top Domains**")
+                        st.bar_chart(domain_index.top_domains(10))
+                    with col2:
+                        st.write("**Top Corporate Domains**")
+                        st.bar_chart(domain_index.top_domains(10, free=False))
+                    
+                    with st.expander("Free Mail vs Corporate by Source Column"):
+                        st.dataframe(domain_index.sources_by_type(), use_container_width=True)
+                    
+                    # COMPANY_DOMAIN against the person's business email domains
+                    company_summary = domain_index.company_domain_summary()
+                    if company_summary is not None:
+                        st.write("**COMPANY_DOMAIN vs BUSINESS_EMAIL Domain**")
+                        st.bar_chart(company_summary)
+                        checked = company_summary['Match'] + company_summary['Mismatch'] + company_summary['Free mail']
+                        if checked > 0:
+                            st.caption(f"{company_summary['Match']:,} of {checked:,} records with both fields "
+                                       f"({company_summary['Match'] / checked * 100:.1f}%) have a business email "
+                                       f"at their company domain")
+                else:
+                    st.info("No valid email addresses found in this dataset")
                 
         else:
             # Show sample visualizations and features when no data is loaded
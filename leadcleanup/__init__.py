@@ -0,0 +1,3 @@
+"""
+Processing helpers for the Lead Cleanup Suite that do not depend on Streamlit.
+"""
@@ -0,0 +1,5 @@
+import sys
+
+from leadcleanup.cli import main
+
+sys.exit(main())
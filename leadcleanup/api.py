@@ -0,0 +1,284 @@
+"""
+Local HTTP API for pushing lead files through the processing options.
+
+    python -m leadcleanup serve --port 8600
+
+    POST /jobs?option=ZIP+Split:+Address%2BHoNW&format=csv   body: the CSV (plain, gzip or zstd), NDJSON or Parquet file
+    GET  /jobs/{id}             status and progress
+    GET  /jobs/{id}/download    ZIP archive of the outputs
+    GET  /options               options that can run headless
+    GET  /metrics               queue depth and throughput
+
+Uploads are streamed to disk and hashed on the way, so re-posting the same
+file with the same settings returns the existing job. Jobs run on a bounded
+worker pool; when the queue is full, new uploads get 503 with Retry-After.
+"""
+import os
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+
+try:
+    from starlette.applications import Starlette
+    from starlette.responses import FileResponse, JSONResponse
+    from starlette.routing import Route
+except ImportError:
+    Starlette = None
+
+from leadcleanup.fileio import read_input, write_archive
+from leadcleanup.jobs import JobManager, job_key
+from leadcleanup.hashing import HASH_TYPES, IDENTIFIER_TYPES
+from leadcleanup.options import DUPLICATE_METHODS, HEADLESS_OPTIONS, parse_zip_codes, run_option
+
+logger = logging.getLogger(__name__)
+
+
+class ApiMetrics:
+    """Counters for uploads and finished jobs, shared by the worker threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.uploads = 0
+        self.upload_bytes = 0
+        self.rejected = 0
+        self.jobs_completed = 0
+        self.jobs_failed = 0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.busy_seconds = 0.0
+
+    def record_upload(self, size):
+        with self._lock:
+            self.uploads += 1
+            self.upload_bytes += size
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def record_job(self, rows_in, rows_out, seconds, failed=False):
+        with self._lock:
+            if failed:
+                self.jobs_failed += 1
+            else:
+                self.jobs_completed += 1
+                self.rows_in += rows_in
+                self.rows_out += rows_out
+            self.busy_seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'uptime_seconds': round(time.time() - self.started, 1),
+                'uploads': self.uploads,
+                'upload_bytes': self.upload_bytes,
+                'rejected_uploads': self.rejected,
+                'jobs_completed': self.jobs_completed,
+                'jobs_failed': self.jobs_failed,
+                'rows_in': self.rows_in,
+                'rows_out': self.rows_out,
+                'rows_per_busy_second': round(self.rows_in / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+            }
+
+
+def _settings_from_query(params):
+    """Job settings from query parameters, mirroring the CLI flags"""
+    def flag(name, default):
+        value = params.get(name)
+        return default if value is None else value.lower() in ('1', 'true', 'yes', 'y')
+
+    def items(name, default=None):
+        value = params.get(name)
+        return [item.strip() for item in value.split(',') if item.strip()] if value else default
+
+    history_terms = {
+        'COMPANY_NAME_HISTORY': params.get('worked_at'),
+        'JOB_TITLE_HISTORY': params.get('job_title'),
+        'EDUCATION_HISTORY': params.get('education'),
+    }
+    identifiers = tuple(item.upper() for item in items('identifiers', ['EMAIL']))
+    hash_types = tuple(item.upper() for item in items('hash_types', ['SHA256']))
+    duplicate_method = params.get('duplicate_method', 'exact').lower()
+    if any(identifier not in IDENTIFIER_TYPES for identifier in identifiers):
+        raise ValueError(f"identifiers must be among: {', '.join(IDENTIFIER_TYPES)}")
+    if any(hash_type not in HASH_TYPES for hash_type in hash_types):
+        raise ValueError(f"hash_types must be among: {', '.join(HASH_TYPES)}")
+    if duplicate_method not in DUPLICATE_METHODS:
+        raise ValueError(f"duplicate_method must be one of: {', '.join(DUPLICATE_METHODS)}")
+    return {
+        'format': params.get('format', 'csv').lower(),
+        'option': {
+            'clean_addresses': flag('clean_addresses', True),
+            'format_phones': flag('format_phones', True),
+            'batch_size': int(params.get('batch_size', 2000)),
+            'zip_codes': parse_zip_codes(params['zip_codes']) if params.get('zip_codes') else None,
+            'min_group_size': int(params.get('min_group_size', 25)),
+            'data_template': params.get('template'),
+            'identifiers': identifiers,
+            'hash_types': hash_types,
+            'upload_batch_size': int(params.get('upload_batch_size', 100000)),
+            'industries': items('industries'),
+            'history_terms': {column: term for column, term in history_terms.items() if term},
+            'cluster_companies': flag('cluster_companies', False),
+            'duplicate_method': duplicate_method,
+            'duplicate_columns': items('duplicate_columns'),
+            'fuzzy_threshold': float(params.get('fuzzy_threshold', 0.88)),
+            'least_frequent_first': flag('least_frequent_first', False),
+        },
+    }
+
+
+def process_upload(upload_path, archive_path, option, settings, metrics, progress=None):
+    """Job body: read an uploaded file, run the option and write the outputs as one archive"""
+    start = time.time()
+    rows_in = rows_out = 0
+    try:
+        if progress:
+            progress(0.05, "Reading upload")
+        df, detected_format = read_input(upload_path)
+        rows_in = len(df)
+        frames = run_option(df, option, progress=progress, **settings['option'])
+        rows_out = sum(len(frame) for _, frame in frames)
+        if progress:
+            progress(0.95, f"Writing {len(frames):,} files")
+        write_archive(frames, archive_path, settings['format'])
+    except Exception:
+        metrics.record_job(rows_in, 0, time.time() - start, failed=True)
+        raise
+    finally:
+        # The upload is not needed once parsed; identical re-uploads map to this job by hash
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+
+    metrics.record_job(rows_in, rows_out, time.time() - start)
+    return {
+        'format': detected_format,
+        'rows_in': rows_in,
+        'rows_out': rows_out,
+        'files': len(frames),
+        'archive': archive_path,
+    }
+
+
+def _job_status(job):
+    status = {
+        'id': job.id,
+        'status': job.status,
+        'progress': round(job.progress, 3),
+        'message': job.message,
+        'description': job.description,
+    }
+    if job.status == 'done':
+        status['result'] = {key: value for key, value in job.result.items() if key != 'archive'}
+        status['download'] = f"/jobs/{job.id}/download"
+    elif job.status == 'failed':
+        status['error'] = job.error
+    return status
+
+
+def create_app(data_dir=None, workers=2, max_queue=16):
+    """
+    Build the ASGI application. Uploads and archives live under data_dir
+    (a temporary directory by default); at most `workers` jobs run at once
+    and at most `max_queue` may be waiting or running.
+    """
+    if Starlette is None:
+        raise ImportError("The HTTP API needs starlette (installed with streamlit) and uvicorn to serve it")
+
+    data_dir = data_dir or tempfile.mkdtemp(prefix="leadcleanup-api-")
+    os.makedirs(data_dir, exist_ok=True)
+
+    def archive_path(key):
+        return os.path.join(data_dir, f"{key}.zip")
+
+    def remove_archive(job):
+        # A dropped job can no longer be downloaded, so its archive only takes up disk
+        try:
+            os.remove(archive_path(job.key))
+        except FileNotFoundError:
+            pass
+
+    manager = JobManager(max_workers=workers, max_finished=max(16, max_queue), on_evict=remove_archive)
+    metrics = ApiMetrics()
+
+    async def submit_job(request):
+        option = request.query_params.get('option')
+        if option not in HEADLESS_OPTIONS:
+            return JSONResponse({'error': f"Unknown option {option!r}", 'options': list(HEADLESS_OPTIONS)}, status_code=400)
+        try:
+            settings = _settings_from_query(request.query_params)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, status_code=400)
+
+        if manager.pending() >= max_queue:
+            metrics.record_rejected()
+            return JSONResponse({'error': "Queue is full, retry later", 'queue_depth': manager.pending()},
+                                status_code=503, headers={'Retry-After': '5'})
+
+        # Stream the body to disk, hashing as it arrives
+        digest = hashlib.sha256()
+        size = 0
+        fd, upload_path = tempfile.mkstemp(suffix=".csv", dir=data_dir)
+        with os.fdopen(fd, 'wb') as f:
+            async for chunk in request.stream():
+                if chunk:
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+        if size == 0:
+            os.remove(upload_path)
+            return JSONResponse({'error': "Empty upload; send the CSV or Parquet file as the request body"}, status_code=400)
+        metrics.record_upload(size)
+
+        key = job_key(digest.hexdigest(), option, settings)
+        existing = manager.find(key)
+        job = manager.submit(key, process_upload, upload_path, archive_path(key), option, settings, metrics,
+                             description=f"{option} ({size:,} bytes)")
+        if existing is not None and job.id == existing.id:
+            # The same file with the same settings is already running or done; this copy is not needed
+            os.remove(upload_path)
+            return JSONResponse(_job_status(job), status_code=200)
+        return JSONResponse(_job_status(job), status_code=202)
+
+    async def job_status(request):
+        job = manager.get(request.path_params['job_id'])
+        if job is None:
+            return JSONResponse({'error': "Unknown job"}, status_code=404)
+        return JSONResponse(_job_status(job))
+
+    async def download(request):
+        job = manager.get(request.path_params['job_id'])
+        if job is None:
+            return JSONResponse({'error': "Unknown job"}, status_code=404)
+        if job.status != 'done':
+            return JSONResponse(_job_status(job), status_code=409)
+        # FileResponse streams the archive from disk in chunks
+        return FileResponse(job.result['archive'], media_type="application/zip", filename=f"leadcleanup_{job.id}.zip")
+
+    async def list_options(request):
+        return JSONResponse({'options': list(HEADLESS_OPTIONS)})
+
+    async def get_metrics(request):
+        counts = manager.counts()
+        return JSONResponse(dict(metrics.snapshot(), queue_depth=counts['queued'], running=counts['running'],
+                                 workers=workers, max_queue=max_queue))
+
+    return Starlette(routes=[
+        Route('/jobs', submit_job, methods=['POST']),
+        Route('/jobs/{job_id}', job_status),
+        Route('/jobs/{job_id}/download', download),
+        Route('/options', list_options),
+        Route('/metrics', get_metrics),
+    ])
+
+
+def serve(host="127.0.0.1", port=8600, data_dir=None, workers=2, max_queue=16):
+    """Run the API with uvicorn"""
+    try:
+        import uvicorn
+    except ImportError:
+        raise ImportError("Serving the HTTP API needs uvicorn: pip install uvicorn")
+    uvicorn.run(create_app(data_dir, workers, max_queue), host=host, port=port, log_level="info")
@@ -0,0 +1,122 @@
+import re
+import string
+import logging
+import functools
+import pandas as pd
+import usaddress
+
+logger = logging.getLogger(__name__)
+
+# Define abbreviation dictionaries with uppercase keys
+directional_abbr = {
+    'N': 'North', 'S': 'South', 'E': 'East', 'W': 'West',
+    'NE': 'Northeast', 'NW': 'Northwest', 'SE': 'Southeast', 'SW': 'Southwest',
+    'NORTH': 'North', 'SOUTH': 'South', 'EAST': 'East', 'WEST': 'West',
+    'NORTHEAST': 'Northeast', 'NORTHWEST': 'Northwest', 'SOUTHEAST': 'Southeast', 'SOUTHWEST': 'Southwest'
+}
+
+street_type_abbr = {
+    'ST': 'Street', 'AVE': 'Avenue', 'BLVD': 'Boulevard', 'RD': 'Road',
+    'LN': 'Lane', 'DR': 'Drive', 'CT': 'Court', 'PL': 'Plaza',
+    'SQ': 'Square', 'TER': 'Terrace', 'CIR': 'Circle', 'PKWY': 'Parkway',
+    'TRL': 'Trail', 'TRCE': 'Trace', 'HWY': 'Highway', 'CTR': 'Center',
+    'SPG': 'Spring', 'LK': 'Lake', 'ALY': 'Alley', 'BND': 'Bend', 'BRG': 'Bridge',
+    'BYU': 'Bayou', 'CLF': 'Cliff', 'COR': 'Corner', 'CV': 'Cove', 'CRK': 'Creek',
+    'XING': 'Crossing', 'GDN': 'Garden', 'GLN': 'Glen', 'GRN': 'Green',
+    'HBR': 'Harbor', 'HOLW': 'Hollow', 'IS': 'Island', 'JCT': 'Junction',
+    'KNL': 'Knoll', 'MDWS': 'Meadows', 'MTN': 'Mountain', 'PASS': 'Pass',
+    'PT': 'Point', 'RNCH': 'Ranch', 'SHRS': 'Shores', 'STA': 'Station',
+    'VLY': 'Valley', 'VW': 'View', 'WLK': 'Walk',
+    'ANX': 'Annex', 'ARC': 'Arcade', 'AV': 'Avenue', 'BCH': 'Beach',
+    'BG': 'Burg', 'BGS': 'Burgs', 'BLF': 'Bluff', 'BLFS': 'Bluffs',
+    'BOT': 'Bottom', 'BR': 'Branch', 'BRK': 'Brook', 'BRKS': 'Brooks',
+    'BTW': 'Between', 'CMN': 'Common', 'CMP': 'Camp', 'CNYN': 'Canyon',
+    'CPE': 'Cape', 'CSWY': 'Causeway', 'CLB': 'Club', 'CON': 'Corner',
+    'CORS': 'Corners', 'CP': 'Camp', 'CRES': 'Crescent', 'CRST': 'Crest',
+    'XRD': 'Crossroad', 'EXT': 'Extension', 'FALLS': 'Falls', 'FRK': 'Fork',
+    'FRKS': 'Forks', 'FT': 'Fort', 'FWY': 'Freeway', 'GDNS': 'Gardens',
+    'GTWAY': 'Gateway', 'HGHTS': 'Heights', 'HVN': 'Haven', 'HD': 'Head',
+    'HLLS': 'Hills', 'INLT': 'Inlet', 'JCTS': 'Junctions', 'KY': 'Key',
+    'KYS': 'Keys', 'LNDG': 'Landing', 'LGT': 'Light', 'LGTS': 'Lights',
+    'LF': 'Loaf', 'MNR': 'Manor', 'MLS': 'Mills', 'MSSN': 'Mission',
+    'MT': 'Mount', 'NCK': 'Neck', 'ORCH': 'Orchard', 'OVAL': 'Oval',
+    'PRK': 'Park', 'PKWYS': 'Parkways', 'PLN': 'Plain', 'PLZ': 'Plaza',
+    'PRT': 'Port', 'PR': 'Prairie', 'RAD': 'Radial', 'RDG': 'Ridge',
+    'RIV': 'River', 'RDGE': 'Ridge', 'RUN': 'Run', 'SHL': 'Shoal',
+    'SHLS': 'Shoals', 'SKWY': 'Skyway', 'SPGS': 'Springs', 'SPUR': 'Spur',
+    'STRM': 'Stream', 'STM': 'Stream', 'TRFY': 'Terrace', 'TRWY': 'Throughway',
+    'TPKE': 'Turnpike', 'UN': 'Union', 'VLG': 'Village', 'VIS': 'Vista',
+    'WAY': 'Way', 'EXPY': 'Expressway', 'FRWY': 'Freeway', 'TUNL': 'Tunnel',
+    'PLNS': 'Plains'
+}
+
+unit_abbr = {
+    'APT': 'Apartment', 'STE': 'Suite', 'BLDG': 'Building',
+    'UNIT': 'Unit', 'RM': 'Room', 'FL': 'Floor', 'DEP': 'Department',
+    'OFC': 'Office', 'SP': 'Space', 'LOT': 'Lot', 'TRLR': 'Trailer',
+    'HANGAR': 'Hangar', 'SLIP': 'Slip', 'PIER': 'Pier', 'DOCK': 'Dock'
+}
+
+
+# Helper function to expand a single word
+def expand_word(word):
+    cleaned_word = word.rstrip(string.punctuation)
+    upper_cleaned = cleaned_word.upper()
+    return directional_abbr.get(upper_cleaned,
+                                street_type_abbr.get(upper_cleaned,
+                                                    unit_abbr.get(upper_cleaned, word)))
+
+
+# Updated clean_address function
+# Lead files repeat the same addresses heavily, so parsed results are memoized
+@functools.lru_cache(maxsize=200000)
+def clean_address(address):
+    """Parse and expand abbreviations in an address with a robust fallback."""
+    if pd.isna(address) or address == "":
+        return ""
+    
+    try:
+        parsed, address_type = usaddress.tag(address)
+        if address_type == 'Street Address':
+            cleaned_components = []
+            for key, value in parsed.items():
+                words = value.split()
+                expanded_words = [expand_word(word) for word in words]
+                expanded_value = " ".join(expanded_words)
+                cleaned_components.append(expanded_value)
+            return ' '.join(cleaned_components)
+        elif address_type == 'PO Box':
+            return 'PO Box ' + parsed['USPSBoxID']
+        else:
+            words = address.split()
+            cleaned = [expand_word(word) for word in words]
+            return ' '.join(cleaned)
+    except usaddress.RepeatedLabelError:
+        words = address.split()
+        cleaned = [expand_word(word) for word in words]
+        return ' '.join(cleaned)
+    except Exception as e:
+        logger.error(f"Error cleaning address '{address}': {str(e)}")
+        return address  # Return original if any error occurs
+
+
+# Validate phone number function
+def validate_phone(phone):
+    """Validate and format phone numbers"""
+    if pd.isna(phone) or phone == "":
+        return ""
+    
+    # Remove all non-digit characters
+    digits = re.sub(r'\D', '', str(phone))
+    
+    # Check if we have a valid number of digits
+    if len(digits) == 10:
+        return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+
+    elif len(digits) == 11 and digits[0] == '1':
+        return f"({digits[1:4]}) {digits[4:7]}-{digits[7:]}"
+
+    elif len(digits) > 0:  # Return any non-empty digits in a basic format
+        return digits
+    else:
+        return ""  # Return empty string if no digits
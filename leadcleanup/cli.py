@@ -0,0 +1,197 @@
+"""
+Command-line entry point for running processing options without Streamlit.
+
+    python -m leadcleanup run --option "ZIP Split: Address+HoNW" --in "exports/*.csv" --out out/
+    python -m leadcleanup run --option "Sha256" --identifiers EMAIL PHONE --hash-types SHA256 MD5 --in leads.csv --out out/
+    python -m leadcleanup options
+    python -m leadcleanup serve --port 8600
+"""
+import os
+import sys
+import glob
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from leadcleanup.fileio import read_input, write_frames
+from leadcleanup.hashing import HASH_TYPES, IDENTIFIER_TYPES
+from leadcleanup.options import DUPLICATE_METHODS, HEADLESS_OPTIONS, combine_frames, parse_zip_codes, run_option
+
+logger = logging.getLogger(__name__)
+
+
+def expand_inputs(patterns):
+    """Expand glob patterns into a sorted, de-duplicated list of files"""
+    paths = []
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        paths.extend(matches if matches else [pattern])
+    return sorted(dict.fromkeys(paths))
+
+
+def process_file(path, out_dir, option, settings):
+    """Read, process and write one input file; returns a one-line summary"""
+    start = time.time()
+    df, detected_format = read_input(path)
+    frames = run_option(df, option, **settings['option'])
+    # Every input gets its own folder so outputs of different files never collide
+    name, ext = os.path.splitext(os.path.basename(path))
+    if ext.lower() in (".gz", ".zst"):
+        name = os.path.splitext(name)[0]
+    target = os.path.join(out_dir, name)
+    written = write_frames(frames, target, settings['format'])
+    rows = sum(len(frame) for _, frame in frames)
+    return (f"{path}: {detected_format} format, {len(df):,} rows in -> {rows:,} rows in "
+            f"{len(written):,} files under {target} ({time.time() - start:.1f}s)")
+
+
+def combine_files(paths, out_dir, option, settings):
+    """Stack all inputs into one frame, process it once and write it under out_dir/combined"""
+    start = time.time()
+    frames = [read_input(path)[0] for path in paths]
+    df = combine_frames(frames)
+    outputs = run_option(df, option, **settings['option'])
+    target = os.path.join(out_dir, "combined")
+    written = write_frames(outputs, target, settings['format'])
+    return (f"{len(paths):,} files, {len(df):,} rows in -> {len(written):,} files under {target} "
+            f"({time.time() - start:.1f}s)")
+
+
+def option_settings(args):
+    """Keyword arguments for run_option from the parsed command line"""
+    history_terms = {
+        'COMPANY_NAME_HISTORY': args.worked_at,
+        'JOB_TITLE_HISTORY': args.job_title,
+        'EDUCATION_HISTORY': args.education,
+    }
+    return {
+        'clean_addresses': not args.no_clean_addresses,
+        'format_phones': not args.no_format_phones,
+        'batch_size': args.batch_size,
+        'zip_codes': parse_zip_codes(args.zip_codes) if args.zip_codes else None,
+        'min_group_size': args.min_group_size,
+        'data_template': args.template,
+        'identifiers': tuple(args.identifiers),
+        'hash_types': tuple(args.hash_types),
+        'upload_batch_size': args.upload_batch_size,
+        'industries': args.industries,
+        'history_terms': {column: term for column, term in history_terms.items() if term},
+        'cluster_companies': args.cluster_companies,
+        'duplicate_method': args.duplicate_method,
+        'duplicate_columns': args.duplicate_columns,
+        'fuzzy_threshold': args.fuzzy_threshold,
+        'least_frequent_first': args.least_frequent_first,
+    }
+
+
+def _run(args):
+    if args.option not in HEADLESS_OPTIONS:
+        print(f"Unknown option '{args.option}'. Available options:", file=sys.stderr)
+        for option in HEADLESS_OPTIONS:
+            print(f"  {option}", file=sys.stderr)
+        return 2
+
+    paths = expand_inputs(args.inputs)
+    missing = [path for path in paths if not os.path.isfile(path)]
+    if missing:
+        print(f"Input not found: {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    # Several files run one per process; a single file spreads its rows over the workers
+    file_workers = min(args.workers, len(paths))
+    settings = {'format': args.format, 'option': option_settings(args)}
+    settings['option']['workers'] = args.workers if file_workers <= 1 else 1
+    os.makedirs(args.out, exist_ok=True)
+
+    if args.option == "File Combiner and Batcher":
+        # The inputs are one dataset here, so they are stacked and written once
+        settings['option']['workers'] = args.workers
+        try:
+            print(combine_files(paths, args.out, args.option, settings))
+        except Exception as e:
+            logger.error(f"Failed to combine {len(paths):,} files: {e}")
+            return 1
+        return 0
+
+    failures = 0
+    if file_workers <= 1:
+        for path in paths:
+            try:
+                print(process_file(path, args.out, args.option, settings))
+            except Exception as e:
+                failures += 1
+                logger.error(f"Failed to process {path}: {e}")
+    else:
+        with ProcessPoolExecutor(max_workers=file_workers) as pool:
+            futures = {path: pool.submit(process_file, path, args.out, args.option, settings) for path in paths}
+            for path, future in futures.items():
+                try:
+                    print(future.result())
+                except Exception as e:
+                    failures += 1
+                    logger.error(f"Failed to process {path}: {e}")
+
+    return 1 if failures else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="leadcleanup", description="Lead Cleanup Suite without the web UI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("options", help="List the options that can run from the command line")
+
+    run = commands.add_parser("run", help="Process one or more lead files")
+    run.add_argument("--option", required=True, help="Processing option, e.g. \"ZIP Split: Address+HoNW\"")
+    run.add_argument("--in", dest="inputs", nargs="+", required=True,
+                     help="Input CSV (plain, .gz or .zst), NDJSON or Parquet files or glob patterns (quote patterns to let leadcleanup expand them)")
+    run.add_argument("--out", required=True, help="Output directory; each input gets a sub-folder")
+    run.add_argument("--format", choices=("csv", "excel", "json", "parquet", "csv.gz", "csv.zst", "ndjson"), default="csv", help="Output file format")
+    run.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1)")
+    run.add_argument("--batch-size", type=int, default=2000, help="Maximum rows per output file where the option batches")
+    run.add_argument("--zip-codes", help="ZIP codes for Filter by Zip Codes and the ZIP Split filter")
+    run.add_argument("--min-group-size", type=int, default=25, help="Roll-up threshold for the hierarchical split")
+    run.add_argument("--template", help="Override the DATA column template")
+    run.add_argument("--no-clean-addresses", action="store_true", help="Skip address standardization")
+    run.add_argument("--no-format-phones", action="store_true", help="Keep phone numbers as they are")
+    run.add_argument("--identifiers", nargs="+", choices=IDENTIFIER_TYPES, default=["EMAIL"],
+                     help="Identifiers to hash for Sha256")
+    run.add_argument("--hash-types", nargs="+", choices=tuple(HASH_TYPES), default=["SHA256"],
+                     help="Hash types for Sha256")
+    run.add_argument("--upload-batch-size", type=int, default=100000, help="Maximum rows per Sha256 output file")
+    run.add_argument("--industries", nargs="+", help="COMPANY_INDUSTRY values kept by Company Industry")
+    run.add_argument("--worked-at", help="Company Industry: keep rows whose company history contains this text")
+    run.add_argument("--job-title", help="Company Industry: keep rows whose job title history contains this text")
+    run.add_argument("--education", help="Company Industry: keep rows whose education history names this school")
+    run.add_argument("--cluster-companies", action="store_true",
+                     help="Add COMPANY_CLUSTER_ID for Company Industry and B2B Job Titles Focus")
+    run.add_argument("--duplicate-method", choices=tuple(DUPLICATE_METHODS), default="exact",
+                     help="Duplicate Analysis: whole rows, --duplicate-columns only, or fuzzy person matching")
+    run.add_argument("--duplicate-columns", nargs="+", help="Columns compared by --duplicate-method columns")
+    run.add_argument("--fuzzy-threshold", type=float, default=0.88, help="Similarity for --duplicate-method fuzzy")
+    run.add_argument("--least-frequent-first", action="store_true", help="Sort Duplicate Analysis ascending")
+
+    serve = commands.add_parser("serve", help="Run the local HTTP API")
+    serve.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: localhost only)")
+    serve.add_argument("--port", type=int, default=8600)
+    serve.add_argument("--data-dir", help="Where uploads and result archives are kept (default: a temporary directory)")
+    serve.add_argument("--workers", type=int, default=2, help="Jobs processed at the same time")
+    serve.add_argument("--max-queue", type=int, default=16, help="Jobs allowed to wait or run before uploads are refused")
+    return parser
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = build_parser().parse_args(argv)
+
+    if args.command == "options":
+        for option in HEADLESS_OPTIONS:
+            print(option)
+        return 0
+    if args.command == "serve":
+        # Imported here so the batch commands do not need the web stack
+        from leadcleanup.api import serve
+        logging.getLogger().setLevel(logging.INFO)
+        serve(args.host, args.port, args.data_dir, args.workers, args.max_queue)
+        return 0
+    return _run(args)
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+
+def _as_text(series):
+    """Values as a fresh object array of str(x), plus the mask of missing values"""
+    missing = series.isna().to_numpy()
+    if pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'):
+        # Already text; skip the per-value str() conversion. Missing values come back
+        # as None rather than pd.NA, which cannot be compared, for string[pyarrow] columns
+        return series.to_numpy(dtype=object, na_value=None, copy=True), missing
+    return series.astype(str).to_numpy(dtype=object), missing
+
+
+def fill_missing(series, value):
+    """series.fillna(value), also for categoricals whose categories do not include value"""
+    if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+        series = series.cat.add_categories([value])
+    return series.fillna(value)
+
+
+def join_columns(df, columns, sep=', ', na_rep=None):
+    """
+    Join columns into one string per row without a row-wise apply.
+
+    By default missing and empty values are skipped along with their
+    separator, matching
+        df[columns].apply(lambda row: sep.join([str(x) for x in row if pd.notna(x) and x != '']), axis=1)
+
+    With na_rep every value is kept and missing ones are written as na_rep,
+    matching
+        df[columns].apply(lambda row: sep.join([str(x) if pd.notna(x) else na_rep for x in row]), axis=1)
+    """
+    result = np.full(len(df), '', dtype=object)
+    has_previous = np.zeros(len(df), dtype=bool)
+
+    for position, column in enumerate(columns):
+        values, missing = _as_text(df[column])
+        if na_rep is not None:
+            values[missing] = na_rep
+            result = values if position == 0 else result + sep + values
+            continue
+
+        # Skipped values contribute neither text nor a separator
+        present = ~missing & (values != '')
+        values[~present] = ''
+        if has_previous.any():
+            result = result + np.where(present & has_previous, sep, '').astype(object) + values
+        else:
+            result = values
+        has_previous |= present
+
+    return pd.Series(result, index=df.index, dtype=object)
+
+
+def prefix_where(series, condition, prefix):
+    """
+    Return prefix + str(value) where condition holds and '' elsewhere.
+
+    Replaces row-wise suffix builders such as
+        df.apply(lambda row: ' | Phone ' + str(row['MOBILE_PHONE']) if row['DNC'] != 'Y' else '', axis=1)
+    """
+    condition = np.asarray(condition, dtype=bool)
+    return pd.Series(np.where(condition, prefix + series.astype(str), ''), index=series.index, dtype=object)
+
+
+def explode_list(series, sep=','):
+    """
+    Split sep-separated cells into one item per row, trimmed, dropping empty ones.
+
+    Returns (row positions, items). With pyarrow the split runs in Arrow
+    compute kernels and items come back as string[pyarrow], so later .str
+    calls on them stay in Arrow as well. Replaces row-wise splitters such as
+        series.apply(lambda x: str(x).split(',')[0].strip())
+    """
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        # E.g. phone numbers parsed as numbers; '19186914634.0' rather than Arrow's '1.9186914634e+10'
+        values, missing = _as_text(series)
+        values[missing] = None
+        series = pd.Series(values)
+    if pa is not None:
+        values = pa.array(series, from_pandas=True)
+        if pa.types.is_dictionary(values.type):
+            values = values.dictionary_decode()
+        lists = pc.split_pattern(values.cast(pa.large_string()), sep)
+        rows = pc.list_parent_indices(lists)
+        items = pc.utf8_trim_whitespace(pc.list_flatten(lists))
+        keep = pc.fill_null(pc.not_equal(items, ''), False)
+        return (pc.filter(rows, keep).to_numpy().astype(np.int64),
+                pd.Series(pd.arrays.ArrowStringArray(pc.filter(items, keep))))
+
+    # Positional index, so the row survives the explode whatever the series' index is
+    values = pd.Series(series.to_numpy(dtype=object, na_value=None))
+    items = values.str.split(sep).explode().str.strip()
+    items = items[items.notna() & (items != '')]
+    return items.index.to_numpy(dtype=np.int64), items.reset_index(drop=True).astype(object)
+
+
+def explode_columns(df, columns, value_column, normalize=None):
+    """
+    Long (ROW, SOURCE, value_column) frame of the list items in columns.
+
+    ROW is the position in df and SOURCE the column an item came from.
+    normalize maps the items Series to normalized values, missing where an
+    item is invalid (those are dropped). Each (ROW, value) pair is kept once,
+    from the first of `columns` that has it, and rows are ordered by ROW with
+    items of one row in column and then list order.
+    """
+    parts = []
+    for column in columns:
+        if column in df.columns:
+            rows, items = explode_list(df[column])
+            if normalize is not None:
+                items = normalize(items)
+            valid = items.notna().to_numpy()
+            parts.append(pd.DataFrame({'ROW': rows[valid], 'SOURCE': column,
+                                       value_column: items[valid].reset_index(drop=True)}))
+    if not parts:
+        return pd.DataFrame({'ROW': pd.Series(dtype=np.int64), 'SOURCE': pd.Series(dtype=object),
+                             value_column: pd.Series(dtype=object)})
+    long = pd.concat(parts, ignore_index=True)
+    # Dedupe on integer (row, value code) pairs; much cheaper than comparing the strings per row
+    codes, uniques = pd.factorize(long[value_column])
+    duplicate = pd.Series(long['ROW'].to_numpy() * max(len(uniques), 1) + codes).duplicated().to_numpy()
+    return long[~duplicate].sort_values('ROW', kind='stable').reset_index(drop=True)
+
+
+def nth_item(long, value_column, n_rows, position=0, fill=None):
+    """
+    The position-th item of each row of a long frame from explode_columns,
+    as an object array of n_rows values with fill where a row has fewer items.
+    """
+    result = np.full(n_rows, fill, dtype=object)
+    if len(long):
+        rows = long['ROW'].to_numpy()
+        # Rows are contiguous in long, so an item's place in its row is its offset from the row's first item
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        offsets = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+        selected = offsets == position
+        result[rows[selected]] = long[value_column].to_numpy(dtype=object)[selected]
+    return result
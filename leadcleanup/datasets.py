@@ -0,0 +1,161 @@
+import os
+import json
+import uuid
+import hashlib
+import logging
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(*blobs):
+    """SHA-256 of one or more uploaded files' bytes, in order"""
+    digest = hashlib.sha256()
+    for blob in blobs:
+        # Length prefix so ("ab", "c") and ("a", "bc") hash differently
+        digest.update(len(blob).to_bytes(8, 'big'))
+        digest.update(blob)
+    return digest.hexdigest()
+
+
+class Dataset:
+    """
+    A loaded frame and a stable id for it.
+
+    The id is the content hash of the uploaded bytes (computed once, at
+    upload), so caches can key on the id instead of hashing or pickling the
+    frame on every call. The frame is shared, not copied;
+    treat it as read-only.
+    """
+
+    def __init__(self, id, df):
+        self.id = id
+        self.df = df
+
+    def __len__(self):
+        return len(self.df)
+
+    def __repr__(self):
+        return f"Dataset({self.id[:12]}, {len(self.df):,} rows)"
+
+
+def dataset_id(dataset):
+    """Cache hash function for Dataset arguments"""
+    return dataset.id
+
+
+def _arrow_dtype(arrow_type):
+    """to_pandas types_mapper: text becomes string[pyarrow], everything else converts as usual"""
+    if pa.types.is_large_string(arrow_type) or pa.types.is_string(arrow_type):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def _to_arrow(df):
+    """Table for df with text (and all-missing) columns as large_string, the layout string[pyarrow] uses"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    fields = [field.with_type(pa.large_string())
+              if pa.types.is_string(field.type) or pa.types.is_null(field.type) else field
+              for field in table.schema]
+    return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+
+
+class DatasetStore:
+    """
+    Parsed, normalized uploads on local disk, keyed by the upload's content hash.
+
+    Each dataset is an uncompressed Arrow IPC (Feather v2) file plus a small
+    JSON file of metadata (the detected format and format info), so the same
+    bytes are parsed and normalized once however often the user switches
+    options or reloads the page. Loading memory-maps the file: text columns
+    come back as string[pyarrow] backed by the mapped pages, so they cost
+    page cache shared by every session rather than a Python object per cell,
+    and only the requested columns are touched. Once the files pass max_bytes
+    in total, the least recently used datasets are deleted.
+    """
+
+    def __init__(self, root, max_bytes=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def _paths(self, dataset_id):
+        base = os.path.join(self.root, dataset_id)
+        return base + ".arrow", base + ".json"
+
+    def __contains__(self, dataset_id):
+        return all(os.path.exists(path) for path in self._paths(dataset_id))
+
+    def save(self, dataset_id, df, meta=None):
+        """Write df and its metadata; returns False if the frame cannot be stored"""
+        data_path, meta_path = self._paths(dataset_id)
+        # Write to temporary names and rename, so a concurrent load never sees half a file
+        tmp = f".{uuid.uuid4().hex}.tmp"
+        try:
+            if pa is None:
+                raise ImportError("pyarrow is not installed")
+            feather.write_feather(_to_arrow(df), data_path + tmp, compression='uncompressed')
+            with open(meta_path + tmp, 'w') as f:
+                json.dump(meta or {}, f, default=str)
+            os.replace(data_path + tmp, data_path)
+            os.replace(meta_path + tmp, meta_path)
+        except Exception as e:
+            # No pyarrow, or a column mixing types Arrow cannot hold; callers keep the frame in memory only
+            logger.warning(f"Could not store dataset {dataset_id[:12]}: {e}")
+            for path in (data_path + tmp, meta_path + tmp):
+                if os.path.exists(path):
+                    os.remove(path)
+            return False
+        self._prune(keep=dataset_id)
+        return True
+
+    def load(self, dataset_id, columns=None):
+        """
+        Return (df, meta) for a stored dataset, or None. With columns, only
+        those (of the ones present) are read.
+        """
+        data_path, meta_path = self._paths(dataset_id)
+        if pa is None:
+            return None
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if columns is not None:
+                present = set(feather.read_table(data_path, memory_map=True).column_names)
+                columns = [column for column in columns if column in present]
+            table = feather.read_table(data_path, columns=columns, memory_map=True)
+        except (OSError, ValueError) as e:
+            if dataset_id in self:
+                logger.warning(f"Could not load dataset {dataset_id[:12]}: {e}")
+            return None
+        os.utime(data_path)
+        return table.to_pandas(types_mapper=_arrow_dtype), meta
+
+    def discard(self, dataset_id):
+        for path in self._paths(dataset_id):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _prune(self, keep=None):
+        if not self.max_bytes:
+            return
+        entries = []
+        for name in os.listdir(self.root):
+            if name.endswith(".arrow"):
+                path = os.path.join(self.root, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, name[:-len(".arrow")]))
+        total = sum(size for _, size, _ in entries)
+        for _, size, dataset_id in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if dataset_id != keep:
+                self.discard(dataset_id)
+                total -= size
@@ -0,0 +1,339 @@
+import re
+import logging
+import numpy as np
+import pandas as pd
+
+from leadcleanup.columns import fill_missing
+
+try:
+    from rapidfuzz import fuzz  # Fast C implementation of string similarity
+except ImportError:
+    fuzz = None
+    from difflib import SequenceMatcher
+
+logger = logging.getLogger(__name__)
+
+# Soundex digit for each consonant; vowels, H, W and Y have no code
+SOUNDEX_CODES = {}
+for _letters, _digit in (('BFPV', '1'), ('CGJKQSXZ', '2'), ('DT', '3'),
+                         ('L', '4'), ('MN', '5'), ('R', '6')):
+    for _letter in _letters:
+        SOUNDEX_CODES[_letter] = _digit
+
+_NON_ALNUM = re.compile(r'[^A-Z0-9]+')
+
+
+def soundex(name):
+    """Return the American Soundex code for a name, or '' if it has no letters"""
+    letters = [c for c in str(name).upper() if 'A' <= c <= 'Z']
+    if not letters:
+        return ''
+
+    code = letters[0]
+    previous = SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # H and W do not separate letters with the same code, vowels do
+        if letter not in 'HW':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def similarity(a, b, cutoff=0.0):
+    """Similarity ratio between two strings in the range 0.0 - 1.0"""
+    if a == b:
+        return 1.0
+    # The ratio can never exceed 2 * shorter / total length, so skip hopeless pairs
+    total = len(a) + len(b)
+    if total == 0 or 2.0 * min(len(a), len(b)) / total < cutoff:
+        return 0.0
+    if fuzz is not None:
+        return fuzz.ratio(a, b) / 100.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+class UnionFind:
+    """Disjoint set over row positions; the root of a set is its earliest row"""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]  # Path halving
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        if root_a < root_b:
+            self.parent[root_b] = root_a
+        else:
+            self.parent[root_a] = root_b
+        return True
+
+    def labels(self):
+        """Return the root of every position as a numpy array"""
+        return np.fromiter((self.find(i) for i in range(len(self.parent))),
+                           dtype=np.int64, count=len(self.parent))
+
+
+def normalize_zip5(series):
+    """Normalize ZIP values (strings, ints or floats like 33014.0) to 5-digit strings"""
+    digits = series.astype(str).str.extract(r'(\d+)', expand=False)
+    zip5 = digits.str[:5].str.zfill(5)
+    return zip5.where(series.notna() & digits.notna(), '')
+
+
+def normalize_text(series):
+    """Uppercase text and collapse punctuation and whitespace runs to single spaces"""
+    uniques = series.dropna().astype(str).unique()
+    mapping = {value: _NON_ALNUM.sub(' ', value.upper()).strip() for value in uniques}
+    return fill_missing(series.map(mapping), '')
+
+
+def fuzzy_duplicate_clusters(df, threshold=0.88, address_normalizer=None,
+                             max_block_size=200, window=20,
+                             first_col='FIRST_NAME', last_col='LAST_NAME',
+                             address_col='PERSONAL_ADDRESS', zip_col='PERSONAL_ZIP'):
+    """
+    Cluster records that refer to the same person.
+
+    Candidates are blocked by ZIP5 plus the Soundex code of the last name, so
+    string similarity is only computed inside blocks. Blocks larger than
+    max_block_size fall back to a sorted-neighbourhood scan of the given window,
+    which keeps the number of comparisons close to linear in the row count.
+    Matches are merged with union-find.
+
+    Returns (cluster_ids, stats) where cluster_ids is a Series aligned to df
+    holding the position of the earliest row of each cluster.
+    """
+    n = len(df)
+    stats = {'blocks': 0, 'comparisons': 0, 'matches': 0}
+    if n == 0:
+        return pd.Series([], index=df.index, dtype=np.int64), stats
+
+    # Phonetic codes and normalized strings are computed once per unique value
+    last_names = df[last_col].fillna('').astype(str)
+    unique_last = last_names.unique()
+    phonetic = last_names.map({name: soundex(name) for name in unique_last})
+    zip5 = normalize_zip5(df[zip_col])
+
+    first_names = normalize_text(df[first_col]) if first_col in df.columns else pd.Series('', index=df.index)
+    names = (first_names + ' ' + normalize_text(df[last_col])).str.strip().to_numpy()
+
+    if address_col in df.columns:
+        addresses = df[address_col]
+        if address_normalizer is not None:
+            unique_addresses = addresses.dropna().unique()
+            addresses = addresses.map({a: address_normalizer(a) for a in unique_addresses})
+        addresses = normalize_text(addresses).to_numpy()
+    else:
+        addresses = np.full(n, '', dtype=object)
+
+    # Rows without a ZIP or a last name cannot be blocked and stay singletons
+    blockable = (zip5 != '') & (phonetic != '')
+    block_keys = (zip5 + '|' + phonetic)[blockable]
+    positions = np.flatnonzero(blockable.to_numpy())
+    block_index = pd.Series(positions).groupby(block_keys.to_numpy()).indices
+
+    union_find = UnionFind(n)
+
+    def is_match(i, j):
+        stats['comparisons'] += 1
+        if similarity(names[i], names[j], threshold) < threshold:
+            return False
+        if not addresses[i] and not addresses[j]:
+            return True
+        return similarity(addresses[i], addresses[j], threshold) >= threshold
+
+    for members in block_index.values():
+        if len(members) < 2:
+            continue
+        stats['blocks'] += 1
+        rows = positions[members]
+
+        if len(rows) <= max_block_size:
+            pairs = ((rows[a], rows[b]) for a in range(len(rows)) for b in range(a + 1, len(rows)))
+        else:
+            # Sorted neighbourhood: only compare rows that sort close to each other
+            keys = [names[r] + ' ' + addresses[r] for r in rows]
+            ordered = rows[np.argsort(keys, kind='stable')]
+            pairs = ((ordered[a], ordered[b]) for a in range(len(ordered))
+                     for b in range(a + 1, min(a + window, len(ordered))))
+
+        for i, j in pairs:
+            if union_find.find(i) == union_find.find(j):
+                continue
+            if is_match(i, j):
+                union_find.union(i, j)
+                stats['matches'] += 1
+
+    logger.info(f"Fuzzy dedup: {stats['comparisons']:,} comparisons across {stats['blocks']:,} blocks, "
+                f"{stats['matches']:,} matches")
+
+    return pd.Series(union_find.labels(), index=df.index), stats
+
+
+# Fixed seeds keep MinHash signatures, and therefore cluster IDs, stable between runs
+MINHASH_PRIME = (1 << 31) - 1
+_LEGAL_SUFFIXES = re.compile(r'\b(INC|INCORPORATED|LLC|LLP|LTD|LIMITED|CORP|CORPORATION|CO|COMPANY|PLLC|PC|GROUP)\b')
+_DOMAIN_PREFIX = re.compile(r'^(https?://)?(www\.)?')
+
+
+def normalize_domain(series):
+    """Lowercase domains and strip the scheme, www. prefix and any path"""
+    domains = series.fillna('').astype(str).str.strip().str.lower()
+    return domains.str.replace(_DOMAIN_PREFIX, '', regex=True).str.split('/').str[0]
+
+
+def company_shingles(name, domain, address, k=3):
+    """Character k-grams of the company name plus domain and address tokens"""
+    shingles = set()
+    compact = name.replace(' ', '')
+    if compact:
+        if len(compact) <= k:
+            shingles.add('N:' + compact)
+        for i in range(len(compact) - k + 1):
+            shingles.add('N:' + compact[i:i + k])
+    if domain:
+        shingles.add('D:' + domain)
+    for token in address.split():
+        shingles.add('A:' + token)
+    return shingles
+
+
+def minhash_signatures(shingle_sets, num_perm=64, seed=1, chunk_size=200000):
+    """
+    Compute MinHash signatures for a list of non-empty shingle sets.
+
+    Shingles are hashed with crc32 so results do not depend on Python's
+    per-process hash randomization. Sets are processed in chunks of about
+    chunk_size shingles, which bounds the (shingles, num_perm) uint64 work
+    matrix however long the individual sets are. Returns a
+    (len(shingle_sets), num_perm) uint32 array.
+    """
+    import zlib
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+
+    signatures = np.empty((len(shingle_sets), num_perm), dtype=np.uint32)
+    lengths = np.fromiter((len(shingles) for shingles in shingle_sets), dtype=np.int64, count=len(shingle_sets))
+    ends = np.cumsum(lengths)
+    start = 0
+    while start < len(shingle_sets):
+        # Take sets until the chunk holds chunk_size shingles (always at least one set)
+        done = ends[start - 1] if start else 0
+        stop = max(int(np.searchsorted(ends, done + max(chunk_size, 1), side='right')), start + 1)
+        chunk = shingle_sets[start:stop]
+
+        # Flatten the chunk so the permutations run as one vectorized pass
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for shingles in chunk for s in shingles),
+                             dtype=np.uint64)
+        chunk_lengths = lengths[start:stop]
+        offsets = np.concatenate(([0], np.cumsum(chunk_lengths)[:-1]))
+
+        permuted = (hashes[:, None] * a[None, :] + b[None, :]) % MINHASH_PRIME
+        signatures[start:start + len(chunk)] = np.minimum.reduceat(permuted, offsets, axis=0)
+        start += len(chunk)
+
+    return signatures
+
+
+def company_cluster_ids(df, threshold=0.7, num_perm=64, bands=16, max_bucket_pairs=50,
+                        name_col='COMPANY_NAME', domain_col='COMPANY_DOMAIN',
+                        address_col='COMPANY_ADDRESS'):
+    """
+    Assign a COMPANY_CLUSTER_ID to near-duplicate company records.
+
+    Each distinct name + domain + address combination is shingled and reduced
+    to a MinHash signature. LSH banding buckets signatures that agree on a
+    whole band, so candidate pairs are found without comparing every company
+    against every other. Candidates whose estimated Jaccard similarity reaches
+    the threshold are merged with union-find.
+
+    The ID is derived from the smallest normalized key in each cluster, so the
+    same set of company variants gets the same ID across files and runs.
+    Rows with no company data get ''. Returns (cluster_ids, stats).
+    """
+    import hashlib
+
+    stats = {'companies': 0, 'candidates': 0, 'matches': 0, 'clusters': 0}
+    if len(df) == 0:
+        return pd.Series([], index=df.index, dtype=object), stats
+
+    empty = pd.Series('', index=df.index)
+    names = normalize_text(df[name_col]) if name_col in df.columns else empty
+    names = names.str.replace(_LEGAL_SUFFIXES, '', regex=True).str.split().str.join(' ').fillna('')
+    domains = normalize_domain(df[domain_col]) if domain_col in df.columns else empty
+    addresses = normalize_text(df[address_col]) if address_col in df.columns else empty
+
+    # Work on distinct companies only; identical variants share a signature.
+    # Keys stay (name, domain, address) tuples, since the parts may contain any character
+    codes, unique_keys = pd.MultiIndex.from_arrays([names, domains, addresses]).factorize()
+    unique_keys = list(unique_keys)
+    has_data = np.array([any(key) for key in unique_keys], dtype=bool)
+    company_keys = [key for key in unique_keys if any(key)]
+    stats['companies'] = len(company_keys)
+
+    cluster_labels = np.full(len(unique_keys), '', dtype=object)
+    if len(company_keys) == 0:
+        return pd.Series(cluster_labels[codes], index=df.index), stats
+
+    shingle_sets = [company_shingles(*key) for key in company_keys]
+    signatures = minhash_signatures(shingle_sets, num_perm=num_perm)
+
+    rows_per_band = num_perm // bands
+    union_find = UnionFind(len(company_keys))
+    band_rng = np.random.default_rng(2)
+    for band in range(bands):
+        band_values = signatures[:, band * rows_per_band:(band + 1) * rows_per_band].astype(np.uint64)
+        # Collapse the band to one 64-bit bucket key (wrapping arithmetic is intended)
+        multipliers = band_rng.integers(1, 1 << 62, size=rows_per_band, dtype=np.uint64)
+        bucket_keys = (band_values * multipliers).sum(axis=1)
+
+        # Sort the keys once and walk only the buckets holding two or more companies
+        order = np.argsort(bucket_keys, kind='stable')
+        boundaries = np.flatnonzero(np.diff(bucket_keys[order])) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(order)]))
+        for bucket in np.flatnonzero(ends - starts > 1):
+            members = order[starts[bucket]:ends[bucket]]
+            if len(members) <= max_bucket_pairs:
+                pairs = ((members[x], members[y]) for x in range(len(members)) for y in range(x + 1, len(members)))
+            else:
+                # Very large buckets are chained through their first member
+                pairs = ((members[0], other) for other in members[1:])
+            for i, j in pairs:
+                if union_find.find(i) == union_find.find(j):
+                    continue
+                stats['candidates'] += 1
+                if np.mean(signatures[i] == signatures[j]) >= threshold:
+                    union_find.union(i, j)
+                    stats['matches'] += 1
+
+    # Name each cluster after a hash of its smallest member key (joined as before, so IDs stay stable)
+    roots = union_find.labels()
+    joined_keys = np.array(['|'.join(key) for key in company_keys], dtype=object)
+    by_key = np.argsort(joined_keys)
+    cluster_roots, first_in_cluster = np.unique(roots[by_key], return_index=True)
+    root_ids = {
+        root: 'CO' + hashlib.sha1(joined_keys[by_key[pos]].encode('utf-8')).hexdigest()[:10].upper()
+        for root, pos in zip(cluster_roots, first_in_cluster)
+    }
+    stats['clusters'] = len(root_ids)
+    cluster_labels[has_data] = [root_ids[root] for root in roots]
+
+    logger.info(f"Company clustering: {stats['companies']:,} distinct companies, "
+                f"{stats['candidates']:,} LSH candidates, {stats['clusters']:,} clusters")
+
+    return pd.Series(cluster_labels[codes], index=df.index), stats
@@ -0,0 +1,135 @@
+from leadcleanup.columns import fill_missing
+
+# Phone columns and the DNC column each one is checked against
+PHONE_DNC_MAPPING = {
+    'MOBILE_PHONE': 'MOBILE_PHONE_DNC',
+    'DIRECT_NUMBER': 'DIRECT_DNC',
+    'PERSONAL_PHONE': 'PERSONAL_PHONE_DNC',
+    'COMPANY_PHONE': 'COMPANY_PHONE_DNC',
+    'SKIPTRACE_B2B_PHONE': 'SKIPTRACE_B2B_PHONE_DNC'
+}
+
+DNC_YES_VALUES = ['Y', 'YES', 'TRUE', '1']
+
+
+def phone_dnc_pairs(df):
+    """Phone/DNC column pairs present in df"""
+    return [(phone_col, dnc_col) for phone_col, dnc_col in PHONE_DNC_MAPPING.items()
+            if phone_col in df.columns and dnc_col in df.columns]
+
+
+def clean_dnc_phones(df, available_pairs, progress=None):
+    """
+    Remove phone numbers whose DNC flag is set.
+
+    A DNC value of Y/YES/TRUE/1 clears the whole phone field. Comma-separated
+    DNC values are matched positionally against comma-separated phones, and
+    a single phone with a DNC list uses the first flag. Returns the cleaned
+    copy of df and a dict of statistics for display.
+    """
+    output_df = df.copy()
+
+    # Count original phone numbers
+    original_phones = {}
+    for phone_col, _ in available_pairs:
+        original_phones[phone_col] = sum(output_df[phone_col].notna() & (output_df[phone_col] != ''))
+
+    # Clean and prepare all DNC columns - normalize to uppercase
+    for _, dnc_col in available_pairs:
+        output_df[dnc_col] = fill_missing(output_df[dnc_col], 'N').astype(str).str.strip().str.upper()
+
+    # Clean phone columns - normalize empty values
+    for phone_col, _ in available_pairs:
+        output_df[phone_col] = output_df[phone_col].fillna('').astype(str)
+        output_df[phone_col] = output_df[phone_col].apply(
+            lambda x: '' if str(x).upper() in ['NAN', 'NONE', 'NULL', ''] else str(x).strip()
+        )
+
+    if progress:
+        progress(0.3, "Removing phone numbers where DNC = 'Y'...")
+
+    # Track rows that had phone numbers removed due to DNC 'Y'
+    rows_with_dnc_y = set()
+    rows_processed_count = 0
+    phones_cleared = 0
+
+    # Process each row individually to handle complex patterns
+    for idx in range(len(output_df)):
+        # Process each phone/DNC pair independently
+        for phone_col, dnc_col in available_pairs:
+            dnc_value = output_df.at[idx, dnc_col]
+            phone_value = output_df.at[idx, phone_col]
+
+            # Skip if DNC is empty or N
+            if not dnc_value or dnc_value == 'N':
+                continue
+
+            # Skip if phone is already empty
+            if not phone_value or phone_value == '':
+                continue
+
+            rows_processed_count += 1
+
+            # Case 1: Simple DNC 'Y' - remove entire phone field
+            if dnc_value in DNC_YES_VALUES:
+                output_df.at[idx, phone_col] = ''
+                rows_with_dnc_y.add(idx)
+                phones_cleared += 1
+
+            # Case 2: Comma-separated DNC values - match positionally with phone numbers
+            elif ',' in dnc_value:
+                dnc_list = [d.strip() for d in dnc_value.split(',') if d.strip()]
+
+                # If phone also has commas, match positionally
+                if ',' in phone_value:
+                    phone_list = [p.strip() for p in phone_value.split(',') if p.strip()]
+
+                    # Keep only phones where corresponding DNC is not 'Y'
+                    kept_phones = []
+                    had_removal = False
+
+                    for i in range(len(phone_list)):
+                        # Use corresponding DNC value, or 'N' if no corresponding value exists
+                        dnc_for_phone = dnc_list[i] if i < len(dnc_list) else 'N'
+
+                        if dnc_for_phone not in DNC_YES_VALUES:
+                            kept_phones.append(phone_list[i])
+                        else:
+                            had_removal = True
+
+                    # Update the phone field
+                    output_df.at[idx, phone_col] = ', '.join(kept_phones) if kept_phones else ''
+                    if had_removal:
+                        rows_with_dnc_y.add(idx)
+                        phones_cleared += 1
+
+                else:
+                    # Single phone with comma-separated DNC
+                    # Use the FIRST DNC value to decide
+                    first_dnc = dnc_list[0] if dnc_list else 'N'
+                    if first_dnc in DNC_YES_VALUES:
+                        output_df.at[idx, phone_col] = ''
+                        rows_with_dnc_y.add(idx)
+                        phones_cleared += 1
+
+        if progress and idx % 10000 == 0:
+            progress(0.3 + 0.6 * idx / len(output_df), f"Checked {idx:,} of {len(output_df):,} rows")
+
+    # Calculate statistics
+    final_phones = {}
+    phones_removed = {}
+    for phone_col, _ in available_pairs:
+        final_phones[phone_col] = sum(output_df[phone_col].notna() & (output_df[phone_col] != ''))
+        phones_removed[phone_col] = original_phones[phone_col] - final_phones[phone_col]
+
+    stats = {
+        'original_phones': original_phones,
+        'final_phones': final_phones,
+        'phones_removed': phones_removed,
+        'total_phones_removed': sum(phones_removed.values()),
+        'dnc_y_count': len(rows_with_dnc_y),
+        'dnc_n_count': len(output_df) - len(rows_with_dnc_y),
+        'rows_processed_count': rows_processed_count,
+        'phones_cleared': phones_cleared,
+    }
+    return output_df, stats
@@ -0,0 +1,166 @@
+import re
+import logging
+
+import numpy as np
+import pandas as pd
+
+from leadcleanup.columns import explode_columns, nth_item
+
+logger = logging.getLogger(__name__)
+
+# Lowercased address: a local part, '@', and a dotted domain of letters, digits and inner hyphens.
+# Written in the subset shared by Python's re and RE2, so Arrow-backed columns match it natively
+EMAIL_PATTERN = re.compile(
+    r"[a-z0-9!#$%&'*+/=?^_`{|}~.-]+@[a-z0-9](?:[a-z0-9-]*[a-z0-9])?(?:\.[a-z0-9](?:[a-z0-9-]*[a-z0-9])?)+"
+)
+
+# Email columns in rank order: verified addresses first, then personal, then business
+EMAIL_SOURCES = {
+    'DEEP_VERIFIED_EMAILS': 'verified',
+    'PERSONAL_EMAILS': 'personal',
+    'PERSONAL_EMAIL': 'personal',
+    'ADDITIONAL_PERSONAL_EMAILS': 'personal',
+    'BUSINESS_EMAIL': 'business',
+}
+EMAIL_COLUMNS = list(EMAIL_SOURCES)
+
+
+def normalize_emails(items):
+    """Trimmed items lowercased, missing where they are not a syntactically valid address"""
+    emails = items.str.lower()
+    return emails.where(emails.str.fullmatch(EMAIL_PATTERN.pattern).fillna(False).astype(bool))
+
+
+def explode_emails(df, columns=EMAIL_COLUMNS):
+    """
+    One row per (person, email) across the comma-separated email columns.
+
+    Returns a frame with ROW (the person's position in df), SOURCE (the
+    column the email came from) and EMAIL, lowercased; invalid addresses are
+    dropped. Each person's addresses are kept once and ranked by the order
+    of `columns` (verified, personal, business by default), then by their
+    order within the cell.
+    """
+    return explode_columns(df, columns, 'EMAIL', normalize_emails)
+
+
+def add_email_columns(df):
+    """
+    Add PRIMARY_EMAIL and SECONDARY_EMAIL, each person's best and second best
+    address by rank, from one columnar pass over all email columns. Where the
+    new format only has PERSONAL_EMAILS, PERSONAL_EMAIL is filled with its
+    first valid address, as older outputs expect. Modifies df in place.
+    """
+    if not any(column in df.columns for column in EMAIL_COLUMNS):
+        return df
+    emails = explode_emails(df)
+    if 'PERSONAL_EMAILS' in df.columns and 'PERSONAL_EMAIL' not in df.columns:
+        personal = explode_emails(df, ['PERSONAL_EMAILS'])
+        df['PERSONAL_EMAIL'] = nth_item(personal, 'EMAIL', len(df), 0, fill='')
+    df['PRIMARY_EMAIL'] = nth_item(emails, 'EMAIL', len(df), 0, fill=np.nan)
+    df['SECONDARY_EMAIL'] = nth_item(emails, 'EMAIL', len(df), 1, fill=np.nan)
+    return df
+
+
+# Consumer mailbox providers; any other domain counts as corporate
+FREE_MAIL_DOMAINS = frozenset([
+    'gmail.com', 'googlemail.com', 'yahoo.com', 'ymail.com', 'rocketmail.com', 'hotmail.com', 'outlook.com',
+    'live.com', 'msn.com', 'aol.com', 'icloud.com', 'me.com', 'mac.com', 'comcast.net', 'att.net',
+    'sbcglobal.net', 'bellsouth.net', 'verizon.net', 'cox.net', 'charter.net', 'earthlink.net', 'juno.com',
+    'optonline.net', 'frontier.com', 'windstream.net', 'centurylink.net', 'protonmail.com', 'proton.me',
+    'mail.com', 'gmx.com', 'zoho.com', 'yandex.com', 'hotmail.co.uk', 'yahoo.co.uk',
+])
+
+# Outcomes of matching COMPANY_DOMAIN against a person's BUSINESS_EMAIL domains
+COMPANY_DOMAIN_STATUSES = ('Match', 'Mismatch', 'Free mail', 'No business email', 'No company domain')
+
+
+def normalize_domains(series):
+    """Website or domain values as bare lowercase domains ('https://www.Acme.com/x' -> 'acme.com')"""
+    domains = series.astype('string').str.strip().str.lower()
+    domains = domains.str.replace(r'^[a-z][a-z0-9+.-]*://', '', regex=True)
+    domains = domains.str.replace(r'^www\.', '', regex=True).str.replace(r'[/:?#].*$', '', regex=True)
+    return domains.where(domains != '')
+
+
+class DomainIndex:
+    """
+    Every valid email of a dataset reduced to an integer domain code.
+
+    Built with one explode pass over the email columns; domains are stored
+    once, so top-domain counts, the free-mail share and the COMPANY_DOMAIN
+    check are bincounts and comparisons over integer arrays rather than
+    string work on every rerun. The arrays are made read-only, so one index
+    can be shared between reruns and sessions.
+    """
+
+    def __init__(self, rows, sources, codes, domains, company_status, n_rows):
+        self.rows = rows
+        self.sources = sources
+        self.codes = codes
+        self.domains = domains
+        self.free = domains.isin(FREE_MAIL_DOMAINS)
+        self.company_status = company_status
+        self.n_rows = n_rows
+        for array in (self.rows, self.codes, self.free):
+            array.flags.writeable = False
+
+    @classmethod
+    def build(cls, df):
+        emails = explode_emails(df)
+        # Valid addresses have exactly one '@'
+        codes, domains = pd.factorize(emails['EMAIL'].str.split('@').str[1])
+        domains = pd.Index(domains, dtype=object)
+        status = cls._company_status(df, domains)
+        logger.info(f"Built domain index: {len(domains):,} domains over {len(emails):,} emails")
+        return cls(emails['ROW'].to_numpy(), pd.Categorical(emails['SOURCE']), codes.astype(np.int32),
+                   domains, status, len(df))
+
+    @staticmethod
+    def _company_status(df, domains):
+        """Per-row COMPANY_DOMAIN_STATUSES value, or None without both columns"""
+        if 'COMPANY_DOMAIN' not in df.columns or 'BUSINESS_EMAIL' not in df.columns:
+            return None
+        company = normalize_domains(df['COMPANY_DOMAIN'])
+        business = explode_emails(df, ['BUSINESS_EMAIL'])
+        business_domains = business['EMAIL'].str.split('@').str[1].to_numpy(dtype=object)
+        rows = business['ROW'].to_numpy()
+        # A person matches if any of their business addresses is at the company domain
+        matched = np.zeros(len(df), dtype=bool)
+        matched[rows[business_domains == company.to_numpy(dtype=object, na_value=None)[rows]]] = True
+        corporate = np.zeros(len(df), dtype=bool)
+        corporate[rows[~pd.Index(business_domains).isin(FREE_MAIL_DOMAINS)]] = True
+        has_business = np.zeros(len(df), dtype=bool)
+        has_business[rows] = True
+
+        status = np.select(
+            [company.isna().to_numpy(), ~has_business, matched, corporate],
+            [4, 3, 0, 1], default=2,
+        )
+        return pd.Categorical.from_codes(status, categories=list(COMPANY_DOMAIN_STATUSES))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def top_domains(self, n=10, free=None):
+        """Email count of the n most common domains; free=True/False limits to free-mail/corporate"""
+        counts = pd.Series(np.bincount(self.codes, minlength=len(self.domains)), index=self.domains)
+        if free is not None:
+            counts = counts[self.free == free]
+        return counts.sort_values(ascending=False, kind='stable').head(n)
+
+    def mail_types(self):
+        """Email count per mail type (free mail vs corporate)"""
+        free = int(self.free[self.codes].sum()) if len(self.codes) else 0
+        return pd.Series({'Free mail': free, 'Corporate': len(self.codes) - free})
+
+    def sources_by_type(self):
+        """Email counts per source column and mail type"""
+        mail_type = np.where(self.free[self.codes], 'Free mail', 'Corporate') if len(self.codes) else []
+        return pd.crosstab(pd.Series(self.sources, name='Source'), pd.Series(mail_type, name='Mail type'))
+
+    def company_domain_summary(self):
+        """Person count per COMPANY_DOMAIN_STATUSES outcome, or None without the columns"""
+        if self.company_status is None:
+            return None
+        return pd.Series(self.company_status).value_counts().reindex(list(COMPANY_DOMAIN_STATUSES), fill_value=0)
@@ -0,0 +1,305 @@
+import io
+import os
+import gzip
+import json
+import zipfile
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from leadcleanup.formats import detect_input_format, normalize_dataframe, compact_dtypes
+
+PARQUET_MAGIC = b"PAR1"
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# Rows per worksheet, including the header row
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Records encoded and written per block of NDJSON output or parsed per block of input
+NDJSON_BLOCK_ROWS = 10000
+
+
+def _peek(source, size=4):
+    """First bytes of a path or seekable file object, leaving the file position unchanged"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read(size)
+    position = source.tell()
+    head = source.read(size)
+    source.seek(position)
+    return head
+
+
+def read_parquet(source, columns=None):
+    """
+    Read a Parquet file into one frame. With columns, only those (of the
+    ones present) are decoded; the app and CLI read every column, since
+    format detection and normalization work on the whole file.
+    """
+    if pq is None:
+        raise ImportError("Reading Parquet files needs pyarrow: pip install pyarrow")
+    parquet_file = pq.ParquetFile(source)
+    if columns is not None:
+        present = set(parquet_file.schema_arrow.names)
+        columns = [column for column in columns if column in present]
+    table = parquet_file.read(columns=columns)
+    # Each column's Arrow buffers are released as soon as it is converted, so the
+    # file is not held in memory twice (once as Arrow, once as pandas)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _decompressing_reader(source, head):
+    """
+    Wrap a gzip or Zstd compressed source in a stream that decompresses as
+    it is read, or return source unchanged if it is not compressed. The CSV
+    parser pulls blocks from the stream, so the decompressed file is never
+    held in memory as a whole.
+    """
+    if head.startswith(GZIP_MAGIC):
+        if isinstance(source, (str, os.PathLike)):
+            return gzip.open(source, 'rb')
+        return gzip.GzipFile(fileobj=source, mode='rb')
+    if head == ZSTD_MAGIC:
+        if pa is None:
+            raise ImportError("Reading .zst files needs pyarrow: pip install pyarrow")
+        return pa.input_stream(source, compression='zstd')
+    return source
+
+
+def _json_loads(line):
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def _json_dumps(record):
+    if orjson is not None:
+        return orjson.dumps(record, default=str)
+    return json.dumps(record, default=str, ensure_ascii=False).encode('utf-8')
+
+
+def read_ndjson(source, columns=None, block_rows=NDJSON_BLOCK_ROWS):
+    """
+    Read newline-delimited JSON records, parsing block_rows lines at a time.
+    Keys missing from a record become missing values; with columns, other
+    keys are dropped as each block is parsed.
+    """
+    def frame(records):
+        df = pd.DataFrame(records)
+        return df if columns is None else df[[column for column in columns if column in df.columns]]
+
+    def blocks(lines):
+        block = []
+        for line in lines:
+            if line.strip():
+                block.append(_json_loads(line))
+                if len(block) >= block_rows:
+                    yield frame(block)
+                    block = []
+        if block:
+            yield frame(block)
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            parts = list(blocks(f))
+    else:
+        parts = list(blocks(source))
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+
+def read_frame(source, columns=None):
+    """
+    Read an uploaded lead file without normalizing it. CSV, gzip or Zstd
+    compressed CSV, NDJSON and Parquet are told apart by content, so uploads
+    saved under any name work.
+    """
+    head = _peek(source)
+    if head == PARQUET_MAGIC:
+        return read_parquet(source, columns)
+    if head.lstrip().startswith(b"{"):
+        # A CSV header never starts with '{'; a JSON record always does
+        return read_ndjson(source, columns)
+    usecols = (lambda column: column in columns) if columns is not None else None
+    reader = _decompressing_reader(source, head)
+    if reader is source or not isinstance(source, (str, os.PathLike)):
+        # File objects are left open for the caller, who may read them again
+        return pd.read_csv(reader, usecols=usecols)
+    # A decompressing stream opened here from a path owns a file descriptor; close it with the read
+    with reader:
+        return pd.read_csv(reader, usecols=usecols)
+
+
+def read_input(source):
+    """Read a lead file, normalize it and compact its dtypes; returns (df, detected_format)"""
+    df = read_frame(source)
+    detected_format = detect_input_format(df)
+    df, _ = compact_dtypes(normalize_dataframe(df, detected_format))
+    return df, detected_format
+
+
+def _excel_sheets(df, max_rows=EXCEL_MAX_ROWS):
+    """
+    Yield (sheet name, rows) for df, starting a new sheet each time one is
+    full. Rows are lists of plain Python values with missing values as None.
+    """
+    header = [str(column) for column in df.columns]
+    per_sheet = max_rows - 1
+    for sheet, start in enumerate(range(0, max(len(df), 1), per_sheet), 1):
+        part = df.iloc[start:start + per_sheet]
+        columns = [part[column].to_numpy(dtype=object, na_value=None) for column in part.columns]
+        yield f"Sheet{sheet}", header, zip(*columns)
+
+
+def write_excel(df, target, max_rows=EXCEL_MAX_ROWS):
+    """
+    Write df as an .xlsx workbook to a path or binary file object.
+
+    Rows are streamed out one at a time (xlsxwriter in constant_memory mode,
+    or openpyxl in write_only mode without it), so memory stays flat however
+    large the frame is. Frames longer than Excel's row limit continue on
+    Sheet2, Sheet3 and so on, each with the header row.
+    """
+    if xlsxwriter is not None:
+        # Text is written as text: no URL or formula conversion of lead fields
+        workbook = xlsxwriter.Workbook(target, {'constant_memory': True, 'strings_to_urls': False,
+                                                'strings_to_formulas': False})
+        bold = workbook.add_format({'bold': True})
+        for name, header, rows in _excel_sheets(df, max_rows):
+            worksheet = workbook.add_worksheet(name)
+            worksheet.write_row(0, 0, header, bold)
+            write, write_string = worksheet.write, worksheet.write_string
+            for row_number, row in enumerate(rows, 1):
+                for column_number, value in enumerate(row):
+                    # Empty cells are skipped instead of written as blanks, and text skips write()'s type dispatch
+                    if value is None:
+                        continue
+                    if value.__class__ is str:
+                        write_string(row_number, column_number, value)
+                    else:
+                        write(row_number, column_number, value)
+        workbook.close()
+    else:
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        for name, header, rows in _excel_sheets(df, max_rows):
+            worksheet = workbook.create_sheet(name)
+            worksheet.append(header)
+            for row in rows:
+                worksheet.append(row)
+        workbook.save(target)
+
+
+def write_ndjson(df, target, block_rows=NDJSON_BLOCK_ROWS):
+    """
+    Write df as newline-delimited JSON, one record per line, to a binary
+    file object. Records are encoded and written block_rows at a time, so
+    the output is never held as one string. Missing values become null.
+    """
+    columns = [str(column) for column in df.columns]
+    for start in range(0, len(df), block_rows):
+        part = df.iloc[start:start + block_rows]
+        values = [part[column].to_numpy(dtype=object, na_value=None) for column in part.columns]
+        target.write(b"".join(_json_dumps(dict(zip(columns, row))) + b"\n" for row in zip(*values)))
+
+
+# Formats written by streaming into a file object instead of building the bytes first
+STREAMED_FORMATS = {
+    "excel": (write_excel, "xlsx"),
+    "xlsx": (write_excel, "xlsx"),
+    "ndjson": (write_ndjson, "ndjson"),
+    "jsonl": (write_ndjson, "ndjson"),
+}
+
+
+def serialize_frame(df, file_format="csv"):
+    """Encode a frame for download or writing; returns (data, mime, extension)"""
+    file_format = file_format.lower()
+    if file_format in ("excel", "xlsx"):
+        buffer = io.BytesIO()
+        write_excel(df, buffer)
+        return buffer.getvalue(), EXCEL_MIME, "xlsx"
+    elif file_format == "parquet":
+        # Dictionary-encoded columns compress well for the repetitive lead fields
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, engine='pyarrow', index=False, compression='zstd', use_dictionary=True)
+        return buffer.getvalue(), "application/vnd.apache.parquet", "parquet"
+    elif file_format in ("ndjson", "jsonl"):
+        buffer = io.BytesIO()
+        write_ndjson(df, buffer)
+        return buffer.getvalue(), "application/x-ndjson", "ndjson"
+    elif file_format == "json":
+        return df.to_json(orient="records", indent=2).encode('utf-8'), "application/json", "json"
+    elif file_format in ("csv.gz", "gzip"):
+        # A fixed mtime keeps the bytes identical for identical frames
+        buffer = io.BytesIO()
+        df.to_csv(buffer, index=False, compression={'method': 'gzip', 'compresslevel': 6, 'mtime': 0})
+        return buffer.getvalue(), "application/gzip", "csv.gz"
+    elif file_format in ("csv.zst", "zstd"):
+        if pa is None:
+            raise ImportError("Writing .zst files needs pyarrow: pip install pyarrow")
+        # The CSV text is compressed as it is written instead of being built in full first
+        sink = pa.BufferOutputStream()
+        with pa.CompressedOutputStream(sink, 'zstd') as stream:
+            df.to_csv(stream, index=False)
+        return sink.getvalue().to_pybytes(), "application/zstd", "csv.zst"
+    else:
+        return df.to_csv(index=False).encode('utf-8'), "text/csv", "csv"
+
+
+def write_frames(frames, out_dir, file_format="csv"):
+    """
+    Write (name, frame) pairs under out_dir. Names may contain '/' for
+    nested folders, as produced by the hierarchical split.
+
+    Returns the list of written paths.
+    """
+    paths = []
+    streamed = STREAMED_FORMATS.get(file_format.lower())
+    for name, df in frames:
+        if streamed is not None:
+            # Streamed straight to the file rather than built in memory first
+            writer, ext = streamed
+            path = os.path.join(out_dir, f"{name}.{ext}")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                writer(df, f)
+        else:
+            data, _, ext = serialize_frame(df, file_format)
+            path = os.path.join(out_dir, f"{name}.{ext}")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+        paths.append(path)
+    return paths
+
+
+def write_archive(frames, target, file_format="csv"):
+    """
+    Write (name, frame) pairs into one ZIP archive. target is a path or a
+    writable binary file object such as io.BytesIO.
+    """
+    streamed = STREAMED_FORMATS.get(file_format.lower())
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for name, df in frames:
+            if streamed is not None:
+                # Written straight into the archive entry, without an intermediate buffer
+                writer, ext = streamed
+                with zip_file.open(f"{name}.{ext}", 'w', force_zip64=True) as entry:
+                    writer(df, entry)
+                continue
+            data, _, ext = serialize_frame(df, file_format)
+            zip_file.writestr(f"{name}.{ext}", data)
@@ -0,0 +1,281 @@
+import numpy as np
+import pandas as pd
+
+from leadcleanup.emails import add_email_columns
+
+# Column mapping between old and new formats
+OLD_TO_NEW_COLUMN_MAPPING = {
+    # Core identity columns
+    'FIRST_NAME': 'FIRST_NAME',
+    'LAST_NAME': 'LAST_NAME',
+    
+    # Address columns
+    'PERSONAL_ADDRESS': 'PERSONAL_ADDRESS',
+    'PERSONAL_CITY': 'PERSONAL_CITY',
+    'PERSONAL_STATE': 'PERSONAL_STATE',
+    'PERSONAL_ZIP': 'PERSONAL_ZIP',
+    'PERSONAL_ZIP4': 'PERSONAL_ZIP4',
+    
+    # Phone columns
+    'DIRECT_NUMBER': 'DIRECT_NUMBER',
+    'MOBILE_PHONE': 'MOBILE_PHONE',
+    'PERSONAL_PHONE': 'PERSONAL_PHONE',
+    'DNC': 'DNC',
+    
+    # Demographics
+    'AGE_RANGE': 'AGE_RANGE',
+    'CHILDREN': 'CHILDREN',
+    'GENDER': 'GENDER',
+    'HOMEOWNER': 'HOMEOWNER',
+    'MARRIED': 'MARRIED',
+    'NET_WORTH': 'NET_WORTH',
+    'INCOME_RANGE': 'INCOME_RANGE',
+    
+    # Email columns
+    'BUSINESS_EMAIL': 'BUSINESS_EMAIL',
+    'PERSONAL_EMAIL': 'PERSONAL_EMAILS',  # Note: old had singular, new has plural
+    'ADDITIONAL_PERSONAL_EMAILS': 'PERSONAL_EMAILS',  # Map to same field
+    'SHA256_PERSONAL_EMAIL': 'SHA256_PERSONAL_EMAIL',
+    'SHA256_BUSINESS_EMAIL': 'SHA256_BUSINESS_EMAIL',
+    
+    # Professional columns
+    'JOB_TITLE': 'JOB_TITLE',
+    'DEPARTMENT': 'DEPARTMENT',
+    'SENIORITY_LEVEL': 'SENIORITY_LEVEL',
+    'LINKEDIN_URL': 'LINKEDIN_URL',
+    
+    # Company columns
+    'COMPANY_NAME': 'COMPANY_NAME',
+    'COMPANY_ADDRESS': 'COMPANY_ADDRESS',
+    'COMPANY_DOMAIN': 'COMPANY_DOMAIN',
+    'COMPANY_EMPLOYEE_COUNT': 'COMPANY_EMPLOYEE_COUNT',
+    'COMPANY_LINKEDIN_URL': 'COMPANY_LINKEDIN_URL',
+    'COMPANY_PHONE': 'COMPANY_PHONE',
+    'COMPANY_REVENUE': 'COMPANY_REVENUE',
+    'COMPANY_SIC': 'COMPANY_SIC',
+    'COMPANY_NAICS': 'COMPANY_NAICS',
+    'COMPANY_CITY': 'COMPANY_CITY',
+    'COMPANY_STATE': 'COMPANY_STATE',
+    'COMPANY_ZIP': 'COMPANY_ZIP',
+    'COMPANY_INDUSTRY': 'COMPANY_INDUSTRY',
+    
+    # Professional address
+    'PROFESSIONAL_ADDRESS': 'PROFESSIONAL_ADDRESS',
+    'PROFESSIONAL_ADDRESS_2': 'PROFESSIONAL_ADDRESS_2',
+    'PROFESSIONAL_CITY': 'PROFESSIONAL_CITY',
+    'PROFESSIONAL_STATE': 'PROFESSIONAL_STATE',
+    'PROFESSIONAL_ZIP': 'PROFESSIONAL_ZIP',
+    'PROFESSIONAL_ZIP4': 'PROFESSIONAL_ZIP4',
+    
+    # Skiptrace columns
+    'SKIPTRACE_CREDIT_RATING': 'SKIPTRACE_CREDIT_RATING',
+    'SKIPTRACE_DNC': 'SKIPTRACE_DNC',
+    'SKIPTRACE_EXACT_AGE': 'SKIPTRACE_EXACT_AGE',
+    'SKIPTRACE_B2B_COMPANY_NAME': 'SKIPTRACE_B2B_COMPANY_NAME',
+    'SKIPTRACE_B2B_PHONE': 'SKIPTRACE_B2B_PHONE',
+    'SKIPTRACE_B2B_SOURCE': 'SKIPTRACE_B2B_SOURCE',
+    'SKIPTRACE_B2B_WEBSITE': 'SKIPTRACE_B2B_WEBSITE'
+}
+
+# New format specific columns that don't exist in old format
+NEW_FORMAT_SPECIFIC_COLUMNS = [
+    'UUID', 'HEADLINE', 'INFERRED_YEARS_EXPERIENCE', 'COMPANY_NAME_HISTORY',
+    'JOB_TITLE_HISTORY', 'EDUCATION_HISTORY', 'COMPANY_DESCRIPTION',
+    'TWITTER_URL', 'FACEBOOK_URL', 'SOCIAL_CONNECTIONS', 'SKILLS', 'INTERESTS',
+    'SKIPTRACE_MATCH_SCORE', 'SKIPTRACE_NAME', 'SKIPTRACE_ADDRESS',
+    'SKIPTRACE_CITY', 'SKIPTRACE_STATE', 'SKIPTRACE_ZIP',
+    'SKIPTRACE_LANDLINE_NUMBERS', 'SKIPTRACE_WIRELESS_NUMBERS',
+    'SKIPTRACE_ETHNIC_CODE', 'SKIPTRACE_LANGUAGE_CODE', 'SKIPTRACE_IP',
+    'SKIPTRACE_B2B_ADDRESS', 'DEEP_VERIFIED_EMAILS'
+]
+
+# Lead fields with a handful of distinct values, stored as categoricals after normalization
+CATEGORICAL_COLUMNS = [
+    'PERSONAL_STATE', 'HOMEOWNER', 'GENDER', 'MARRIED', 'CHILDREN', 'AGE_RANGE', 'NET_WORTH',
+    'INCOME_RANGE', 'SENIORITY_LEVEL', 'DEPARTMENT', 'COMPANY_INDUSTRY', 'COMPANY_EMPLOYEE_COUNT',
+    'COMPANY_REVENUE', 'SKIPTRACE_CREDIT_RATING'
+]
+
+# Largest whole number float32 holds exactly
+FLOAT32_EXACT_LIMIT = 2 ** 24
+
+def detect_input_format(df):
+    """
+    Detect whether the input file is in old or new format
+    Returns: 'old', 'new', or 'unknown'
+    """
+    # Check for new format specific columns
+    new_format_indicators = ['UUID', 'HEADLINE', 'DEEP_VERIFIED_EMAILS', 'SKILLS']
+    new_format_score = sum(1 for col in new_format_indicators if col in df.columns)
+    
+    # Check for old format specific patterns
+    old_format_indicators = ['BUSINESS_EMAIL_VALIDATION_STATUS', 'PERSONAL_EMAIL_VALIDATION_STATUS', 
+                           'SOCIAL_CONNECTIONS', 'LAST_UPDATED']
+    old_format_score = sum(1 for col in old_format_indicators if col in df.columns)
+    
+    # Additional checks for column structure differences
+    if 'PERSONAL_EMAIL' in df.columns and 'PERSONAL_EMAILS' not in df.columns:
+        old_format_score += 1
+    elif 'PERSONAL_EMAILS' in df.columns and 'PERSONAL_EMAIL' not in df.columns:
+        new_format_score += 1
+    
+    # Decision logic
+    if new_format_score > old_format_score:
+        return 'new'
+    elif old_format_score > new_format_score:
+        return 'old'
+    else:
+        # If scores are equal, check for presence of UUID (strong new format indicator)
+        if 'UUID' in df.columns:
+            return 'new'
+        else:
+            return 'old'  # Default to old format for compatibility
+
+def normalize_dataframe(df, detected_format):
+    """
+    Normalize DataFrame to a consistent internal format
+    """
+    if detected_format == 'old':
+        return normalize_old_format(df)
+    elif detected_format == 'new':
+        return normalize_new_format(df)
+    else:
+        # Unknown format - try to work with it as-is
+        return df.copy()
+
+def normalize_old_format(df):
+    """
+    Normalize old format to internal standard
+    """
+    normalized_df = df.copy()
+    
+    # Handle email columns - old format has singular PERSONAL_EMAIL
+    if 'PERSONAL_EMAIL' in normalized_df.columns and 'PERSONAL_EMAILS' not in normalized_df.columns:
+        normalized_df['PERSONAL_EMAILS'] = normalized_df['PERSONAL_EMAIL']
+    add_email_columns(normalized_df)
+    
+    # Ensure DNC column is properly formatted
+    if 'DNC' in normalized_df.columns:
+        # Convert boolean or other formats to Y/N
+        normalized_df['DNC'] = normalized_df['DNC'].apply(lambda x: 'Y' if str(x).upper() in ['Y', 'YES', 'TRUE', '1'] else 'N')
+    
+    return normalized_df
+
+def normalize_new_format(df):
+    """
+    Normalize new format to internal standard
+    """
+    normalized_df = df.copy()
+    
+    # Handle email columns - new format keeps lists; PERSONAL_EMAIL gets the first valid
+    # personal address for compatibility, and PRIMARY/SECONDARY_EMAIL the best ranked ones
+    add_email_columns(normalized_df)
+    
+    # Handle phone number columns that might have different formats
+    phone_cols = ['MOBILE_PHONE', 'DIRECT_NUMBER', 'PERSONAL_PHONE']
+    for col in phone_cols:
+        if col in normalized_df.columns:
+            # New format might have phone numbers in different format
+            normalized_df[col] = normalized_df[col].apply(lambda x: str(x) if pd.notna(x) else '')
+    
+    # Handle DNC columns that might be formatted differently
+    if 'DNC' not in normalized_df.columns:
+        # Create DNC column if it doesn't exist
+        normalized_df['DNC'] = 'N'
+    else:
+        # Ensure proper Y/N format
+        normalized_df['DNC'] = normalized_df['DNC'].apply(lambda x: 'Y' if str(x).upper() in ['Y', 'YES', 'TRUE', '1'] else 'N')
+    
+    return normalized_df
+
+def get_format_info(df, detected_format):
+    """
+    Get information about the detected format for user display
+    """
+    info = {
+        'format': detected_format,
+        'total_columns': len(df.columns),
+        'total_rows': len(df)
+    }
+    
+    if detected_format == 'old':
+        info['description'] = "Classic address cleaner format"
+        info['key_features'] = [
+            "Standard address and contact fields",
+            "Single personal email column",
+            "Traditional column structure"
+        ]
+    elif detected_format == 'new':
+        info['description'] = "Enhanced format with additional data"
+        info['key_features'] = [
+            "UUID for unique identification",
+            "Enhanced social and professional data",
+            "Deep verified emails",
+            "Skills and interests data"
+        ]
+    else:
+        info['description'] = "Unknown or custom format"
+        info['key_features'] = [
+            "Will attempt to process with available columns"
+        ]
+    
+    return info
+
+def compact_dtypes(df, max_unique_ratio=0.5):
+    """
+    Shrink a normalized frame without changing any value.
+    
+    Low-cardinality lead fields (CATEGORICAL_COLUMNS and the DNC flags) become
+    categoricals, with all DNC flag columns sharing one dictionary; a column
+    is left alone when more than max_unique_ratio of its values are distinct.
+    Integer columns are downcast, and float columns holding only whole
+    numbers below 2**24 become float32, so written files stay identical.
+    
+    Returns the compacted copy and a report of the changed columns and their
+    memory_usage(deep=True) before and after. Only those columns are
+    measured; a deep scan of the whole frame costs more than the compaction.
+    """
+    compacted = {}
+    
+    def low_cardinality(column):
+        values = df[column].dropna()
+        return len(values) > 0 and values.nunique() <= max_unique_ratio * len(values)
+    
+    text_columns = [column for column in df.columns
+                    if df[column].dtype == object or isinstance(df[column].dtype, pd.StringDtype)]
+    dnc_columns = [column for column in text_columns
+                   if (column == 'DNC' or column.endswith('_DNC')) and low_cardinality(column)]
+    if dnc_columns:
+        shared = pd.CategoricalDtype(sorted(set().union(*(df[column].dropna().astype(str).unique() for column in dnc_columns))))
+        for column in dnc_columns:
+            compacted[column] = df[column].astype(shared)
+    for column in CATEGORICAL_COLUMNS:
+        if column in text_columns and column not in compacted and low_cardinality(column):
+            compacted[column] = df[column].astype('category')
+    categorical = list(compacted)
+    
+    downcast = []
+    for column in df.columns:
+        values = df[column]
+        if values.dtype.kind in 'iu':
+            smaller = pd.to_numeric(values, downcast='signed' if values.dtype.kind == 'i' else 'unsigned')
+        elif values.dtype == np.float64:
+            present = values.dropna().to_numpy()
+            if len(present) == 0 or np.abs(present).max() >= FLOAT32_EXACT_LIMIT or (present % 1 != 0).any():
+                continue
+            smaller = values.astype(np.float32)
+        else:
+            continue
+        if smaller.dtype != values.dtype:
+            compacted[column] = smaller
+            downcast.append(column)
+    
+    report = {
+        'bytes_before': int(sum(df[column].memory_usage(index=False, deep=True) for column in compacted)),
+        'bytes_after': int(sum(values.memory_usage(index=False, deep=True) for values in compacted.values())),
+        'categorical': categorical,
+        'downcast': downcast,
+    }
+    if compacted:
+        df = df.assign(**compacted)
+    return df, report
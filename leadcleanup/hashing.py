@@ -0,0 +1,129 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from leadcleanup.columns import explode_columns
+from leadcleanup.emails import explode_emails
+
+# Phone columns hashed for audience exports, in order of preference
+PHONE_COLUMNS = ['MOBILE_PHONE', 'SKIPTRACE_WIRELESS_NUMBERS']
+
+# Vendor-supplied hashes, used when a file has no raw email columns
+PRECOMPUTED_EMAIL_HASH_COLUMNS = ['SHA256_PERSONAL_EMAIL', 'SHA256_BUSINESS_EMAIL']
+
+# Hash types offered for audience exports and their hashlib names
+HASH_TYPES = {
+    'SHA256': 'sha256',
+    'MD5': 'md5',
+    'SHA1': 'sha1',
+}
+
+IDENTIFIER_TYPES = ('EMAIL', 'PHONE')
+
+
+def to_e164(items):
+    """
+    Phone numbers as E.164 (+15551234567), or missing where they cannot be.
+
+    Ten-digit numbers are taken as US/Canada; numbers written with a leading
+    '+' keep their country code. Values read as floats ('15551234567.0')
+    lose the trailing '.0' first.
+    """
+    digits = items.str.replace(r'\.0$', '', regex=True).str.replace(r'\D', '', regex=True)
+    length = digits.str.len()
+    international = (items.str.startswith('+') & (length >= 8) & (length <= 15)).to_numpy(dtype=bool)
+    national = (length == 10).to_numpy(dtype=bool)
+    with_country_code = ((length == 11) & digits.str.startswith('1')).to_numpy(dtype=bool) | international
+    digits = digits.to_numpy(dtype=object)
+    e164 = np.full(len(items), None, dtype=object)
+    e164[national] = '+1' + digits[national]
+    e164[with_country_code] = '+' + digits[with_country_code]
+    return pd.Series(e164, index=items.index)
+
+
+def explode_phones(df, columns=PHONE_COLUMNS):
+    """
+    One row per (person, phone) across the comma-separated phone columns,
+    with PHONE in E.164. Numbers that cannot be normalized are dropped.
+    """
+    return explode_columns(df, columns, 'PHONE', to_e164)
+
+
+def _digests(uniques, algorithm):
+    digest = getattr(hashlib, algorithm)
+    return np.array([digest(value.encode('utf-8')).hexdigest() for value in uniques], dtype=object)
+
+
+def hash_values(values, algorithm='sha256'):
+    """
+    Hex digest of every value, hashing each distinct value once.
+
+    Identifiers are a few dozen bytes, too short for hashlib to release the
+    GIL, so the distinct values are hashed in one tight loop rather than on
+    a thread pool; repeated values are filled in from their first digest.
+    """
+    codes, uniques = pd.factorize(values)
+    return _digests(uniques.tolist(), algorithm)[codes] if len(codes) else np.array([], dtype=object)
+
+
+def audience_hashes(df, identifiers=('EMAIL',), hash_types=('SHA256',), id_columns=('FIRST_NAME', 'LAST_NAME'),
+                    progress=None):
+    """
+    Hashed identifiers for ad-platform audience uploads, in long format.
+
+    Every valid email (trimmed, lowercased) and phone (E.164) of each person is
+    hashed with every requested hash type, giving one row per person,
+    identifier and hash type: id_columns, IDENTIFIER_TYPE, HASH_TYPE, HASH.
+    Identifiers repeated under the same name, across columns or rows, are
+    kept once, and each distinct identifier is hashed once per hash type.
+    If a file has no raw emails, its vendor SHA-256 email hashes are passed
+    through for SHA256.
+
+    Returns (frame, counts) where counts has the number of identifiers
+    exported per source column.
+    """
+    id_columns = [column for column in id_columns if column in df.columns]
+    if progress:
+        progress(0.1, "Normalizing identifiers")
+
+    parts = []
+    if 'EMAIL' in identifiers:
+        emails = explode_emails(df).rename(columns={'EMAIL': 'VALUE'})
+        if len(emails) == 0 and 'SHA256' in hash_types:
+            # Already hashed, so passed through below instead of hashed again
+            emails = explode_columns(df, PRECOMPUTED_EMAIL_HASH_COLUMNS, 'VALUE', lambda items: items.str.lower())
+        parts.append(emails.assign(IDENTIFIER_TYPE='EMAIL'))
+    if 'PHONE' in identifiers:
+        phones = explode_phones(df).rename(columns={'PHONE': 'VALUE'})
+        parts.append(phones.assign(IDENTIFIER_TYPE='PHONE'))
+    if not parts:
+        return pd.DataFrame(columns=id_columns + ['IDENTIFIER_TYPE', 'HASH_TYPE', 'HASH']), {}
+
+    long = pd.concat(parts, ignore_index=True)
+    # The same identifier under the same name (duplicate records of one person) is exported once
+    if id_columns and len(long):
+        codes, uniques = pd.factorize(long['VALUE'])
+        person = df.groupby(id_columns, dropna=False, sort=False).ngroup().to_numpy()[long['ROW'].to_numpy()]
+        keep = ~pd.Series(person * max(len(uniques), 1) + codes).duplicated().to_numpy()
+        long = long[keep].reset_index(drop=True)
+    counts = long['SOURCE'].value_counts().to_dict()
+
+    precomputed = long['SOURCE'].isin(PRECOMPUTED_EMAIL_HASH_COLUMNS).to_numpy()
+    frames = [pd.DataFrame({'ROW': long['ROW'][precomputed].to_numpy(), 'IDENTIFIER_TYPE': 'EMAIL',
+                            'HASH_TYPE': 'SHA256', 'HASH': long['VALUE'][precomputed].to_numpy(dtype=object)})]
+    long = long[~precomputed]
+    codes, uniques = pd.factorize(long['VALUE'])
+    uniques = uniques.tolist()
+    for step, hash_type in enumerate(hash_types):
+        if progress:
+            progress(0.3 + 0.6 * step / len(hash_types), f"Hashing {len(uniques):,} distinct identifiers with {hash_type}")
+        hashed = _digests(uniques, HASH_TYPES[hash_type])[codes] if len(codes) else np.array([], dtype=object)
+        frames.append(pd.DataFrame({'ROW': long['ROW'].to_numpy(), 'IDENTIFIER_TYPE': long['IDENTIFIER_TYPE'].to_numpy(),
+                                    'HASH_TYPE': hash_type, 'HASH': hashed}))
+
+    hashes = pd.concat(frames, ignore_index=True).sort_values('ROW', kind='stable')
+    output_df = df[id_columns].iloc[hashes['ROW'].to_numpy()].reset_index(drop=True)
+    for column in ('IDENTIFIER_TYPE', 'HASH_TYPE', 'HASH'):
+        output_df[column] = hashes[column].to_numpy()
+    return output_df, counts
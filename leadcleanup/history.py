@@ -0,0 +1,110 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+from leadcleanup.fileio import _json_loads
+
+logger = logging.getLogger(__name__)
+
+# JSON-array columns of the enhanced format; education entries are objects, the others plain strings
+HISTORY_COLUMNS = ('COMPANY_NAME_HISTORY', 'JOB_TITLE_HISTORY', 'EDUCATION_HISTORY')
+EDUCATION_FIELDS = ('name', 'url', 'extraction_order', 'extraction_date')
+
+
+def _item_type(column):
+    if column == 'EDUCATION_HISTORY':
+        return pa.struct([('name', pa.string()), ('url', pa.string()),
+                          ('extraction_order', pa.int64()), ('extraction_date', pa.string())])
+    return pa.string()
+
+
+def _text(value):
+    return value if value is None or isinstance(value, str) else str(value)
+
+
+def _parse(text, column):
+    """One cell's JSON array as a list, or None if it is missing or not a JSON array"""
+    try:
+        items = _json_loads(text)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(items, list):
+        return None
+    if column == 'EDUCATION_HISTORY':
+        # Keep the known fields of object entries; a bare string is taken as the school name
+        items = [item if isinstance(item, dict) else {'name': str(item)} for item in items if item is not None]
+        return [{'name': _text(item.get('name')), 'url': _text(item.get('url')),
+                 'extraction_order': item.get('extraction_order') if isinstance(item.get('extraction_order'), int) else None,
+                 'extraction_date': _text(item.get('extraction_date'))} for item in items]
+    return [_text(item) for item in items if item is not None]
+
+
+def parse_history(series, column):
+    """
+    Decode a JSON-array history column into a list Series.
+
+    Each distinct cell is parsed once (with orjson when installed). With
+    pyarrow the result is an Arrow list column (list<string>, or
+    list<struct> for EDUCATION_HISTORY), one buffer for the whole column
+    instead of a Python list per row; without it, an object Series of lists.
+    Missing and malformed cells become missing.
+    """
+    codes, uniques = pd.factorize(series)
+    parsed = [_parse(text, column) for text in uniques]
+    if pa is not None:
+        lists = pa.array(parsed, type=pa.list_(_item_type(column)))
+        lists = lists.take(pa.array(codes, mask=codes < 0))
+        result = pd.Series(pd.arrays.ArrowExtensionArray(lists), index=series.index, name=series.name)
+    else:
+        # Code -1 (missing) picks the trailing None
+        result = pd.Series(np.array(parsed + [None], dtype=object)[codes], index=series.index, name=series.name)
+    logger.info(f"Parsed {column}: {len(uniques):,} distinct values over {len(series):,} rows")
+    return result
+
+
+def parse_history_columns(df, columns=HISTORY_COLUMNS):
+    """
+    Parsed history columns of df as a separate frame, for the columns present.
+
+    The raw JSON text in df is left as it is, so exports are unchanged and
+    nothing is parsed unless a caller asks for it.
+    """
+    return pd.DataFrame({column: parse_history(df[column], column) for column in columns if column in df.columns},
+                        index=df.index)
+
+
+def history_contains(parsed, text, field=None):
+    """
+    Boolean mask of rows with an entry containing text (case-insensitive).
+
+    parsed is a Series from parse_history; field picks a struct field such
+    as 'name' for EDUCATION_HISTORY. E.g. "worked at Acme" is
+    history_contains(companies, 'acme').
+    """
+    mask = np.zeros(len(parsed), dtype=bool)
+    if pa is not None and isinstance(parsed.dtype, pd.ArrowDtype):
+        lists = pa.array(parsed)
+        if isinstance(lists, pa.ChunkedArray):
+            lists = lists.combine_chunks()
+        items = pc.list_flatten(lists)
+        if field is not None:
+            items = pc.struct_field(items, field)
+        rows = pc.list_parent_indices(lists).to_numpy()
+        hit = pc.fill_null(pc.match_substring(items, text, ignore_case=True), False).to_numpy(zero_copy_only=False)
+        mask[rows[hit]] = True
+        return pd.Series(mask, index=parsed.index)
+
+    text = text.lower()
+    for position, items in enumerate(parsed.to_numpy(dtype=object)):
+        if items is None or (not isinstance(items, list) and pd.isna(items)):
+            continue
+        values = [item.get(field) if field is not None else item for item in items]
+        mask[position] = any(value is not None and text in str(value).lower() for value in values)
+    return pd.Series(mask, index=parsed.index)
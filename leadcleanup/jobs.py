@@ -0,0 +1,168 @@
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def job_key(upload_hash, option, settings=None):
+    """Stable key for one piece of work: the uploaded bytes, the option and every setting that changes the result"""
+    payload = json.dumps([upload_hash, option, settings or {}], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class Job:
+    """A unit of background work and its progress, result or error"""
+
+    def __init__(self, key, description="", cache=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.description = description
+        self.status = 'queued'
+        self.progress = 0.0
+        self.message = "Queued"
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+        self._result = None
+        self._cache = cache
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def result(self):
+        """The function's return value; None while running, after a failure or once evicted from the cache"""
+        if self._cache is not None and self._result is None:
+            return self._cache.get(self.key) if self.status == 'done' else None
+        return self._result
+
+    @property
+    def evicted(self):
+        """Finished, but the result cache has since dropped the result"""
+        return (self.status == 'done' and self._cache is not None and self._result is None
+                and self.key not in self._cache)
+
+    def report(self, fraction, message=None):
+        """Progress callback handed to the job function"""
+        self.progress = max(0.0, min(1.0, float(fraction)))
+        if message:
+            self.message = message
+
+    def wait(self, timeout=None):
+        """Block until the job finishes or the timeout passes; returns whether it finished"""
+        return self._done.wait(timeout)
+
+    def _run(self, func, args, kwargs):
+        self.status = 'running'
+        self.message = "Running"
+        try:
+            result = func(*args, progress=self.report, **kwargs)
+            if self._cache is not None:
+                self._cache.put(self.key, result)
+            if self._cache is None or self.key not in self._cache:
+                # Larger than the whole cache budget; keep it with the job so the caller still gets it
+                self._result = result
+            self.status = 'done'
+            self.progress = 1.0
+            self.message = "Done"
+        except Exception as e:
+            logger.exception(f"Job {self.id} ({self.description}) failed")
+            self.status = 'failed'
+            self.error = str(e)
+            self.message = f"Failed: {e}"
+        finally:
+            self.finished = time.time()
+            self._done.set()
+
+
+class JobManager:
+    """
+    Runs processing off the Streamlit script thread.
+
+    Jobs are keyed by job_key(), so submitting the same upload, option and
+    settings again returns the running or finished job instead of redoing
+    the work; a rerun caused by an unrelated widget (e.g. the output format)
+    just picks up the stored result. Failed jobs are retried on the next
+    submit. Only the most recent max_finished finished jobs are kept.
+
+    With a ResultCache, results are held there instead of on the job, so
+    their memory counts against the cache budget; a job whose result was
+    evicted runs again on the next submit. on_evict, if given, is called
+    with each finished job that is dropped, e.g. to delete files it wrote.
+    """
+
+    def __init__(self, max_workers=2, max_finished=16, cache=None, on_evict=None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="leadcleanup-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_finished = max_finished
+        self.cache = cache
+        self.on_evict = on_evict
+
+    def submit(self, key, func, *args, description="", **kwargs):
+        """
+        Run func(*args, progress=callback, **kwargs) in the background unless a
+        job with this key is already running or finished.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != 'failed' and not job.evicted:
+                self._jobs.move_to_end(key)
+                return job
+
+            job = Job(key, description, self.cache)
+            self._jobs[key] = job
+            evicted = self._evict()
+        if self.on_evict is not None:
+            for old in evicted:
+                self.on_evict(old)
+        self._executor.submit(job._run, func, args, kwargs)
+        logger.info(f"Submitted job {job.id}: {description}")
+        return job
+
+    def find(self, key):
+        return self._jobs.get(key)
+
+    def get(self, job_id):
+        for job in list(self._jobs.values()):
+            if job.id == job_id:
+                return job
+        return None
+
+    def jobs(self):
+        """All tracked jobs, oldest first"""
+        return list(self._jobs.values())
+
+    def counts(self):
+        """Number of tracked jobs in each status"""
+        counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+        for job in list(self._jobs.values()):
+            counts[job.status] += 1
+        return counts
+
+    def pending(self):
+        """Jobs waiting for or holding a worker"""
+        counts = self.counts()
+        return counts['queued'] + counts['running']
+
+    def discard(self, key):
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def _evict(self):
+        """Drop the oldest finished jobs beyond max_finished; returns the dropped jobs"""
+        finished = [key for key, job in self._jobs.items() if job.done]
+        evicted = []
+        for key in finished[:max(0, len(finished) - self.max_finished)]:
+            evicted.append(self._jobs.pop(key))
+            if self.cache is not None:
+                self.cache.discard(key)
+        return evicted
@@ -0,0 +1,381 @@
+import logging
+import numpy as np
+import pandas as pd
+
+from leadcleanup.cleaning import clean_address, validate_phone
+from leadcleanup.columns import fill_missing, join_columns
+from leadcleanup.dedup import company_cluster_ids, fuzzy_duplicate_clusters
+from leadcleanup.dnc import clean_dnc_phones, phone_dnc_pairs
+from leadcleanup.hashing import audience_hashes
+from leadcleanup.history import history_contains, parse_history
+from leadcleanup.partitioning import PartitionIndex, geographic_partitions
+from leadcleanup.pipeline import Plan, DropMissing, FillMissing, MapUnique, JoinColumns, RenderTemplate
+from leadcleanup.templates import DATA_TEMPLATES, compile_template
+
+logger = logging.getLogger(__name__)
+
+# Options that can run without the Streamlit UI, e.g. from the command line
+HEADLESS_OPTIONS = (
+    "Address + HoNWIncome",
+    "Address + HoNWIncome & Phone",
+    "Address + HoNWIncome First Name Last Name",
+    "ZIP Split: Address+HoNW",
+    "ZIP Split: Address+HoNW+Phone",
+    "Split by State",
+    "Hierarchical Split: State → ZIP3 → ZIP5",
+    "Filter by Zip Codes",
+    "Business Address + First Name Last Name",
+    "Full Combined Address",
+    "Phone & Credit Score",
+    "Complete Contact Export",
+    "B2B Job Titles Focus",
+    "Company Industry",
+    "Duplicate Analysis & Frequency Counter",
+    "Sha256",
+    "DNC Phone Number Cleaner",
+    "File Combiner and Batcher",
+)
+
+# Duplicate Analysis methods: headless name -> the app's label
+DUPLICATE_METHODS = {
+    'exact': "All columns (exact match)",
+    'columns': "Selected columns only",
+    'fuzzy': "Fuzzy Duplicate Resolution",
+}
+
+
+def build_address_plan(data_template, outputs, clean_addresses=True, format_phones=False):
+    """
+    Plan for options that output an ADDRESS and a templated DATA column.
+
+    Only the columns the outputs depend on are read, clean_address and
+    validate_phone run once per distinct value, and intermediates such as
+    PERSONAL_ADDRESS_CLEAN are dropped as soon as ADDRESS is built.
+    """
+    stages = []
+    if clean_addresses:
+        stages.append(DropMissing('PERSONAL_ADDRESS'))
+        stages.append(MapUnique('PERSONAL_ADDRESS', clean_address, 'PERSONAL_ADDRESS_CLEAN'))
+    address_column = 'PERSONAL_ADDRESS_CLEAN' if clean_addresses else 'PERSONAL_ADDRESS'
+
+    if 'MOBILE_PHONE' in data_template.columns or 'MOBILE_PHONE' in outputs:
+        stages.append(FillMissing({'MOBILE_PHONE': '', 'DNC': 'N'}))
+        if format_phones:
+            stages.append(MapUnique('MOBILE_PHONE', validate_phone))
+
+    stages.append(JoinColumns('ADDRESS', [address_column, 'PERSONAL_CITY', 'PERSONAL_STATE']))
+    stages.append(RenderTemplate('DATA', data_template))
+    return Plan(stages, outputs)
+
+
+def parse_zip_codes(text):
+    """Split a free-form list of ZIP codes on commas and whitespace, keeping the first 5 digits"""
+    return [z.strip()[:5] for z in str(text).replace(",", " ").split() if z.strip()]
+
+
+def clean_address_rows(df, clean_addresses=True, workers=1, progress=None):
+    """Drop rows without an address and add PERSONAL_ADDRESS_CLEAN, keeping every column"""
+    if not clean_addresses:
+        return df
+    plan = Plan([
+        DropMissing('PERSONAL_ADDRESS'),
+        MapUnique('PERSONAL_ADDRESS', clean_address, 'PERSONAL_ADDRESS_CLEAN'),
+    ], list(dict.fromkeys(list(df.columns) + ['PERSONAL_ADDRESS_CLEAN'])))
+    return plan.execute(df, workers=workers, progress=progress)[0]
+
+
+def batches(frame, name, batch_size):
+    """[(name, frame)] when it fits in batch_size rows, else name_part_1, name_part_2, ..."""
+    if not batch_size or len(frame) <= batch_size:
+        return [(name, frame)]
+    return [(f"{name}_part_{i + 1}", frame.iloc[start:start + batch_size])
+            for i, start in enumerate(range(0, len(frame), batch_size))]
+
+
+def format_phone_columns(df, columns):
+    """Run validate_phone over the given columns of df in place, once per distinct value"""
+    for column in columns:
+        if column in df.columns:
+            MapUnique(column, validate_phone).run(df)
+    return df
+
+
+def _map_present(series, func):
+    """func applied to the non-missing values of series, once per distinct value; missing values stay"""
+    codes, uniques = pd.factorize(series, sort=False)
+    mapped = np.array([func(value) for value in uniques] + [None], dtype=object)
+    return pd.Series(np.where(codes >= 0, mapped[codes], series.to_numpy(dtype=object)), index=series.index)
+
+
+FULL_ADDRESS_PHONE_COLUMNS = ['MOBILE_PHONE', 'DIRECT_NUMBER', 'PERSONAL_PHONE']
+
+
+def full_combined_address(df, format_phones=True):
+    """
+    Names, address parts, phones, demographics and emails of each person.
+
+    Expects clean_address_rows to have run if addresses should be cleaned;
+    PERSONAL_ADDRESS_CLEAN is used instead of PERSONAL_ADDRESS when present.
+    """
+    output_columns = ['FIRST_NAME', 'LAST_NAME']
+    output_columns.append('PERSONAL_ADDRESS_CLEAN' if 'PERSONAL_ADDRESS_CLEAN' in df.columns else 'PERSONAL_ADDRESS')
+    output_columns += ['PERSONAL_CITY', 'PERSONAL_STATE', 'PERSONAL_ZIP', 'PERSONAL_ZIP4']
+    output_columns += FULL_ADDRESS_PHONE_COLUMNS
+    output_columns += ['AGE_RANGE', 'GENDER', 'HOMEOWNER', 'NET_WORTH', 'INCOME_RANGE', 'MARRIED', 'CHILDREN']
+    output_columns += ['PRIMARY_EMAIL', 'SECONDARY_EMAIL', 'PERSONAL_EMAILS', 'BUSINESS_EMAIL']
+    output_df = df[[column for column in output_columns if column in df.columns]].copy()
+    if format_phones:
+        format_phone_columns(output_df, FULL_ADDRESS_PHONE_COLUMNS)
+    return output_df
+
+
+def phone_credit_score(df, format_phones=True):
+    """Names, address parts, phones, credit rating and DNC flag of each person (see full_combined_address)"""
+    output_columns = ['FIRST_NAME', 'LAST_NAME']
+    output_columns.append('PERSONAL_ADDRESS_CLEAN' if 'PERSONAL_ADDRESS_CLEAN' in df.columns else 'PERSONAL_ADDRESS')
+    output_columns += ['PERSONAL_CITY', 'PERSONAL_STATE', 'PERSONAL_ZIP']
+    output_columns += FULL_ADDRESS_PHONE_COLUMNS
+    output_columns += ['SKIPTRACE_CREDIT_RATING', 'DNC']
+    output_df = df[[column for column in output_columns if column in df.columns]].copy()
+    if format_phones:
+        format_phone_columns(output_df, FULL_ADDRESS_PHONE_COLUMNS)
+    return output_df
+
+
+CONTACT_PHONE_COLUMNS = ['MOBILE_PHONE', 'DIRECT_NUMBER', 'PERSONAL_PHONE', 'COMPANY_PHONE']
+
+
+def complete_contact_export(df, clean_addresses=True, format_phones=True):
+    """Every column, with personal and company addresses cleaned in place and phones formatted"""
+    output_df = df.copy()
+    if clean_addresses:
+        for column in ('PERSONAL_ADDRESS', 'COMPANY_ADDRESS'):
+            if column in output_df.columns:
+                output_df[column] = _map_present(output_df[column], clean_address)
+    if format_phones:
+        format_phone_columns(output_df, CONTACT_PHONE_COLUMNS)
+    return output_df
+
+
+def business_address_columns(df):
+    """
+    (address, city, state, zip) columns of the business address, preferring
+    COMPANY_* over PROFESSIONAL_*; parts that are missing are None.
+    """
+    for prefix in ('COMPANY', 'PROFESSIONAL'):
+        if f'{prefix}_ADDRESS' in df.columns:
+            return tuple([f'{prefix}_ADDRESS'] + [f'{prefix}_{part}' if f'{prefix}_{part}' in df.columns else None
+                                                   for part in ('CITY', 'STATE', 'ZIP')])
+    raise ValueError("Business Address + First Name Last Name needs a COMPANY_ADDRESS or PROFESSIONAL_ADDRESS column")
+
+
+def business_address_names(df, clean_addresses=True):
+    """Names with a joined (and optionally cleaned) BUSINESS_ADDRESS plus company, title and industry"""
+    address_col, city_col, state_col, zip_col = business_address_columns(df)
+    df = df[df[address_col].notna()].copy()
+    if clean_addresses:
+        df['BUSINESS_ADDRESS_CLEAN'] = _map_present(df[address_col], clean_address)
+        address_col = 'BUSINESS_ADDRESS_CLEAN'
+    df['BUSINESS_ADDRESS'] = join_columns(df, [column for column in (address_col, city_col, state_col, zip_col) if column])
+    output_columns = ['FIRST_NAME', 'LAST_NAME', 'BUSINESS_ADDRESS'] + \
+        [column for column in ('COMPANY_NAME', 'JOB_TITLE', 'COMPANY_INDUSTRY') if column in df.columns]
+    return df[output_columns].copy()
+
+
+B2B_COLUMNS = ['FIRST_NAME', 'LAST_NAME', 'JOB_TITLE', 'COMPANY_NAME', 'COMPANY_INDUSTRY', 'DEPARTMENT',
+               'SENIORITY_LEVEL', 'LINKEDIN_URL', 'BUSINESS_EMAIL', 'COMPANY_DOMAIN', 'COMPANY_PHONE', 'COMPANY_ADDRESS']
+
+
+def b2b_job_titles(df, cluster_companies=False):
+    """
+    People with a job title and their B2B columns. Returns (frame, cluster
+    stats or None); cluster_companies adds COMPANY_CLUSTER_ID.
+    """
+    b2b_df = df[df['JOB_TITLE'].notna() & (df['JOB_TITLE'] != '')]
+    output_df = b2b_df[[column for column in B2B_COLUMNS if column in b2b_df.columns]].copy()
+    cluster_stats = None
+    if cluster_companies:
+        output_df['COMPANY_CLUSTER_ID'], cluster_stats = company_cluster_ids(output_df)
+    return output_df, cluster_stats
+
+
+def filter_industries(df, industries=None, history_terms=None, cluster_companies=False, parsed_history=None):
+    """
+    Rows in any of the given COMPANY_INDUSTRY values whose history matches every term.
+
+    history_terms maps history columns to a text the column must contain
+    (EDUCATION_HISTORY is matched on the school name); parsed_history(column)
+    returns the parsed column, by default parsing it here. Returns (frame,
+    cluster stats or None).
+    """
+    mask = np.ones(len(df), dtype=bool)
+    if industries:
+        mask &= df['COMPANY_INDUSTRY'].isin(industries).to_numpy()
+    for column, term in (history_terms or {}).items():
+        if term and column in df.columns:
+            parsed = parsed_history(column) if parsed_history else parse_history(df[column], column)
+            field = 'name' if column == 'EDUCATION_HISTORY' else None
+            mask &= history_contains(parsed, term, field=field).to_numpy()
+    filtered_df = df[mask]
+    cluster_stats = None
+    if cluster_companies:
+        filtered_df = filtered_df.copy()
+        filtered_df['COMPANY_CLUSTER_ID'], cluster_stats = company_cluster_ids(filtered_df)
+    return filtered_df, cluster_stats
+
+
+def duplicate_frequencies(df, method='exact', columns=None, threshold=0.88, least_frequent_first=False):
+    """
+    One row per distinct record with a leading FREQUENCY_COUNT column.
+
+    method is a DUPLICATE_METHODS key: 'exact' compares every column,
+    'columns' only the given ones and 'fuzzy' clusters the same person
+    across name and address variants (adding DUPLICATE_CLUSTER_ID). Returns
+    (frame, fuzzy match stats or None).
+    """
+    analysis_df = df.copy()
+    fuzzy_stats = None
+    if method == 'fuzzy':
+        cluster_ids, fuzzy_stats = fuzzy_duplicate_clusters(analysis_df, threshold=threshold,
+                                                            address_normalizer=clean_address)
+        analysis_df['DUPLICATE_CLUSTER_ID'] = cluster_ids
+        keys, subset = cluster_ids, ['DUPLICATE_CLUSTER_ID']
+    elif method == 'columns':
+        if not columns:
+            raise ValueError("Duplicate Analysis on selected columns needs at least one column")
+        missing = [column for column in columns if column not in df.columns]
+        if missing:
+            raise ValueError(f"Columns not found: {', '.join(missing)}")
+        subset = list(columns)
+        if len(subset) == 1:
+            keys = fill_missing(analysis_df[subset[0]], 'MISSING').astype(str)
+        else:
+            keys = join_columns(analysis_df[subset], subset, sep='|', na_rep='MISSING')
+    elif method == 'exact':
+        subset = None
+        keys = join_columns(analysis_df, analysis_df.columns, sep='|', na_rep='MISSING')
+    else:
+        raise ValueError(f"Unknown duplicate method {method!r}; choose one of: {', '.join(DUPLICATE_METHODS)}")
+
+    analysis_df['FREQUENCY_COUNT'] = keys.map(keys.value_counts())
+    unique_df = analysis_df.drop_duplicates(subset=subset, keep='first')
+    unique_df = unique_df.sort_values('FREQUENCY_COUNT', ascending=least_frequent_first)
+    ordered = ['FREQUENCY_COUNT'] + [column for column in unique_df.columns if column != 'FREQUENCY_COUNT']
+    return unique_df[ordered].reset_index(drop=True), fuzzy_stats
+
+
+def combine_frames(frames):
+    """Stack normalized frames from several files into one"""
+    return pd.concat(list(frames), ignore_index=True)
+
+
+def run_option(df, option, clean_addresses=True, format_phones=True, batch_size=2000,
+               zip_codes=None, min_group_size=25, data_template=None, workers=1, progress=None,
+               identifiers=('EMAIL',), hash_types=('SHA256',), upload_batch_size=100000,
+               industries=None, history_terms=None, cluster_companies=False,
+               duplicate_method='exact', duplicate_columns=None, fuzzy_threshold=0.88, least_frequent_first=False):
+    """
+    Run one processing option on a normalized frame without any UI.
+
+    Returns a list of (file name, frame) pairs named the way the app names
+    its downloads; names may contain '/' for nested folders. workers > 1
+    spreads the row-wise cleaning of large frames over that many processes,
+    and progress is called with (fraction, message) as the plan advances.
+    The remaining arguments are the inputs the app asks for per option:
+    identifiers, hash_types and upload_batch_size for Sha256, industries and
+    history_terms for Company Industry, cluster_companies for it and B2B
+    Job Titles Focus, and the duplicate_* settings for Duplicate Analysis.
+    File Combiner and Batcher expects the files already stacked with
+    combine_frames and splits the result into batch_size files.
+    """
+    if option not in HEADLESS_OPTIONS:
+        raise ValueError(f"Option '{option}' is not available headless; choose one of: {', '.join(HEADLESS_OPTIONS)}")
+
+    if option in DATA_TEMPLATES:
+        template = compile_template(data_template or DATA_TEMPLATES[option])
+
+    if option in ("Address + HoNWIncome", "Address + HoNWIncome & Phone", "Address + HoNWIncome First Name Last Name"):
+        if option == "Address + HoNWIncome First Name Last Name":
+            outputs, name = ['FIRST_NAME', 'LAST_NAME', 'ADDRESS', 'DATA'], "address_honwincome_names"
+        elif option == "Address + HoNWIncome & Phone":
+            outputs, name = ['ADDRESS', 'DATA'], "address_honwincome_phone"
+        else:
+            outputs, name = ['ADDRESS', 'DATA'], "address_honwincome"
+        plan = build_address_plan(template, outputs, clean_addresses, format_phones)
+        return [(name, plan.execute(df, workers=workers, progress=progress)[0])]
+
+    if option == "ZIP Split: Address+HoNW":
+        plan = build_address_plan(template, ['ADDRESS', 'DATA', 'PERSONAL_ZIP'], clean_addresses)
+        df = plan.execute(df, workers=workers, progress=progress)[0]
+        if zip_codes:
+            df['PERSONAL_ZIP'] = df['PERSONAL_ZIP'].fillna('').astype(str).str.strip()
+            df = df[df['PERSONAL_ZIP'].str[:5].isin(zip_codes)]
+        zip_index = PartitionIndex.build(df, 'PERSONAL_ZIP')
+        return [(f"zip_{zip_code}", group) for zip_code, group in zip_index.frames(df, columns=['ADDRESS', 'DATA'])]
+
+    if option == "ZIP Split: Address+HoNW+Phone":
+        plan = build_address_plan(template, ['ADDRESS', 'DATA'], clean_addresses, format_phones)
+        output_df = plan.execute(df, workers=workers, progress=progress)[0]
+        return batches(output_df, "address_honwincome_phone", batch_size)
+
+    if option == "Split by State":
+        df = clean_address_rows(df, clean_addresses, workers, progress)
+        state_index = PartitionIndex.build(df, 'PERSONAL_STATE')
+        return [(f"state_{str(state).strip()}", group) for state, group in state_index.frames(df)
+                if str(state).strip() != '']
+
+    if option == "Hierarchical Split: State → ZIP3 → ZIP5":
+        df = clean_address_rows(df, clean_addresses, workers, progress)
+        partitions = geographic_partitions(df, min_group_size=min_group_size, batch_size=batch_size)
+        return [(path, df.iloc[positions]) for path, _, positions in partitions]
+
+    if option == "Business Address + First Name Last Name":
+        return [("business_address_names", business_address_names(df, clean_addresses))]
+
+    if option == "Full Combined Address":
+        df = clean_address_rows(df, clean_addresses, workers, progress)
+        return [("full_combined_address", full_combined_address(df, format_phones))]
+
+    if option == "Phone & Credit Score":
+        df = clean_address_rows(df, clean_addresses, workers, progress)
+        return [("phone_credit_score", phone_credit_score(df, format_phones))]
+
+    if option == "Complete Contact Export":
+        return [("complete_contact_export", complete_contact_export(df, clean_addresses, format_phones))]
+
+    if option == "B2B Job Titles Focus":
+        return [("b2b_job_titles", b2b_job_titles(df, cluster_companies)[0])]
+
+    if option == "Company Industry":
+        if not industries and not any((history_terms or {}).values()):
+            raise ValueError("Company Industry needs at least one industry or career history filter")
+        return [("filtered_by_industry", filter_industries(df, industries, history_terms, cluster_companies)[0])]
+
+    if option == "Duplicate Analysis & Frequency Counter":
+        output_df = duplicate_frequencies(df, duplicate_method, duplicate_columns, fuzzy_threshold,
+                                          least_frequent_first)[0]
+        return [("duplicate_analysis_results", output_df)]
+
+    if option == "Sha256":
+        output_df = audience_hashes(df, identifiers, hash_types, progress=progress)[0]
+        return batches(output_df, "audience_hashes", upload_batch_size)
+
+    if option == "DNC Phone Number Cleaner":
+        pairs = phone_dnc_pairs(df)
+        if not pairs:
+            raise ValueError("No phone/DNC column pairs found, e.g. MOBILE_PHONE/MOBILE_PHONE_DNC")
+        return [("dnc_cleaned_simple", clean_dnc_phones(df.reset_index(drop=True), pairs, progress)[0])]
+
+    if option == "File Combiner and Batcher":
+        if batch_size and len(df) > batch_size:
+            return [(f"batch_{i + 1}", df.iloc[start:start + batch_size])
+                    for i, start in enumerate(range(0, len(df), batch_size))]
+        return [("combined_data", df)]
+
+    # Filter by Zip Codes
+    if not zip_codes:
+        raise ValueError("Filter by Zip Codes needs at least one ZIP code")
+    zip5 = df['PERSONAL_ZIP'].astype(str).str.strip().str[:5]
+    filtered_df = df[zip5.isin(zip_codes)].copy()
+    filtered_df['PERSONAL_ZIP'] = filtered_df['PERSONAL_ZIP'].astype(str)
+    return [("filtered_by_zip_codes", filtered_df)]
@@ -0,0 +1,146 @@
+import re
+import logging
+import numpy as np
+import pandas as pd
+
+from leadcleanup.columns import fill_missing
+from leadcleanup.dedup import normalize_zip5
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionIndex:
+    """
+    Map of each distinct value of a column to the positions of its rows.
+
+    Built with a single groupby pass, so summaries, archives and per-group
+    downloads can slice groups with iloc instead of rescanning the frame
+    with a boolean mask for every value. Missing values are not indexed.
+    """
+
+    def __init__(self, column, groups, n_rows):
+        self.column = column
+        self.groups = groups
+        self.n_rows = n_rows
+
+    @classmethod
+    def build(cls, df, column):
+        keys = df[column]
+        if isinstance(keys.dtype, pd.CategoricalDtype):
+            # Group on the integer codes and name the groups afterwards; -1 marks missing values,
+            # and categories with no rows (e.g. after filtering) get no group
+            codes = keys.cat.codes.to_numpy()
+            by_code = pd.Series(codes).groupby(codes, sort=False).indices
+            categories = keys.cat.categories
+            groups = dict(sorted((categories[code], positions) for code, positions in by_code.items() if code >= 0))
+        else:
+            groups = keys.groupby(keys.to_numpy(), sort=True).indices
+        logger.info(f"Built partition index on {column}: {len(groups):,} groups over {len(df):,} rows")
+        return cls(column, groups, len(df))
+
+    def __len__(self):
+        return len(self.groups)
+
+    def __contains__(self, key):
+        return key in self.groups
+
+    def keys(self):
+        """Group keys in sorted order"""
+        return list(self.groups.keys())
+
+    def counts(self):
+        """Row count per group, largest groups first"""
+        counts = pd.Series({key: len(positions) for key, positions in self.groups.items()}, dtype=np.int64)
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def summary(self, key_label):
+        """Two-column summary frame of group keys and their record counts"""
+        counts = self.counts()
+        return pd.DataFrame({key_label: counts.index, 'Record Count': counts.values})
+
+    def positions(self, key):
+        return self.groups.get(key, np.array([], dtype=np.intp))
+
+    def take(self, df, key, columns=None):
+        """Return the rows of one group, optionally limited to some columns"""
+        if len(df) != self.n_rows:
+            raise ValueError(f"Partition index on {self.column} was built for {self.n_rows:,} rows, got {len(df):,}")
+        group = df.iloc[self.positions(key)]
+        return group[columns] if columns is not None else group
+
+    def frames(self, df, columns=None, keys=None):
+        """Return (key, frame) pairs for the given keys, or all groups in key order"""
+        keys = self.keys() if keys is None else keys
+        # Project the columns once rather than once per group
+        source = df[columns] if columns is not None else df
+        return [(key, self.take(source, key)) for key in keys]
+
+
+# Level labels of geographic_partitions files, from the top of the tree down
+GEOGRAPHIC_LEVELS = ('State', 'ZIP3', 'ZIP5')
+_UNSAFE_PATH_CHARS = re.compile(r'[^A-Za-z0-9_-]+')
+
+
+def geographic_partitions(df, state_col='PERSONAL_STATE', zip_col='PERSONAL_ZIP',
+                          min_group_size=25, batch_size=2000):
+    """
+    Partition rows into a State -> ZIP3 -> ZIP5 tree in one grouping pass.
+
+    Returns a list of (path, level, positions) sorted by path, where path is
+    e.g. 'FL/330/33014'. ZIP5 groups smaller than min_group_size roll up into
+    a file for their ZIP3 ('FL/330'). ZIP3 groups smaller than
+    min_group_size, ZIP3 roll-ups that would still be smaller than that, and
+    rows without a usable ZIP go into the state file ('FL'). Levels are
+    labelled with GEOGRAPHIC_LEVELS. Files larger than batch_size are split
+    into '_part_N' batches.
+    """
+    state_level, zip3_level, zip5_level = GEOGRAPHIC_LEVELS
+    states = fill_missing(df[state_col], '').astype(str).str.strip().str.upper()
+    states = states.str.replace(_UNSAFE_PATH_CHARS, '_', regex=True).replace('', 'UNKNOWN')
+    zip5 = normalize_zip5(df[zip_col]) if zip_col in df.columns else pd.Series('', index=df.index)
+    zip3 = zip5.str[:3]
+
+    groups = pd.Series(np.arange(len(df))).groupby(
+        [states.to_numpy(), zip3.to_numpy(), zip5.to_numpy()], sort=True
+    ).indices
+
+    # Arrange the leaf groups as state -> zip3 -> zip5 -> positions
+    tree = {}
+    for (state, z3, z5), positions in groups.items():
+        tree.setdefault(state, {}).setdefault(z3, {})[z5] = positions
+
+    files = []
+    for state, zip3_groups in tree.items():
+        state_rollup = []
+        for z3, zip5_groups in zip3_groups.items():
+            zip3_size = sum(len(positions) for positions in zip5_groups.values())
+            if z3 == '' or zip3_size < min_group_size:
+                state_rollup.extend(zip5_groups.values())
+                continue
+
+            zip3_rollup = []
+            for z5, positions in zip5_groups.items():
+                if len(positions) >= min_group_size:
+                    files.append((f"{state}/{z3}/{z5}", zip5_level, positions))
+                else:
+                    zip3_rollup.append(positions)
+            # A remainder too small for its own ZIP3 file moves up to the state file
+            if zip3_rollup and sum(len(positions) for positions in zip3_rollup) >= min_group_size:
+                files.append((f"{state}/{z3}", zip3_level, np.sort(np.concatenate(zip3_rollup))))
+            else:
+                state_rollup.extend(zip3_rollup)
+
+        if state_rollup:
+            files.append((state, state_level, np.sort(np.concatenate(state_rollup))))
+
+    # Keep every file within the batch size preference
+    batched = []
+    for path, level, positions in sorted(files, key=lambda f: f[0]):
+        if len(positions) > batch_size:
+            for part, start in enumerate(range(0, len(positions), batch_size)):
+                batched.append((f"{path}_part_{part + 1}", level, positions[start:start + batch_size]))
+        else:
+            batched.append((path, level, positions))
+
+    logger.info(f"Geographic partitioning: {len(batched):,} files across {len(tree):,} states")
+    return batched
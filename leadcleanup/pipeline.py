@@ -0,0 +1,261 @@
+import abc
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from leadcleanup.columns import fill_missing, join_columns
+
+logger = logging.getLogger(__name__)
+
+# Smallest slice worth shipping to a worker process
+PARALLEL_MIN_ROWS = 20000
+
+
+class Stage(abc.ABC):
+    """
+    One step of an option's processing plan.
+
+    inputs are the columns the stage reads and output the column it writes
+    (None for filters). Stages run on a frame that holds only the columns
+    the rest of the plan still needs.
+    """
+    inputs = ()
+    output = None
+
+    @abc.abstractmethod
+    def run(self, frame):
+        """Apply the stage to frame, modifying it in place, and return the frame to continue with"""
+
+    def describe(self):
+        """Plain description of the stage, e.g. for keying cached results"""
+        return [type(self).__name__, list(self.inputs), self.output]
+
+
+class Filter(Stage):
+    """
+    A stage that keeps the rows where mask() holds. Filters at the start of
+    a plan are combined into one mask and applied with the column projection.
+    """
+
+    @abc.abstractmethod
+    def mask(self, df):
+        """Boolean array, True for the rows of df to keep"""
+
+    def run(self, frame):
+        return frame[self.mask(frame)].copy()
+
+
+class DropMissing(Filter):
+    """Keep only rows where every given column has a value"""
+
+    def __init__(self, *columns):
+        self.inputs = tuple(columns)
+
+    def mask(self, df):
+        mask = np.ones(len(df), dtype=bool)
+        for column in self.inputs:
+            if column in df.columns:
+                mask &= df[column].notna().to_numpy()
+        return mask
+
+
+class FillMissing(Stage):
+    """Replace missing values column by column, e.g. FillMissing({'DNC': 'N'})"""
+
+    def __init__(self, values):
+        self.values = dict(values)
+        self.inputs = tuple(self.values)
+
+    def run(self, frame):
+        for column, value in self.values.items():
+            if column in frame.columns:
+                frame[column] = fill_missing(frame[column], value)
+        return frame
+
+    def describe(self):
+        return super().describe() + [self.values]
+
+
+class MapUnique(Stage):
+    """
+    Apply a Python function to a column, calling it once per distinct value.
+
+    Lead files repeat cities, addresses and phone numbers heavily, so running
+    clean_address or validate_phone on the unique values and broadcasting the
+    results back is far cheaper than a row-wise apply.
+    """
+
+    def __init__(self, column, func, output=None):
+        self.inputs = (column,)
+        self.func = func
+        self.output = output or column
+        self.unique_count = 0
+
+    def run(self, frame):
+        column = self.inputs[0]
+        if column not in frame.columns:
+            return frame
+        codes, uniques = pd.factorize(frame[column], sort=False)
+        self.unique_count = len(uniques)
+        mapped = np.empty(len(uniques) + 1, dtype=object)
+        mapped[:-1] = [self.func(value) for value in uniques]
+        # Code -1 marks missing values; they index the last slot
+        mapped[-1] = self.func(np.nan) if (codes == -1).any() else ''
+        frame[self.output] = mapped[codes]
+        return frame
+
+    def describe(self):
+        return super().describe() + [f"{self.func.__module__}.{self.func.__name__}"]
+
+
+class JoinColumns(Stage):
+    """Join the available columns with a separator, skipping empty values"""
+
+    def __init__(self, output, columns, sep=', '):
+        self.output = output
+        self.inputs = tuple(columns)
+        self.sep = sep
+
+    def run(self, frame):
+        columns = [column for column in self.inputs if column in frame.columns]
+        frame[self.output] = join_columns(frame, columns, sep=self.sep)
+        return frame
+
+    def describe(self):
+        return super().describe() + [self.sep]
+
+
+class RenderTemplate(Stage):
+    """Render a compiled output template into a column"""
+
+    def __init__(self, output, template):
+        self.output = output
+        self.template = template
+        self.inputs = tuple(template.columns)
+
+    def run(self, frame):
+        frame[self.output] = self.template.render(frame)
+        return frame
+
+    def describe(self):
+        return super().describe() + [self.template.text]
+
+
+class Plan:
+    """
+    An ordered list of stages plus the columns the option returns.
+
+    execute() works out which stages and source columns the outputs actually
+    depend on, applies all leading filters together with the column
+    projection in a single take, and drops every intermediate column right
+    after its last use, so the full input frame is never copied.
+    """
+
+    def __init__(self, stages, outputs):
+        self.stages = list(stages)
+        self.outputs = list(outputs)
+
+    def describe(self):
+        """Plain description of the stages and outputs; equal plans describe equally"""
+        return {'stages': [stage.describe() for stage in self.stages], 'outputs': self.outputs}
+
+    def columns(self, available):
+        """Columns of available (in order) that the outputs depend on"""
+        _, needed = self._live_stages()
+        return [column for column in available if column in needed]
+
+    def _live_stages(self):
+        """Stages the outputs depend on, and the source columns they read"""
+        needed = set(self.outputs)
+        live = []
+        for stage in reversed(self.stages):
+            # Stages without an output (filters, in-place fills) always run
+            if stage.output is None or stage.output in needed:
+                live.append(stage)
+                needed.discard(stage.output)
+                needed.update(stage.inputs)
+        live.reverse()
+        return live, needed
+
+    def execute(self, df, workers=1, progress=None):
+        """
+        Run the plan on df, returning (output frame, stats).
+
+        With workers > 1, large frames are cut into contiguous row slices that
+        run in separate processes; the output keeps the original row order.
+        progress, if given, is called with (fraction, message) after each stage.
+        """
+        if workers > 1 and len(df) >= 2 * PARALLEL_MIN_ROWS:
+            result = self._execute_parallel(df, min(workers, len(df) // PARALLEL_MIN_ROWS))
+            if progress:
+                progress(1.0, f"Processed {len(df):,} rows on {workers} workers")
+            return result
+
+        start = time.time()
+        live, needed = self._live_stages()
+
+        # Fuse the leading filters into one mask
+        filters = []
+        while live and isinstance(live[0], Filter):
+            filters.append(live.pop(0))
+        mask = np.ones(len(df), dtype=bool)
+        for stage in filters:
+            mask &= stage.mask(df)
+
+        # Project and filter in one pass; the caller's frame is left untouched
+        source_columns = [column for column in df.columns if column in needed]
+        frame = df.loc[mask, source_columns] if not mask.all() else df[source_columns].copy()
+
+        # Last stage index at which each column is read
+        last_use = {}
+        for position, stage in enumerate(live):
+            for column in stage.inputs:
+                last_use[column] = position
+        outputs = set(self.outputs)
+
+        for position, stage in enumerate(live):
+            frame = stage.run(frame)
+            finished = [column for column, last in last_use.items()
+                        if last == position and column not in outputs and column in frame.columns]
+            if finished:
+                frame.drop(columns=finished, inplace=True)
+            if progress:
+                progress((position + 1) / len(live), f"{type(stage).__name__} {stage.output or ''}".strip())
+
+        stats = {
+            'rows_in': len(df),
+            'rows_out': len(frame),
+            'columns_read': len(source_columns),
+            'columns_total': len(df.columns),
+            'stages': len(live) + len(filters),
+            'stages_skipped': len(self.stages) - len(live) - len(filters),
+            'unique_values': {stage.output: stage.unique_count for stage in live if isinstance(stage, MapUnique)},
+            'seconds': time.time() - start,
+        }
+        logger.info(f"Plan executed: {stats}")
+        return frame[[column for column in self.outputs if column in frame.columns]], stats
+
+    def _execute_parallel(self, df, workers):
+        start = time.time()
+        # Only the columns the plan reads are sent to the workers
+        df = df[self.columns(df.columns)]
+        bounds = np.linspace(0, len(df), workers + 1).astype(int)
+        slices = [df.iloc[begin:end] for begin, end in zip(bounds[:-1], bounds[1:])]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(self.execute, slices))
+
+        frame = pd.concat([result for result, _ in results])
+        stats = dict(results[0][1])
+        for key in ('rows_in', 'rows_out'):
+            stats[key] = sum(slice_stats[key] for _, slice_stats in results)
+        # Distinct values are counted per slice, so these are upper bounds
+        stats['unique_values'] = {
+            column: sum(slice_stats['unique_values'].get(column, 0) for _, slice_stats in results)
+            for column in stats['unique_values']
+        }
+        stats['workers'] = workers
+        stats['seconds'] = time.time() - start
+        logger.info(f"Plan executed on {workers} workers: {stats}")
+        return frame, stats
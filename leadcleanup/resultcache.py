@@ -0,0 +1,177 @@
+import os
+import sys
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value):
+    """Approximate in-memory size of a cached value in bytes, counting string contents"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value.values())
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    Process-wide store for loaded frames and processing results, bounded by bytes.
+
+    Entries are sized with memory_usage(deep=True) and evicted least recently
+    used first once the total passes max_bytes. With a spill_dir, evicted
+    DataFrames are written to Parquet and read back on the next get() instead
+    of being dropped; other values are simply dropped. Spill files are
+    written after the lock is released, so a slow disk never blocks other
+    sessions' lookups. Callers must treat returned values as read-only,
+    since they are shared between sessions.
+    """
+
+    def __init__(self, max_bytes, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._entries = OrderedDict()
+        self._spilled = {}
+        # Evicted entries whose spill file is being written, keyed to a token for that eviction
+        self._pending = {}
+        self._lock = threading.RLock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.spills = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries or key in self._spilled
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            spilled = self._spilled.pop(key, None)
+            if spilled is None:
+                self.misses += 1
+                return default
+
+        path = spilled[0]
+        try:
+            value = pd.read_parquet(path)
+        except Exception as e:
+            logger.warning(f"Could not read spilled cache entry {path}: {e}")
+            with self._lock:
+                self.misses += 1
+            return default
+        finally:
+            self._remove(path)
+        with self._lock:
+            self.hits += 1
+        return self.put(key, value)
+
+    def put(self, key, value):
+        """Store value under key and return it"""
+        size = estimate_size(value)
+        evicted = []
+        with self._lock:
+            self._drop(key)
+            if size > self.max_bytes:
+                # Would evict everything else and still not fit
+                evicted.append(self._evict(key, value))
+            else:
+                self._entries[key] = (value, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes and len(self._entries) > 1:
+                    old_key, (old_value, old_size) = self._entries.popitem(last=False)
+                    self.bytes -= old_size
+                    self.evictions += 1
+                    evicted.append(self._evict(old_key, old_value))
+        # The Parquet writes happen outside the lock
+        for old_key, old_value, token in evicted:
+            self._spill(old_key, old_value, token)
+        return value
+
+    def discard(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries) + list(self._spilled) + list(self._pending):
+                self._drop(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'spilled_entries': len(self._spilled),
+                'spilled_bytes': sum(size for _, size in self._spilled.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'spills': self.spills,
+            }
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+        spilled = self._spilled.pop(key, None)
+        if spilled is not None:
+            self._remove(spilled[0])
+        # A spill still being written for this key is abandoned
+        self._pending.pop(key, None)
+
+    def _evict(self, key, value):
+        """Mark an evicted entry for spilling (called under the lock); returns (key, value, token)"""
+        if not self.spill_dir or not isinstance(value, pd.DataFrame):
+            return key, value, None
+        token = object()
+        self._pending[key] = token
+        return key, value, token
+
+    def _spill(self, key, value, token):
+        """Write an evicted DataFrame to Parquet without holding the lock, then register it"""
+        if token is None:
+            return
+        path = os.path.join(self.spill_dir, f"{uuid.uuid4().hex}.parquet")
+        try:
+            value.to_parquet(path, index=True)
+        except Exception as e:
+            # No Parquet engine, or columns Parquet cannot hold; the entry is just dropped
+            logger.warning(f"Could not spill cache entry to {path}: {e}")
+            self._remove(path)
+            with self._lock:
+                if self._pending.get(key) is token:
+                    del self._pending[key]
+            return
+        with self._lock:
+            # Only register the file if the key was not stored again or discarded meanwhile
+            if self._pending.get(key) is token:
+                del self._pending[key]
+                self._spilled[key] = (path, os.path.getsize(path))
+                self.spills += 1
+                return
+        self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
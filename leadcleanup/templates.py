@@ -0,0 +1,190 @@
+import re
+import functools
+import numpy as np
+import pandas as pd
+
+from leadcleanup.columns import fill_missing
+
+# Template syntax
+#   {COLUMN}                      value of COLUMN, missing values render as ''
+#   {? text {COLUMN} if COND}     optional segment, rendered only where COND holds
+#                                 and every column inside it is non-empty
+#   COND                          COLUMN=='value' or COLUMN!='value', joined with 'and'
+#   {+text}                       separator, rendered only where both the output so far
+#                                 and the part right after it are non-empty
+#   {!text}                       fallback, rendered only where the output so far is empty
+#   {{ and }}                     literal braces (outside optional segments)
+# Missing HoNW values are left out; rows with none of them read "No HoNWIncome data available"
+HONW_TEMPLATE = ("{?Ho {HOMEOWNER}}{+ | }{?NW {NET_WORTH}}{+ | }{?Income {INCOME_RANGE}}"
+                 "{!No HoNWIncome data available}")
+HONW_PHONE_TEMPLATE = HONW_TEMPLATE + "{? | Phone {MOBILE_PHONE} if DNC!='Y'}"
+
+# DATA column layout of each option that builds one
+DATA_TEMPLATES = {
+    "Address + HoNWIncome": HONW_TEMPLATE,
+    "Address + HoNWIncome & Phone": HONW_PHONE_TEMPLATE,
+    "Address + HoNWIncome First Name Last Name": HONW_TEMPLATE,
+    "ZIP Split: Address+HoNW": HONW_TEMPLATE,
+    "ZIP Split: Address+HoNW+Phone": HONW_PHONE_TEMPLATE,
+}
+
+_COLUMN_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+_CLAUSE = re.compile(r'''^\s*([A-Za-z_][A-Za-z0-9_]*)\s*(==|!=)\s*(['"])(.*)\3\s*$''')
+
+
+class TemplateError(ValueError):
+    """Raised when an output template cannot be parsed"""
+
+
+class OutputTemplate:
+    """
+    A parsed output template.
+
+    Rendering works on whole columns: each placeholder becomes one string
+    column, optional segments become a mask, and the pieces are concatenated
+    as arrays, so a template costs no per-row Python code.
+    """
+
+    def __init__(self, text, nodes):
+        self.text = text
+        self.nodes = nodes
+        self.columns = sorted(_referenced_columns(nodes))
+
+    def __repr__(self):
+        return f"OutputTemplate({self.text!r})"
+
+    def render(self, df):
+        """Render the template for every row of df as a string Series"""
+        cache = {}
+
+        def column_text(name):
+            if name not in cache:
+                if name in df.columns:
+                    cache[name] = fill_missing(df[name], '').astype(str).to_numpy(dtype=object)
+                else:
+                    cache[name] = np.full(len(df), '', dtype=object)
+            return cache[name]
+
+        result = _render(self.nodes, column_text, len(df))
+        return pd.Series(result, index=df.index, dtype=object)
+
+
+@functools.lru_cache(maxsize=64)
+def compile_template(text):
+    """Parse a template once; repeated calls with the same text reuse the result"""
+    nodes, pos, condition = _parse(text, 0, in_optional=False)
+    return OutputTemplate(text, tuple(nodes))
+
+
+def _parse(text, pos, in_optional):
+    nodes = []
+    literal = []
+
+    def flush():
+        if literal:
+            nodes.append(('text', ''.join(literal)))
+            literal.clear()
+
+    while pos < len(text):
+        if text.startswith('{{', pos) and not in_optional:
+            literal.append('{')
+            pos += 2
+        elif text.startswith('}}', pos) and not in_optional:
+            literal.append('}')
+            pos += 2
+        elif text.startswith('{?', pos):
+            flush()
+            body, pos, condition = _parse(text, pos + 2, in_optional=True)
+            nodes.append(('optional', tuple(body), condition))
+        elif text.startswith('{+', pos) or text.startswith('{!', pos):
+            flush()
+            end = text.find('}', pos)
+            if end == -1:
+                raise TemplateError(f"Unclosed {text[pos:pos + 2]!r} at position {pos}")
+            if '{' in text[pos + 2:end]:
+                raise TemplateError(f"Placeholders are not allowed in {text[pos:pos + 2]!r} at position {pos}")
+            nodes.append(('separator' if text[pos + 1] == '+' else 'fallback', text[pos + 2:end]))
+            pos = end + 1
+        elif text[pos] == '{':
+            flush()
+            end = text.find('}', pos)
+            if end == -1:
+                raise TemplateError(f"Unclosed placeholder at position {pos}")
+            name = text[pos + 1:end].strip()
+            if not _COLUMN_NAME.match(name):
+                raise TemplateError(f"Invalid column name {name!r} at position {pos}")
+            nodes.append(('field', name))
+            pos = end + 1
+        elif text[pos] == '}':
+            if not in_optional:
+                raise TemplateError(f"Unmatched '}}' at position {pos}")
+            flush()
+            return nodes, pos + 1, ()
+        elif in_optional and text.startswith(' if ', pos):
+            flush()
+            end = text.find('}', pos)
+            if end == -1:
+                raise TemplateError(f"Unclosed optional segment at position {pos}")
+            return nodes, end + 1, _parse_condition(text[pos + 4:end])
+        else:
+            literal.append(text[pos])
+            pos += 1
+
+    if in_optional:
+        raise TemplateError("Unclosed optional segment")
+    flush()
+    return nodes, pos, ()
+
+
+def _parse_condition(text):
+    clauses = []
+    for clause in re.split(r'\s+and\s+', text.strip()):
+        match = _CLAUSE.match(clause)
+        if not match:
+            raise TemplateError(f"Invalid condition {clause!r}; expected COLUMN=='value' or COLUMN!='value'")
+        column, operator, _, value = match.groups()
+        clauses.append((column, operator, value))
+    return tuple(clauses)
+
+
+def _referenced_columns(nodes):
+    columns = set()
+    for node in nodes:
+        if node[0] == 'field':
+            columns.add(node[1])
+        elif node[0] == 'optional':
+            columns |= _referenced_columns(node[1])
+            columns |= {column for column, _, _ in node[2]}
+    return columns
+
+
+def _render(nodes, column_text, n_rows):
+    result = np.full(n_rows, '', dtype=object)
+    position = 0
+    while position < len(nodes):
+        node = nodes[position]
+        kind = node[0]
+        position += 1
+        if kind == 'separator':
+            # Rendered ahead, so the separator only goes between two non-empty parts
+            following = _render(nodes[position:position + 1], column_text, n_rows)
+            position += 1
+            result = result + np.where((result != '') & (following != ''), node[1], '').astype(object) + following
+        elif kind == 'fallback':
+            result = result + np.where(result == '', node[1], '').astype(object)
+        elif kind == 'text':
+            result = result + node[1]
+        elif kind == 'field':
+            result = result + column_text(node[1])
+        else:
+            _, body, condition = node
+            mask = np.ones(n_rows, dtype=bool)
+            for column, operator, value in condition:
+                matches = column_text(column) == value
+                mask &= matches if operator == '==' else ~matches
+            # An optional segment is dropped where any of its own columns is empty
+            for child in body:
+                if child[0] == 'field':
+                    mask &= column_text(child[1]) != ''
+            result = result + np.where(mask, _render(body, column_text, n_rows), '').astype(object)
+    return result
@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import shutil
+import asyncio
+import zipfile
+
+import pytest
+
+from leadcleanup.api import ApiMetrics, _settings_from_query, create_app, process_upload
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, 'new_input.csv')
+
+
+def test_query_parameters_mirror_the_cli_flags():
+    settings = _settings_from_query({
+        'format': 'Parquet', 'batch_size': '500', 'zip_codes': '33014,90210', 'clean_addresses': 'no',
+        'identifiers': 'email, phone', 'hash_types': 'md5', 'industries': 'Banking,Software',
+        'worked_at': 'acme', 'duplicate_method': 'FUZZY', 'least_frequent_first': 'true',
+    })
+    option = settings['option']
+    assert settings['format'] == 'parquet'
+    assert option['batch_size'] == 500
+    assert option['zip_codes'] == ['33014', '90210']
+    assert option['clean_addresses'] is False and option['format_phones'] is True
+    assert option['identifiers'] == ('EMAIL', 'PHONE') and option['hash_types'] == ('MD5',)
+    assert option['industries'] == ['Banking', 'Software']
+    assert option['history_terms'] == {'COMPANY_NAME_HISTORY': 'acme'}
+    assert option['duplicate_method'] == 'fuzzy' and option['least_frequent_first'] is True
+
+
+@pytest.mark.parametrize('params', [
+    {'batch_size': 'many'}, {'hash_types': 'crc32'}, {'identifiers': 'fax'}, {'duplicate_method': 'nearby'},
+])
+def test_invalid_query_parameters_raise_value_error(params):
+    with pytest.raises(ValueError):
+        _settings_from_query(params)
+
+
+def test_process_upload_writes_an_archive_and_removes_the_upload(tmp_path):
+    upload = tmp_path / 'upload.csv'
+    shutil.copy(SAMPLE, upload)
+    archive = tmp_path / 'result.zip'
+    metrics = ApiMetrics()
+    summary = process_upload(str(upload), str(archive), "Split by State", _settings_from_query({}), metrics)
+    assert not upload.exists()
+    with zipfile.ZipFile(archive) as zf:
+        names = zf.namelist()
+    assert len(names) == summary['files'] and all(name.startswith('state_') for name in names)
+    assert metrics.snapshot()['jobs_completed'] == 1
+    assert metrics.snapshot()['rows_in'] == summary['rows_in'] == 14
+
+
+def test_failed_uploads_are_counted_and_removed(tmp_path):
+    upload = tmp_path / 'upload.csv'
+    shutil.copy(SAMPLE, upload)
+    metrics = ApiMetrics()
+    with pytest.raises(ValueError):
+        process_upload(str(upload), str(tmp_path / 'result.zip'), "Filter by Zip Codes",
+                       _settings_from_query({}), metrics)
+    assert not upload.exists()
+    assert metrics.snapshot()['jobs_failed'] == 1
+
+
+def call(app, method, path, query='', body=b''):
+    """Send one request to the ASGI app; returns (status, JSON response)"""
+    scope = {'type': 'http', 'method': method, 'path': path, 'raw_path': path.encode(), 'root_path': '',
+             'query_string': query.encode(), 'headers': [], 'scheme': 'http', 'server': ('test', 80),
+             'client': ('test', 1), 'http_version': '1.1', 'asgi': {'version': '3.0'}}
+    chunks = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return chunks.pop(0) if chunks else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    content = b''.join(message.get('body', b'') for message in sent if message['type'] == 'http.response.body')
+    return sent[0]['status'], json.loads(content)
+
+
+def finish_uploads(data_dir):
+    """Wait until every upload in data_dir has been processed (and so removed)"""
+    for _ in range(200):
+        if not any(name.endswith('.csv') for name in os.listdir(data_dir)):
+            return
+        time.sleep(0.05)
+
+
+def test_duplicate_uploads_and_dropped_archives_are_deleted(tmp_path):
+    pytest.importorskip('starlette')
+    app = create_app(str(tmp_path), workers=1, max_queue=4)
+    with open(SAMPLE, 'rb') as f:
+        data = f.read()
+    status, first = call(app, 'POST', '/jobs', 'option=Split+by+State', data)
+    assert status == 202
+    status, again = call(app, 'POST', '/jobs', 'option=Split+by+State', data)
+    assert status == 200 and again['id'] == first['id']
+    finish_uploads(tmp_path)
+    assert [name.endswith('.zip') for name in os.listdir(tmp_path)] == [True]
+
+    # At most 16 finished jobs are kept; older ones are dropped together with their archives
+    for number in range(17):
+        call(app, 'POST', '/jobs', 'option=Split+by+State', data + f'\n{number}'.encode())
+        finish_uploads(tmp_path)
+    assert call(app, 'GET', f"/jobs/{first['id']}")[0] == 404
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.zip')]) == 17
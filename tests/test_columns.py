@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from leadcleanup.columns import join_columns, prefix_where
+
+ADDRESSES = pd.DataFrame({
+    'PERSONAL_ADDRESS': ['12 Main St', None, '', '5 Oak Ave'],
+    'PERSONAL_CITY': ['Miami', 'Tampa', 'Orlando', None],
+    'PERSONAL_ZIP': [33014, np.nan, 32801, 90210],
+}, index=[10, 11, 12, 13])
+COLUMNS = ['PERSONAL_ADDRESS', 'PERSONAL_CITY', 'PERSONAL_ZIP']
+
+
+def row_wise(df, sep=', ', na_rep=None):
+    if na_rep is None:
+        return df[COLUMNS].apply(lambda row: sep.join([str(x) for x in row if pd.notna(x) and x != '']), axis=1)
+    return df[COLUMNS].apply(lambda row: sep.join([str(x) if pd.notna(x) else na_rep for x in row]), axis=1)
+
+
+@pytest.mark.parametrize('dtype', [None, 'string[pyarrow]', 'category'])
+def test_join_columns_matches_the_row_wise_join(dtype):
+    df = ADDRESSES.copy()
+    if dtype is not None:
+        df[['PERSONAL_ADDRESS', 'PERSONAL_CITY']] = df[['PERSONAL_ADDRESS', 'PERSONAL_CITY']].astype(dtype)
+    result = join_columns(df, COLUMNS)
+    assert result.tolist() == row_wise(ADDRESSES).tolist()
+    assert result.tolist() == ['12 Main St, Miami, 33014.0', 'Tampa', 'Orlando, 32801.0', '5 Oak Ave, 90210.0']
+    assert result.index.equals(df.index)
+
+
+def test_join_columns_with_na_rep_keeps_every_value():
+    result = join_columns(ADDRESSES, COLUMNS, sep='|', na_rep='MISSING')
+    assert result.tolist() == row_wise(ADDRESSES, sep='|', na_rep='MISSING').tolist()
+    assert result[11] == 'MISSING|Tampa|MISSING'
+
+
+def test_prefix_where():
+    phones = pd.Series(['3055550100', '3055550101'], index=[5, 6])
+    result = prefix_where(phones, [True, False], ' | Phone ')
+    assert result.tolist() == [' | Phone 3055550100', '']
+    assert result.index.equals(phones.index)
@@ -0,0 +1,74 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from leadcleanup.datasets import Dataset, DatasetStore, content_hash, dataset_id
+
+pytest.importorskip('pyarrow')
+
+LEADS = pd.DataFrame({
+    'FIRST_NAME': ['Jennifer', 'Carlos', None],
+    'PERSONAL_ZIP': [33014, 2134, 90210],
+})
+
+
+def test_content_hash_separates_file_boundaries():
+    assert content_hash(b'ab', b'c') != content_hash(b'a', b'bc')
+    assert content_hash(b'leads') == content_hash(b'leads')
+
+
+def test_dataset_ids_key_caches():
+    dataset = Dataset(content_hash(b'leads'), LEADS)
+    assert dataset_id(dataset) == dataset.id == content_hash(b'leads')
+    assert len(dataset) == 3
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    assert store.save('abc', LEADS, {'format': 'new'})
+    assert 'abc' in store
+    df, meta = store.load('abc')
+    assert meta == {'format': 'new'}
+    assert df['FIRST_NAME'].tolist()[:2] == ['Jennifer', 'Carlos'] and pd.isna(df['FIRST_NAME'][2])
+    assert df['PERSONAL_ZIP'].tolist() == [33014, 2134, 90210]
+    assert store.load('abc', columns=['PERSONAL_ZIP', 'NOT_THERE'])[0].columns.tolist() == ['PERSONAL_ZIP']
+
+
+def test_missing_datasets_load_as_none(tmp_path):
+    assert DatasetStore(str(tmp_path)).load('missing') is None
+
+
+def test_unstorable_frames_leave_no_files(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    mixed = pd.DataFrame({'VALUE': [1, 'one', 1.5]})
+    assert not store.save('mixed', mixed)
+    assert os.listdir(tmp_path) == []
+
+
+def test_least_recently_used_datasets_are_pruned(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    store.save('old', LEADS)
+    size = os.path.getsize(tmp_path / 'old.arrow')
+    store.max_bytes = int(size * 1.5)
+    past = time.time() - 60
+    os.utime(tmp_path / 'old.arrow', (past, past))
+    store.save('new', LEADS)
+    assert 'new' in store and 'old' not in store
+
+
+def test_text_columns_load_as_memory_mapped_arrow_strings(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    df = pd.DataFrame({
+        'FIRST_NAME': ['Jennifer', None],
+        'HOMEOWNER': pd.Categorical(['Y', 'N']),
+        'EMPTY': [None, None],
+    })
+    store.save('abc', df)
+    loaded, _ = store.load('abc')
+    assert loaded['FIRST_NAME'].dtype == pd.StringDtype('pyarrow')
+    assert loaded['EMPTY'].dtype == pd.StringDtype('pyarrow')
+    assert isinstance(loaded['HOMEOWNER'].dtype, pd.CategoricalDtype)
+    assert loaded['HOMEOWNER'].tolist() == ['Y', 'N']
+    assert loaded['FIRST_NAME'].isna().tolist() == [False, True]
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from leadcleanup.cleaning import clean_address
+from leadcleanup.dedup import (UnionFind, company_cluster_ids, company_shingles, fuzzy_duplicate_clusters,
+                               minhash_signatures, normalize_zip5, soundex)
+
+
+@pytest.mark.parametrize('name, code', [
+    ('Robert', 'R163'), ('Rupert', 'R163'), ('Ashcraft', 'A261'),
+    ('Tymczak', 'T522'), ('Pfister', 'P236'), ("O'Hara", 'O600'), ('', ''),
+])
+def test_soundex(name, code):
+    assert soundex(name) == code
+
+
+def test_normalize_zip5_accepts_numbers_and_zip4():
+    zips = pd.Series(['33014-1234', 2134, 90210.0, None, 'n/a'])
+    assert normalize_zip5(zips).tolist() == ['33014', '02134', '90210', '', '']
+
+
+def test_union_find_roots_at_earliest_position():
+    union_find = UnionFind(5)
+    union_find.union(4, 2)
+    union_find.union(2, 3)
+    assert union_find.labels().tolist() == [0, 1, 2, 2, 2]
+
+
+def test_fuzzy_clusters_group_name_and_address_variants():
+    df = pd.DataFrame({
+        'FIRST_NAME': ['John', 'Jon', 'Mary', 'John'],
+        'LAST_NAME': ['Smith', 'Smith', 'Jones', 'Smith'],
+        'PERSONAL_ADDRESS': ['12 Main Street', '12 Main St.', '99 Oak Ave', '500 Elm Road'],
+        'PERSONAL_ZIP': ['33101', '33101', '33101', '33101'],
+    })
+    clusters, stats = fuzzy_duplicate_clusters(df, threshold=0.8)
+    assert clusters[0] == clusters[1]
+    assert clusters[2] != clusters[0]
+    assert clusters[3] != clusters[0]
+    assert stats['matches'] == 1
+
+
+def test_fuzzy_clusters_match_address_spellings_with_a_normalizer():
+    df = pd.DataFrame({
+        'FIRST_NAME': ['Jennifer', 'JENNIFER'],
+        'LAST_NAME': ['Bailey', 'BAILEY'],
+        'PERSONAL_ADDRESS': ['7340 W 15th Ct', '7340 West 15th Court'],
+        'PERSONAL_ZIP': [33014, '33014-2201'],
+    })
+    clusters, _ = fuzzy_duplicate_clusters(df, threshold=0.95, address_normalizer=clean_address)
+    assert clusters.tolist() == [0, 0]
+
+
+def test_fuzzy_clusters_only_compare_within_zip_and_soundex_blocks():
+    df = pd.DataFrame({
+        'FIRST_NAME': ['Ann', 'Ann', 'Ann', 'Ann'],
+        'LAST_NAME': ['Lee', 'Lee', 'Lee', 'Lee'],
+        'PERSONAL_ADDRESS': ['1 Elm St'] * 4,
+        'PERSONAL_ZIP': ['33014', '33015', None, '33014'],
+    })
+    clusters, stats = fuzzy_duplicate_clusters(df)
+    # Other ZIPs and rows without a ZIP are never compared
+    assert clusters.tolist() == [0, 1, 2, 0]
+    assert stats['comparisons'] == 1
+
+
+def test_large_blocks_use_a_sorted_neighbourhood_window():
+    n = 60
+    df = pd.DataFrame({
+        'FIRST_NAME': [f'Person{i:03d}' for i in range(n)],
+        'LAST_NAME': ['Smith'] * n,
+        'PERSONAL_ADDRESS': [f'{i} Main St' for i in range(n)],
+        'PERSONAL_ZIP': ['33014'] * n,
+    }, index=np.arange(100, 100 + n))
+    clusters, stats = fuzzy_duplicate_clusters(df, max_block_size=10, window=5)
+    assert stats['comparisons'] <= n * 4
+    assert clusters.index.equals(df.index)
+
+
+def test_minhash_signatures_do_not_depend_on_chunking():
+    shingle_sets = [company_shingles(f'COMPANY {i}', f'company{i}.com', f'{i} MAIN ST') for i in range(50)]
+    whole = minhash_signatures(shingle_sets, num_perm=16)
+    # Chunks smaller than a single set still take one set at a time
+    chunked = minhash_signatures(shingle_sets, num_perm=16, chunk_size=7)
+    assert whole.shape == (50, 16)
+    np.testing.assert_array_equal(whole, chunked)
+
+
+def test_minhash_estimates_identical_sets_as_equal():
+    signatures = minhash_signatures([{'a', 'b', 'c'}, {'c', 'b', 'a'}, {'x', 'y', 'z'}], num_perm=32)
+    assert (signatures[0] == signatures[1]).all()
+    assert np.mean(signatures[0] == signatures[2]) < 0.5
+
+
+def test_company_clusters_merge_variants_with_stable_ids():
+    df = pd.DataFrame({
+        'COMPANY_NAME': ['Acme Widgets Inc', 'ACME Widgets, LLC', 'Globex Corporation', None],
+        'COMPANY_DOMAIN': ['https://www.acmewidgets.com/about', 'acmewidgets.com', 'globex.com', None],
+        'COMPANY_ADDRESS': ['1 Industrial Way', '1 Industrial Way', '5 Harbor Blvd', None],
+    })
+    clusters, stats = company_cluster_ids(df)
+    assert clusters[0] == clusters[1] != clusters[2]
+    assert clusters[3] == ''
+    assert stats['companies'] == 2
+    assert clusters[0].startswith('CO')
+
+    # The ID depends only on the variants, not on row order or other rows
+    reordered, _ = company_cluster_ids(df.iloc[[2, 1, 0]].reset_index(drop=True))
+    assert reordered[2] == clusters[0]
+    assert reordered[0] == clusters[2]
+
+
+def test_company_clusters_accept_separator_characters():
+    df = pd.DataFrame({
+        'COMPANY_NAME': ['A|B Holdings', 'A|B Holdings'],
+        'COMPANY_DOMAIN': ['a|b.com', 'a|b.com'],
+        'COMPANY_ADDRESS': ['1 Pipe|Lane', '1 Pipe|Lane'],
+    })
+    clusters, stats = company_cluster_ids(df)
+    assert clusters[0] == clusters[1] != ''
+    assert stats['clusters'] == 1
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from leadcleanup import columns
+from leadcleanup.columns import explode_columns, explode_list, nth_item
+from leadcleanup.emails import DomainIndex, add_email_columns, explode_emails, normalize_domains, normalize_emails
+
+PEOPLE = pd.DataFrame({
+    'DEEP_VERIFIED_EMAILS': [None, 'jen@verified.com', None],
+    'PERSONAL_EMAILS': [' Carlos@Gmail.com ,, bad@', 'JEN@example.com, jen@verified.com', np.nan],
+    'BUSINESS_EMAIL': ['carlos@acme.com', 'jlopez@acme.com', 'nobody'],
+}, index=[7, 8, 9])
+
+
+@pytest.fixture(params=['arrow', 'python'])
+def engine(request, monkeypatch):
+    if request.param == 'python':
+        monkeypatch.setattr(columns, 'pa', None)
+    elif columns.pa is None:
+        pytest.skip('pyarrow is not installed')
+    return request.param
+
+
+def test_explode_list_trims_and_drops_empty_items(engine):
+    rows, items = explode_list(pd.Series(['a, b,,', None, ' c '], index=[5, 6, 7]))
+    assert rows.tolist() == [0, 0, 2]
+    assert list(items) == ['a', 'b', 'c']
+
+
+def test_explode_list_writes_numbers_in_full(engine):
+    # Not Arrow's '1.9186914634e+10'; to_e164 drops the '.0'
+    rows, items = explode_list(pd.Series([19186914634.0, np.nan]))
+    assert rows.tolist() == [0] and list(items) == ['19186914634.0']
+
+
+def test_normalize_emails():
+    emails = normalize_emails(pd.Series(['Jen@Example.com', 'bad@', 'a@b', 'x.y+z@mail.co.uk']))
+    assert emails.tolist()[0] == 'jen@example.com' and emails.tolist()[3] == 'x.y+z@mail.co.uk'
+    assert emails.isna().tolist() == [False, True, True, False]
+
+
+def test_explode_emails_ranks_and_dedupes_per_person(engine):
+    long = explode_emails(PEOPLE)
+    assert long['ROW'].tolist() == [0, 0, 1, 1, 1]
+    assert long['SOURCE'].tolist() == ['PERSONAL_EMAILS', 'BUSINESS_EMAIL',
+                                       'DEEP_VERIFIED_EMAILS', 'PERSONAL_EMAILS', 'BUSINESS_EMAIL']
+    assert list(long['EMAIL']) == ['carlos@gmail.com', 'carlos@acme.com',
+                                   'jen@verified.com', 'jen@example.com', 'jlopez@acme.com']
+
+
+def test_nth_item_fills_short_rows():
+    long = explode_columns(PEOPLE, ['BUSINESS_EMAIL', 'PERSONAL_EMAILS'], 'EMAIL', normalize_emails)
+    assert nth_item(long, 'EMAIL', 3, 1, fill='').tolist() == ['carlos@gmail.com', 'jen@example.com', '']
+    assert nth_item(long.iloc[:0], 'EMAIL', 2).tolist() == [None, None]
+
+
+def test_primary_and_secondary_emails(engine):
+    df = add_email_columns(PEOPLE.copy())
+    assert df['PRIMARY_EMAIL'].tolist()[:2] == ['carlos@gmail.com', 'jen@verified.com']
+    assert df['SECONDARY_EMAIL'].tolist()[:2] == ['carlos@acme.com', 'jen@example.com']
+    assert df[['PRIMARY_EMAIL', 'SECONDARY_EMAIL']].iloc[2].isna().all()
+    # Older outputs expect PERSONAL_EMAIL, filled from the new PERSONAL_EMAILS column
+    assert df['PERSONAL_EMAIL'].tolist() == ['carlos@gmail.com', 'jen@example.com', '']
+
+
+def test_normalize_domains():
+    domains = normalize_domains(pd.Series(['https://www.Acme.com/about', 'acme.com:443', ' ', None]))
+    assert domains.tolist()[:2] == ['acme.com', 'acme.com']
+    assert domains.isna().tolist() == [False, False, True, True]
+
+
+def test_domain_index_counts():
+    df = PEOPLE.assign(COMPANY_DOMAIN=['www.acme.com', 'https://other.com', None])
+    index = DomainIndex.build(df)
+    assert len(index) == 5
+    assert index.top_domains(2).to_dict() == {'acme.com': 2, 'gmail.com': 1}
+    assert index.top_domains(free=True).index.tolist() == ['gmail.com']
+    assert index.mail_types().to_dict() == {'Free mail': 1, 'Corporate': 4}
+    assert index.sources_by_type().loc['PERSONAL_EMAILS'].to_dict() == {'Corporate': 1, 'Free mail': 1}
+    summary = index.company_domain_summary()
+    assert summary[['Match', 'Mismatch', 'No company domain']].tolist() == [1, 1, 1]
+    assert summary.sum() == len(df)
+
+
+def test_domain_index_is_read_only():
+    index = DomainIndex.build(PEOPLE)
+    assert index.company_domain_summary() is None
+    with pytest.raises(ValueError):
+        index.codes[0] = 1
@@ -0,0 +1,111 @@
+import io
+import gzip
+import json
+
+import pandas as pd
+import pytest
+
+from leadcleanup import fileio
+from leadcleanup.fileio import read_frame, read_ndjson, serialize_frame, write_excel, write_ndjson
+
+LEADS = pd.DataFrame({
+    'FIRST_NAME': ['Jennifer', 'Carlos', None],
+    'PERSONAL_ZIP': ['33014', '02134', '90210'],
+    'PERSONAL_STATE': ['FL', 'MA', 'CA'],
+})
+
+
+def write(tmp_path, file_format):
+    data, _, ext = serialize_frame(LEADS, file_format)
+    path = tmp_path / f"leads.{ext}"
+    path.write_bytes(data)
+    return path
+
+
+@pytest.mark.parametrize('file_format', ['csv.gz', 'csv.zst'])
+def test_compressed_csv_round_trip(tmp_path, file_format):
+    df = read_frame(write(tmp_path, file_format))
+    pd.testing.assert_frame_equal(df, pd.read_csv(io.BytesIO(serialize_frame(LEADS, 'csv')[0])))
+
+
+def test_compressed_paths_are_closed_after_reading(tmp_path, monkeypatch):
+    opened = []
+
+    def recording_open(*args, **kwargs):
+        opened.append(gzip_open(*args, **kwargs))
+        return opened[-1]
+
+    gzip_open = gzip.open
+    monkeypatch.setattr(gzip, 'open', recording_open)
+    read_frame(write(tmp_path, 'csv.gz'))
+    assert len(opened) == 1 and opened[0].closed
+
+
+def test_compressed_file_objects_stay_open(tmp_path):
+    with open(write(tmp_path, 'csv.gz'), 'rb') as f:
+        assert len(read_frame(f)) == 3
+        assert not f.closed
+        f.seek(0)
+        assert len(read_frame(f)) == 3
+
+
+def test_parquet_round_trip_keeps_dtypes_and_reads_selected_columns(tmp_path):
+    df = LEADS.assign(PERSONAL_STATE=LEADS['PERSONAL_STATE'].astype('category'), AGE=[31, 45, 52])
+    path = tmp_path / 'leads.parquet'
+    path.write_bytes(serialize_frame(df, 'parquet')[0])
+    pd.testing.assert_frame_equal(read_frame(path), df)
+    assert read_frame(path, columns=['AGE', 'NOT_THERE']).columns.tolist() == ['AGE']
+
+
+def test_parquet_files_with_several_row_groups_read_whole(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    df = pd.DataFrame({'PERSONAL_ZIP': [f'{zip5:05d}' for zip5 in range(100)]})
+    path = tmp_path / 'groups.parquet'
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, row_group_size=30)
+    assert pq.ParquetFile(path).num_row_groups == 4
+    pd.testing.assert_frame_equal(read_frame(path), df)
+
+
+@pytest.mark.parametrize('engine', ['xlsxwriter', 'openpyxl'])
+def test_excel_rolls_over_to_new_sheets(tmp_path, monkeypatch, engine):
+    if engine == 'xlsxwriter':
+        pytest.importorskip('xlsxwriter')
+    else:
+        monkeypatch.setattr(fileio, 'xlsxwriter', None)
+    path = tmp_path / 'leads.xlsx'
+    write_excel(LEADS, str(path), max_rows=3)
+    sheets = pd.read_excel(path, sheet_name=None, dtype=str)
+    assert list(sheets) == ['Sheet1', 'Sheet2']
+    assert [len(sheet) for sheet in sheets.values()] == [2, 1]
+    combined = pd.concat(sheets.values(), ignore_index=True)
+    assert combined.columns.tolist() == LEADS.columns.tolist()
+    # Text stays text (the leading zero of 02134 survives) and missing values are empty cells
+    assert combined.fillna('').values.tolist() == LEADS.fillna('').values.tolist()
+
+
+def test_ndjson_round_trip_in_blocks(tmp_path):
+    buffer = io.BytesIO()
+    write_ndjson(LEADS, buffer, block_rows=2)
+    lines = buffer.getvalue().splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[2])['FIRST_NAME'] is None
+    path = tmp_path / 'leads.ndjson'
+    path.write_bytes(buffer.getvalue())
+    df = read_ndjson(str(path), block_rows=2)
+    assert df.columns.tolist() == LEADS.columns.tolist()
+    assert df['PERSONAL_ZIP'].tolist() == ['33014', '02134', '90210']
+    assert pd.isna(df['FIRST_NAME'][2])
+
+
+def test_ndjson_reader_skips_blank_lines_and_unwanted_keys():
+    source = io.BytesIO(b'{"FIRST_NAME":"Jennifer","PERSONAL_ZIP":"33014"}\n\n'
+                        b'{"PERSONAL_ZIP":"02134","EXTRA":1}\n')
+    df = read_ndjson(source, columns=['PERSONAL_ZIP', 'FIRST_NAME', 'NOT_THERE'], block_rows=1)
+    assert df.columns.tolist() == ['PERSONAL_ZIP', 'FIRST_NAME']
+    assert df['PERSONAL_ZIP'].tolist() == ['33014', '02134']
+    assert pd.isna(df['FIRST_NAME'][1])
+
+
+def test_empty_ndjson_reads_as_an_empty_frame():
+    assert read_ndjson(io.BytesIO(b'\n')).empty
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from leadcleanup.columns import fill_missing
+from leadcleanup.formats import compact_dtypes
+
+
+def leads(n=20):
+    return pd.DataFrame({
+        'PERSONAL_STATE': (['FL', 'TX', None, 'CA'] * n)[:n],
+        'FIRST_NAME': [f'Name{i}' for i in range(n)],
+        'DNC': (['Y', 'N'] * n)[:n],
+        'MOBILE_PHONE_DNC': (['N', None] * n)[:n],
+        'AGE': np.arange(n, dtype=np.int64),
+        'PERSONAL_ZIP': np.linspace(33014, 33033, n).round(),
+        'SCORE': np.linspace(0.5, 9.5, n),
+    })
+
+
+def test_compact_dtypes_only_changes_memory_layout():
+    df = leads()
+    compacted, report = compact_dtypes(df)
+    assert report['categorical'] == ['DNC', 'MOBILE_PHONE_DNC', 'PERSONAL_STATE']
+    assert report['downcast'] == ['AGE', 'PERSONAL_ZIP']
+    assert report['bytes_after'] < report['bytes_before']
+    # DNC flag columns share one dictionary
+    assert compacted['DNC'].dtype == compacted['MOBILE_PHONE_DNC'].dtype
+    assert compacted['FIRST_NAME'].dtype == object
+    assert compacted['SCORE'].dtype == np.float64
+    # Written files stay byte-identical
+    assert compacted.to_csv(index=False) == df.to_csv(index=False)
+    assert df['PERSONAL_STATE'].dtype == object
+
+
+def test_high_cardinality_columns_stay_text():
+    df = pd.DataFrame({'PERSONAL_STATE': [f'S{i}' for i in range(10)]})
+    assert compact_dtypes(df)[1]['categorical'] == []
+
+
+def test_fill_missing_adds_the_category_first():
+    states = compact_dtypes(leads())[0]['PERSONAL_STATE']
+    filled = fill_missing(states, 'MISSING')
+    assert 'MISSING' in filled.cat.categories
+    assert filled.isna().sum() == 0
+    assert (filled == 'MISSING').sum() == states.isna().sum()
+    assert fill_missing(pd.Series(['a', None]), '').tolist() == ['a', '']
+
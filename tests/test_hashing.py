@@ -0,0 +1,71 @@
+import hashlib
+
+import pandas as pd
+
+from leadcleanup.hashing import HASH_TYPES, audience_hashes, hash_values, to_e164
+
+
+def sha256(value):
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def test_hash_values_matches_hashlib_for_repeated_values():
+    values = pd.Series(['a@x.com', 'b@x.com', 'a@x.com'])
+    assert hash_values(values).tolist() == [sha256('a@x.com'), sha256('b@x.com'), sha256('a@x.com')]
+    assert hash_values(values, 'md5')[1] == hashlib.md5(b'b@x.com').hexdigest()
+    assert len(hash_values(pd.Series([], dtype=object))) == 0
+
+
+def test_emails_are_normalized_and_hashed_once_per_person():
+    df = pd.DataFrame({
+        'FIRST_NAME': ['Jennifer', 'Jennifer', 'Carlos'],
+        'LAST_NAME': ['Lopez', 'Lopez', 'Diaz'],
+        'PERSONAL_EMAILS': [' Jen@Example.com , not-an-email', 'jen@example.com', None],
+        'BUSINESS_EMAIL': ['jlopez@acme.com', None, 'carlos@acme.com'],
+    })
+    hashed, counts = audience_hashes(df)
+    assert hashed.columns.tolist() == ['FIRST_NAME', 'LAST_NAME', 'IDENTIFIER_TYPE', 'HASH_TYPE', 'HASH']
+    # The second Jennifer record repeats her address, so it is exported once
+    assert hashed['HASH'].tolist() == [sha256('jen@example.com'), sha256('jlopez@acme.com'), sha256('carlos@acme.com')]
+    assert hashed['FIRST_NAME'].tolist() == ['Jennifer', 'Jennifer', 'Carlos']
+    assert (hashed['HASH_TYPE'] == 'SHA256').all()
+    assert counts == {'PERSONAL_EMAILS': 1, 'BUSINESS_EMAIL': 2}
+
+
+def test_vendor_hashes_pass_through_without_raw_emails():
+    vendor = sha256('jen@example.com').upper()
+    df = pd.DataFrame({'FIRST_NAME': ['Jennifer'], 'LAST_NAME': ['Lopez'], 'SHA256_PERSONAL_EMAIL': [vendor]})
+    hashed, counts = audience_hashes(df)
+    assert hashed['HASH'].tolist() == [vendor.lower()]
+    assert counts == {'SHA256_PERSONAL_EMAIL': 1}
+
+
+def test_to_e164():
+    phones = pd.Series(['(555) 123-4567', '15551234567.0', '+44 20 7946 0958', '123', '25551234567'])
+    assert to_e164(phones).tolist() == ['+15551234567', '+15551234567', '+442079460958', None, None]
+
+
+def test_every_identifier_is_hashed_with_every_hash_type():
+    df = pd.DataFrame({
+        'FIRST_NAME': ['Jennifer', 'Carlos'],
+        'LAST_NAME': ['Lopez', 'Diaz'],
+        'PERSONAL_EMAILS': ['jen@example.com', None],
+        'MOBILE_PHONE': ['5551234567', '555-987-6543, 123'],
+    })
+    hashed, counts = audience_hashes(df, identifiers=('EMAIL', 'PHONE'), hash_types=tuple(HASH_TYPES))
+    assert counts == {'PERSONAL_EMAILS': 1, 'MOBILE_PHONE': 2}
+    # Three identifiers, each under three hash types
+    assert len(hashed) == 9
+    jennifer = hashed[hashed['FIRST_NAME'] == 'Jennifer']
+    assert sorted(zip(jennifer['IDENTIFIER_TYPE'], jennifer['HASH_TYPE'])) == sorted(
+        (kind, hash_type) for kind in ('EMAIL', 'PHONE') for hash_type in HASH_TYPES)
+    phone = jennifer[(jennifer['IDENTIFIER_TYPE'] == 'PHONE') & (jennifer['HASH_TYPE'] == 'MD5')]
+    assert phone['HASH'].tolist() == [hashlib.md5(b'+15551234567').hexdigest()]
+    assert (hashed[hashed['FIRST_NAME'] == 'Carlos']['IDENTIFIER_TYPE'] == 'PHONE').all()
+
+
+def test_no_identifiers_gives_an_empty_frame():
+    df = pd.DataFrame({'FIRST_NAME': ['Jennifer'], 'PERSONAL_EMAILS': ['jen@example.com']})
+    hashed, counts = audience_hashes(df, identifiers=())
+    assert hashed.empty and counts == {}
+    assert hashed.columns.tolist() == ['FIRST_NAME', 'IDENTIFIER_TYPE', 'HASH_TYPE', 'HASH']
@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from leadcleanup import history
+from leadcleanup.history import history_contains, parse_history, parse_history_columns
+
+COMPANIES = pd.Series(['["Acme Corp", "Globex"]', None, 'not json', '{"name": "Acme"}', '["Acme Corp", "Globex"]'],
+                      index=[3, 4, 5, 6, 7], name='COMPANY_NAME_HISTORY')
+EDUCATION = pd.Series([
+    '[{"name": "State University", "url": "su.edu", "extraction_order": 1, "extraction_date": "2024-01-01"}]',
+    '["Community College", null]',
+    '[]',
+], name='EDUCATION_HISTORY')
+
+
+@pytest.fixture(params=['arrow', 'python'])
+def engine(request, monkeypatch):
+    if request.param == 'python':
+        monkeypatch.setattr(history, 'pa', None)
+    elif history.pa is None:
+        pytest.skip('pyarrow is not installed')
+    return request.param
+
+
+def as_lists(parsed):
+    return [None if items is None or not isinstance(items, list) and pd.isna(items) else list(items)
+            for items in parsed.tolist()]
+
+
+def test_parse_history_decodes_lists(engine):
+    parsed = parse_history(COMPANIES, 'COMPANY_NAME_HISTORY')
+    assert parsed.index.equals(COMPANIES.index) and parsed.name == 'COMPANY_NAME_HISTORY'
+    # Missing, malformed and non-array cells all become missing
+    assert as_lists(parsed) == [['Acme Corp', 'Globex'], None, None, None, ['Acme Corp', 'Globex']]
+    if engine == 'arrow':
+        assert isinstance(parsed.dtype, pd.ArrowDtype)
+
+
+def test_education_entries_keep_the_known_fields(engine):
+    parsed = as_lists(parse_history(EDUCATION, 'EDUCATION_HISTORY'))
+    assert parsed[0] == [{'name': 'State University', 'url': 'su.edu', 'extraction_order': 1,
+                          'extraction_date': '2024-01-01'}]
+    # A bare string is the school name
+    assert parsed[1] == [{'name': 'Community College', 'url': None, 'extraction_order': None,
+                          'extraction_date': None}]
+    assert parsed[2] == []
+
+
+def test_history_contains(engine):
+    companies = parse_history(COMPANIES, 'COMPANY_NAME_HISTORY')
+    assert history_contains(companies, 'acme').tolist() == [True, False, False, False, True]
+    assert history_contains(companies, 'acme').index.equals(COMPANIES.index)
+    schools = parse_history(EDUCATION, 'EDUCATION_HISTORY')
+    assert history_contains(schools, 'college', field='name').tolist() == [False, True, False]
+    assert not history_contains(schools, 'su.edu', field='name').any()
+    assert history_contains(schools, 'su.edu', field='url').tolist() == [True, False, False]
+
+
+def test_parse_history_columns_leaves_the_raw_text():
+    df = pd.DataFrame({'FIRST_NAME': ['Jennifer', 'Carlos', 'Ana'], 'EDUCATION_HISTORY': EDUCATION})
+    parsed = parse_history_columns(df)
+    assert parsed.columns.tolist() == ['EDUCATION_HISTORY']
+    assert parsed.index.equals(df.index)
+    assert df['EDUCATION_HISTORY'].equals(EDUCATION)
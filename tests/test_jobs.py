@@ -0,0 +1,85 @@
+import threading
+
+import pandas as pd
+
+from leadcleanup.jobs import JobManager, job_key
+from leadcleanup.resultcache import ResultCache
+
+
+def counting(calls, value=1, fail=False, release=None):
+    def func(progress):
+        calls.append(value)
+        if release is not None:
+            release.wait(5)
+        progress(0.5, "Halfway")
+        if fail:
+            raise RuntimeError("boom")
+        return pd.DataFrame({'VALUE': [value]})
+    return func
+
+
+def test_job_key_is_stable_and_covers_settings():
+    assert job_key('abc', 'Split by State', {'b': 1, 'a': 2}) == job_key('abc', 'Split by State', {'a': 2, 'b': 1})
+    assert job_key('abc', 'Split by State', {'a': 2}) != job_key('abc', 'Split by State', {'a': 3})
+    assert job_key('abc', 'Split by State') != job_key('abd', 'Split by State')
+
+
+def test_same_key_reuses_the_running_and_finished_job():
+    manager = JobManager(max_workers=1)
+    calls, release = [], threading.Event()
+    first = manager.submit('key', counting(calls, release=release))
+    second = manager.submit('key', counting(calls))
+    release.set()
+    assert first is second
+    assert first.wait(5)
+    assert manager.submit('key', counting(calls)) is first
+    assert calls == [1]
+    assert first.status == 'done' and first.progress == 1.0
+    assert first.result['VALUE'].tolist() == [1]
+
+
+def test_failed_jobs_run_again_on_the_next_submit():
+    manager = JobManager(max_workers=1)
+    calls = []
+    failed = manager.submit('key', counting(calls, fail=True))
+    failed.wait(5)
+    assert failed.status == 'failed' and failed.error == 'boom'
+    retried = manager.submit('key', counting(calls, value=2))
+    retried.wait(5)
+    assert retried is not failed
+    assert retried.result['VALUE'].tolist() == [2]
+
+
+def test_results_live_in_the_cache_and_evicted_jobs_rerun():
+    cache = ResultCache(max_bytes=10 ** 9)
+    manager = JobManager(max_workers=1, cache=cache)
+    calls = []
+    job = manager.submit('key', counting(calls))
+    job.wait(5)
+    assert 'key' in cache
+    cache.discard('key')
+    assert job.evicted and job.result is None
+    rerun = manager.submit('key', counting(calls, value=3))
+    rerun.wait(5)
+    assert rerun is not job and calls == [1, 3]
+
+
+def test_only_the_latest_finished_jobs_are_kept():
+    manager = JobManager(max_workers=1, max_finished=2)
+    for number in range(4):
+        manager.submit(f'key{number}', counting([])).wait(5)
+    manager.submit('last', counting([])).wait(5)
+    assert manager.find('key0') is None
+    assert manager.find('last') is not None
+    assert manager.counts()['done'] <= 3
+    assert manager.pending() == 0
+
+
+def test_evicted_jobs_are_handed_to_on_evict():
+    evicted = []
+    manager = JobManager(max_workers=1, max_finished=1, on_evict=evicted.append)
+    first = manager.submit('first', counting([]))
+    first.wait(5)
+    manager.submit('second', counting([])).wait(5)
+    manager.submit('third', counting([])).wait(5)
+    assert evicted == [first]
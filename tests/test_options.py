@@ -0,0 +1,74 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from leadcleanup.cli import main
+from leadcleanup.fileio import read_input
+from leadcleanup.options import HEADLESS_OPTIONS, duplicate_frequencies, parse_zip_codes, run_option
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, 'new_input.csv')
+
+# Inputs an option needs beyond the defaults
+OPTION_SETTINGS = {
+    "Filter by Zip Codes": {'zip_codes': ['75201', '33014']},
+    "Company Industry": {'industries': ['Government Administration']},
+}
+
+
+@pytest.fixture(scope='module')
+def sample():
+    return read_input(SAMPLE)[0]
+
+
+@pytest.mark.parametrize('option', HEADLESS_OPTIONS)
+def test_every_headless_option_runs(sample, option):
+    frames = run_option(sample, option, **OPTION_SETTINGS.get(option, {}))
+    assert frames
+    for name, frame in frames:
+        assert name and not name.startswith('/')
+        assert isinstance(frame, pd.DataFrame)
+
+
+def test_run_option_rejects_unknown_options(sample):
+    with pytest.raises(ValueError):
+        run_option(sample, "Not An Option")
+
+
+def test_parse_zip_codes():
+    assert parse_zip_codes("33014, 90210-1234\n02134") == ['33014', '90210', '02134']
+
+
+def test_duplicate_frequencies_on_a_categorical_column(sample):
+    result, _ = duplicate_frequencies(sample, method='columns', columns=['HOMEOWNER'])
+    assert result.columns[0] == 'FREQUENCY_COUNT'
+    assert result['FREQUENCY_COUNT'].sum() == len(sample)
+    assert result['FREQUENCY_COUNT'].is_monotonic_decreasing
+
+
+def test_company_industry_needs_a_filter(sample):
+    with pytest.raises(ValueError):
+        run_option(sample, "Company Industry")
+
+
+def test_cli_writes_one_folder_per_input(tmp_path):
+    out = tmp_path / 'out'
+    assert main(['run', '--option', 'Split by State', '--in', SAMPLE, '--out', str(out)]) == 0
+    written = sorted(path.name for path in (out / 'new_input').iterdir())
+    assert written and all(name.startswith('state_') and name.endswith('.csv') for name in written)
+
+
+def test_cli_combines_all_inputs_for_the_file_combiner(tmp_path):
+    out = tmp_path / 'out'
+    copy = tmp_path / 'copy.csv'
+    shutil.copy(SAMPLE, copy)
+    assert main(['run', '--option', 'File Combiner and Batcher', '--batch-size', '10',
+                 '--in', SAMPLE, str(copy), '--out', str(out)]) == 0
+    parts = sorted((out / 'combined').iterdir())
+    assert [path.name for path in parts] == ['batch_1.csv', 'batch_2.csv', 'batch_3.csv']
+    assert sum(len(pd.read_csv(path)) for path in parts) == 2 * len(read_input(SAMPLE)[0])
+
+
+def test_cli_rejects_unknown_options(tmp_path):
+    assert main(['run', '--option', 'Not An Option', '--in', SAMPLE, '--out', str(tmp_path)]) == 2
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+import pytest
+
+from leadcleanup.partitioning import GEOGRAPHIC_LEVELS, PartitionIndex, geographic_partitions
+
+
+def test_partition_index_slices_groups_without_missing_values():
+    df = pd.DataFrame({'PERSONAL_ZIP': ['33014', '90210', None, '33014'], 'ID': [1, 2, 3, 4]})
+    index = PartitionIndex.build(df, 'PERSONAL_ZIP')
+    assert index.keys() == ['33014', '90210']
+    assert index.counts().to_dict() == {'33014': 2, '90210': 1}
+    assert index.take(df, '33014', columns=['ID'])['ID'].tolist() == [1, 4]
+    assert len(index.take(df, '00000')) == 0
+    with pytest.raises(ValueError):
+        index.take(df.iloc[:2], '33014')
+
+
+def test_partition_index_on_categoricals_skips_empty_categories():
+    df = pd.DataFrame({'PERSONAL_STATE': pd.Categorical(['TX', 'FL', None, 'TX'], categories=['CA', 'FL', 'TX'])})
+    index = PartitionIndex.build(df, 'PERSONAL_STATE')
+    assert index.keys() == ['FL', 'TX']
+    assert 'CA' not in index
+    assert index.positions('TX').tolist() == [0, 3]
+
+
+def leads(zips, state='FL'):
+    return pd.DataFrame({'PERSONAL_STATE': [state] * len(zips), 'PERSONAL_ZIP': zips})
+
+
+def layout(partitions):
+    return {path: (level, len(positions)) for path, level, positions in partitions}
+
+
+def test_geographic_partitions_nest_large_groups():
+    df = leads(['33014'] * 3 + ['33015'] * 3 + ['32801'] * 3)
+    partitions = geographic_partitions(df, min_group_size=3)
+    assert layout(partitions) == {
+        'FL/328/32801': ('ZIP5', 3),
+        'FL/330/33014': ('ZIP5', 3),
+        'FL/330/33015': ('ZIP5', 3),
+    }
+    assert {level for _, level, _ in partitions} <= set(GEOGRAPHIC_LEVELS)
+
+
+def test_small_zip5_groups_roll_up_into_zip3():
+    df = leads(['33014'] * 4 + ['33015', '33016', '33017', '33018'])
+    assert layout(geographic_partitions(df, min_group_size=4)) == {
+        'FL/330/33014': ('ZIP5', 4),
+        'FL/330': ('ZIP3', 4),
+    }
+
+
+def test_undersized_zip3_remainder_rolls_up_into_state():
+    # 33015 and 33016 leave a ZIP3 remainder of 2 rows, below the threshold of 4
+    df = leads(['33014'] * 4 + ['33015', '33016'] + ['32801'] * 2 + [None])
+    assert layout(geographic_partitions(df, min_group_size=4)) == {
+        'FL/330/33014': ('ZIP5', 4),
+        'FL': ('State', 5),
+    }
+
+
+def test_every_row_lands_in_exactly_one_batched_file():
+    rng = np.random.default_rng(0)
+    df = leads([f"{zip5:05d}" for zip5 in rng.integers(33000, 33060, size=500)])
+    partitions = geographic_partitions(df, min_group_size=10, batch_size=20)
+    positions = np.concatenate([positions for _, _, positions in partitions])
+    assert sorted(positions) == list(range(len(df)))
+    assert all(len(positions) <= 20 for _, _, positions in partitions)
+    assert any('_part_' in path for path, _, _ in partitions)
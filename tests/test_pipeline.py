@@ -0,0 +1,97 @@
+import pandas as pd
+import pytest
+
+from leadcleanup import pipeline
+from leadcleanup.options import build_address_plan
+from leadcleanup.pipeline import DropMissing, FillMissing, JoinColumns, MapUnique, Plan, Stage
+from leadcleanup.templates import HONW_PHONE_TEMPLATE, compile_template
+
+CALLS = []
+
+
+def shout(value):
+    CALLS.append(value)
+    return 'NONE' if pd.isna(value) else str(value).upper()
+
+
+def leads(n=6):
+    return pd.DataFrame({
+        'PERSONAL_ADDRESS': (['1 main st', '2 oak ave', None] * n)[:n],
+        'PERSONAL_CITY': (['Miami', 'Tampa'] * n)[:n],
+        'PERSONAL_STATE': ['FL'] * n,
+        'MOBILE_PHONE': (['3055550100', None] * n)[:n],
+        'UNUSED': range(n),
+    })
+
+
+def test_plan_skips_unused_stages_and_reads_only_needed_columns():
+    df = leads()
+    plan = Plan([
+        DropMissing('PERSONAL_ADDRESS'),
+        MapUnique('MOBILE_PHONE', shout, 'PHONE_UPPER'),
+        JoinColumns('ADDRESS', ['PERSONAL_ADDRESS', 'PERSONAL_CITY']),
+    ], ['ADDRESS'])
+    result, stats = plan.execute(df)
+    assert result.columns.tolist() == ['ADDRESS']
+    assert result['ADDRESS'].tolist() == ['1 main st, Miami', '2 oak ave, Tampa', '1 main st, Tampa', '2 oak ave, Miami']
+    assert result.index.tolist() == [0, 1, 3, 4]
+    assert stats['stages_skipped'] == 1
+    assert stats['columns_read'] == 2
+    assert plan.columns(df.columns) == ['PERSONAL_ADDRESS', 'PERSONAL_CITY']
+
+
+def test_map_unique_calls_the_function_once_per_distinct_value():
+    CALLS.clear()
+    frame = pd.DataFrame({'CITY': ['miami', 'tampa', 'miami', None, 'miami']})
+    stage = MapUnique('CITY', shout)
+    stage.run(frame)
+    assert frame['CITY'].tolist() == ['MIAMI', 'TAMPA', 'MIAMI', 'NONE', 'MIAMI']
+    assert stage.unique_count == 2
+    assert len(CALLS) == 3
+
+
+def test_stages_must_implement_run():
+    class Forgetful(Stage):
+        output = 'OUT'
+
+    with pytest.raises(TypeError):
+        Forgetful()
+
+
+def test_drop_missing_runs_like_any_other_stage():
+    frame = pd.DataFrame({'CITY': ['miami', None, 'tampa']}, index=[4, 5, 6])
+    assert DropMissing('CITY').run(frame)['CITY'].tolist() == ['miami', 'tampa']
+    # A filter after another stage sees that stage's output
+    plan = Plan([MapUnique('CITY', lambda value: None if value == 'tampa' else value, 'KEPT'),
+                 DropMissing('KEPT')], ['KEPT'])
+    result, stats = plan.execute(frame)
+    assert result['KEPT'].tolist() == ['miami'] and result.index.tolist() == [4]
+    assert stats['rows_out'] == 1
+
+
+def test_execute_leaves_the_input_frame_untouched():
+    df = leads()
+    before = df.copy()
+    Plan([FillMissing({'MOBILE_PHONE': ''}), MapUnique('PERSONAL_CITY', shout)],
+         ['PERSONAL_CITY', 'MOBILE_PHONE']).execute(df)
+    pd.testing.assert_frame_equal(df, before)
+
+
+def test_equal_plans_describe_equally():
+    template = compile_template(HONW_PHONE_TEMPLATE)
+    assert build_address_plan(template, ['ADDRESS', 'DATA']).describe() == \
+        build_address_plan(template, ['ADDRESS', 'DATA']).describe()
+    assert build_address_plan(template, ['ADDRESS', 'DATA']).describe() != \
+        build_address_plan(template, ['ADDRESS', 'DATA'], format_phones=True).describe()
+
+
+def test_parallel_execution_matches_a_single_process(monkeypatch):
+    monkeypatch.setattr(pipeline, 'PARALLEL_MIN_ROWS', 10)
+    df = leads(90)
+    plan = Plan([DropMissing('PERSONAL_ADDRESS'), MapUnique('PERSONAL_ADDRESS', shout, 'CLEAN'),
+                 JoinColumns('ADDRESS', ['CLEAN', 'PERSONAL_CITY', 'PERSONAL_STATE'])], ['ADDRESS'])
+    single, _ = plan.execute(df)
+    parallel, stats = plan.execute(df, workers=3)
+    pd.testing.assert_frame_equal(single, parallel)
+    assert stats['workers'] == 3
+    assert stats['rows_in'] == len(df) and stats['rows_out'] == len(single)
@@ -0,0 +1,83 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from leadcleanup.resultcache import ResultCache, estimate_size
+
+
+def frame(n, value=0):
+    return pd.DataFrame({'PERSONAL_ZIP': np.full(n, value, dtype=np.int64)})
+
+
+def test_evicts_least_recently_used_by_bytes():
+    size = estimate_size(frame(100))
+    cache = ResultCache(max_bytes=int(size * 2.5))
+    cache.put('a', frame(100))
+    cache.put('b', frame(100))
+    cache.get('a')
+    cache.put('c', frame(100))
+    assert 'b' not in cache
+    assert 'a' in cache and 'c' in cache
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['bytes'] <= cache.max_bytes
+
+
+def test_spilled_frames_are_read_back(tmp_path):
+    pytest.importorskip('pyarrow')
+    size = estimate_size(frame(100))
+    cache = ResultCache(max_bytes=int(size * 1.5), spill_dir=str(tmp_path))
+    cache.put('a', frame(100, 1))
+    cache.put('b', frame(100, 2))
+    assert cache.stats()['spilled_entries'] == 1
+    assert len(list(tmp_path.iterdir())) == 1
+
+    pd.testing.assert_frame_equal(cache.get('a'), frame(100, 1))
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['spills'] == 2
+    # Reading 'a' back evicted 'b' in turn; only one file is ever on disk
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_spill_is_abandoned_when_the_key_is_stored_again(tmp_path):
+    pytest.importorskip('pyarrow')
+    cache = ResultCache(max_bytes=10 ** 9, spill_dir=str(tmp_path))
+    key, value, token = cache._evict('a', frame(10, 1))
+    # Another session stores the key while the old value is still being written
+    cache.put('a', frame(10, 2))
+    cache._spill(key, value, token)
+    assert cache.stats()['spilled_entries'] == 0
+    assert list(tmp_path.iterdir()) == []
+    pd.testing.assert_frame_equal(cache.get('a'), frame(10, 2))
+
+
+def test_discard_and_clear_remove_spill_files(tmp_path):
+    pytest.importorskip('pyarrow')
+    cache = ResultCache(max_bytes=1, spill_dir=str(tmp_path))
+    cache.put('a', frame(10))
+    cache.put('b', frame(10))
+    cache.discard('a')
+    assert 'a' not in cache
+    cache.clear()
+    assert list(tmp_path.iterdir()) == []
+    assert cache.stats()['entries'] == 0
+
+
+def test_counters_are_exact_under_concurrent_gets():
+    cache = ResultCache(max_bytes=10 ** 9)
+    cache.put('hit', frame(10))
+    rounds = 2000
+
+    def worker():
+        for _ in range(rounds):
+            cache.get('hit')
+            cache.get('miss')
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert stats['hits'] == stats['misses'] == 8 * rounds
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from leadcleanup.templates import DATA_TEMPLATES, HONW_PHONE_TEMPLATE, HONW_TEMPLATE, TemplateError, compile_template
+
+LEADS = pd.DataFrame({
+    'HOMEOWNER': pd.Categorical(['Y', None, 'N']),
+    'NET_WORTH': ['$100k', '$250k', None],
+    'INCOME_RANGE': ['$50k', '$75k', '$90k'],
+    'MOBILE_PHONE': ['3055550100', '3055550101', ''],
+    'DNC': ['N', 'Y', 'N'],
+}, index=[7, 8, 9])
+
+
+def test_phone_template_renders_the_optional_segment_only_where_allowed():
+    rendered = compile_template(HONW_PHONE_TEMPLATE).render(LEADS)
+    assert rendered.tolist() == [
+        'Ho Y | NW $100k | Income $50k | Phone 3055550100',
+        # DNC is 'Y'; the missing HOMEOWNER is left out
+        'NW $250k | Income $75k',
+        # The phone is empty
+        'Ho N | Income $90k',
+    ]
+    assert rendered.index.equals(LEADS.index)
+
+
+def test_missing_honw_values_are_left_out():
+    df = pd.DataFrame({
+        'HOMEOWNER': [None, 'Y', '', None],
+        'NET_WORTH': [None, None, '$250k', None],
+        'INCOME_RANGE': [None, None, None, '$90k'],
+        'MOBILE_PHONE': ['3055550100', '', '', ''],
+        'DNC': ['N', 'N', 'N', 'N'],
+    })
+    assert compile_template(HONW_TEMPLATE).render(df).tolist() == [
+        'No HoNWIncome data available', 'Ho Y', 'NW $250k', 'Income $90k',
+    ]
+    assert compile_template(HONW_PHONE_TEMPLATE).render(df)[0] == 'No HoNWIncome data available | Phone 3055550100'
+
+
+def test_separators_only_join_non_empty_parts():
+    template = compile_template("{?<{HOMEOWNER}>}{+, }{NET_WORTH}{!none}")
+    assert template.render(LEADS).tolist() == ['<Y>, $100k', '$250k', '<N>']
+    assert template.render(LEADS.assign(HOMEOWNER=None, NET_WORTH=None)).tolist() == ['none'] * 3
+
+
+def test_conditions_combine_with_and_and_missing_columns_render_empty():
+    template = compile_template("{{{INCOME_RANGE}}}{? owner if HOMEOWNER=='Y' and DNC!='Y'}{NOT_A_COLUMN}")
+    assert template.render(LEADS).tolist() == ['{$50k} owner', '{$75k}', '{$90k}']
+    assert template.columns == ['DNC', 'HOMEOWNER', 'INCOME_RANGE', 'NOT_A_COLUMN']
+
+
+def test_compile_template_reuses_parsed_templates():
+    assert compile_template(DATA_TEMPLATES["ZIP Split: Address+HoNW"]) is compile_template(
+        DATA_TEMPLATES["Address + HoNWIncome"])
+
+
+@pytest.mark.parametrize('text', [
+    "Ho {HOMEOWNER",
+    "Ho {HOME OWNER}",
+    "Ho }",
+    "{? Phone {MOBILE_PHONE} if DNC='Y'}",
+    "{? Phone {MOBILE_PHONE}",
+    "{+ | ",
+    "{!No {HOMEOWNER}}",
+])
+def test_invalid_templates_raise(text):
+    with pytest.raises(TemplateError):
+        compile_template(text)